@@ -14,7 +14,9 @@ This script is based on
 The difference is that `createTargetPDF.py` uses Python2, And the 1st tag
 render at left bottom, 36th tag render at right top.
 
-The result will show on window and save to png file.
+The board is composed headlessly into a numpy image by `compose_april_board`
+and saved to png file. With `-p` option, the board is also rendered on Tk
+window as preview and saved to eps file.
 
 Note that another AprilTags project `Github apriltag-generation <https://github.com/AprilRobotics/apriltag-generation>`_
 will generate another format of family Tag36h11
@@ -25,24 +27,55 @@ has 120 pixels, interval between tags is 30 pixels, also render 100 pixels arrow
     python3 AprilTagsGenerator.py -x 6 -y 6 -s 120 -i 0.25 -a 100
 
 Version: 1.0 2020-12-31 Finish rendering AprilTags of family Tag36h11.
+Version: 1.1 2026-10-17 Render headlessly into numpy image and write png
+                        directly. Tk canvas is only used with `-p` preview.
+Version: 1.2 2026-10-17 Fetch tag bit pattern from cached
+                        `TagFamily.code_matrices()`.
+Version: 1.3 2026-10-17 Compose the whole board with batched numpy operations
+                        in `BoardCompositor.py`, see `BoardBenchmark.py`.
+Version: 1.4 2026-10-17 Add `-f` and `-d` options to write svg and pdf with
+                        merged rectangles by `VectorWriter.py`.
+Version: 1.5 2026-10-17 Split rendering and saving into reusable functions,
+                        add `--family` option. Many boards can be generated
+                        in parallel by `BatchGenerator.py`.
+Version: 1.6 2026-10-17 Add `--cache` option to reuse identical boards from
+                        content-addressed `RenderCache`.
+Version: 1.7 2026-10-17 Add `-S` option to stream png band by band with
+                        `StreamingPngWriter`, memory no longer grows with
+                        board height.
+Version: 1.8 2026-10-17 Add `-t checkerboard` and `-t charuco` boards
+                        composed by `PatternCompositor.py`. For them `-s`
+                        is square size and `-i` is margin ratio.
+Version: 1.9 2026-10-17 Add `-m` option to render tags of exact physical size
+                        with anti-aliasing by `ExactRenderer.py`.
 
 
 """
 
 import math
 import optparse
-import tkinter as tk
-from tkinter import Canvas
-from tkinter.tix import Tk
-
-from copy import deepcopy
-
-from PIL import Image
+import os
+import sys
 
 # =============================================================================
 # Imports
 # =============================================================================
-from cv_kits.april_tags.families.Tag36h11 import Tag36h11
+from cv_kits.april_tags.ArrayCanvas import ArrayCanvas, _round_pixel, \
+    text_box
+from cv_kits.april_tags.BoardCompositor import compose_april_board, \
+    grid_layout, grid_pixels, grid_starts
+from cv_kits.april_tags.ExactRenderer import save_exact_board, \
+    save_exact_geometry
+from cv_kits.april_tags.BoardGeometry import save_board_geometry, \
+    save_pattern_geometry
+from cv_kits.april_tags.PatternCompositor import compute_pattern_layout, \
+    render_pattern_image
+from cv_kits.april_tags.PngWriter import StreamingPngWriter
+from cv_kits.april_tags.RenderCache import RenderCache, board_cache_key
+from cv_kits.april_tags.VectorWriter import black_mask, \
+    merge_black_rectangles, write_pdf, write_svg
+from cv_kits.april_tags.families import create_tag_family
+from cv_kits.april_tags.families.TagFamily import analysis_errors
 
 
 def render_april_board(_canvas, _num_x, _num_y, _tag_size,
@@ -50,7 +83,7 @@ def render_april_board(_canvas, _num_x, _num_y, _tag_size,
     """
     generate multi tags and render to canvas
 
-    :param _canvas: target canvas
+    :param _canvas: target canvas, either `tkinter.Canvas` or `ArrayCanvas`
     :param _num_x: num of tags every row
     :param _num_y: num of tags every column
     :param _tag_size: every tag size in pixels
@@ -156,44 +189,30 @@ def render_tag_border(_canvas, _start_x, _start_y, _tag_size, _border_size,
 
 
 def render_tag_data(_canvas, _start_x, _start_y, _tag_bits, _pixels_per_bit,
-                    _tag_code):
+                    _tag_pattern):
     """
-    Render tag by `_tag_code`
+    Render tag by `_tag_pattern`
 
     Note:
-    Rotate operation can be done with numpy:
-
-        code_matrix = np.zeros((_tag_bits, _tag_bits))
-        for i in range(0, _tag_bits):
-            for j in range(0, _tag_bits):
-                if not _tag_code & (1 << _tag_bits * i + j):
-                    code_matrix[i, j] = 1
-        # rotate matrix twice
-        code_matrix = np.rot90(code_matrix, 2)
+    `_tag_pattern` comes from `TagFamily.code_matrix()`, which has decoded
+    and rotated every code once with numpy. So there is no bit operation or
+    rotation here any more.
 
     :param _canvas:
     :param _start_x:
     :param _start_y:
     :param _tag_bits:
     :param _pixels_per_bit:
-    :param _tag_code:
+    :param _tag_pattern: bool matrix, True means white bit
     :return:
     """
-    _curr_array = [[0 for col in range(_tag_bits)] for row in range(_tag_bits)]
-    for i in range(0, _tag_bits):
-        for j in range(0, _tag_bits):
-            if _tag_code & (1 << _tag_bits * i + j):
-                _curr_array[i][j] = 1
-    rotate_90(_curr_array, _tag_bits, _tag_bits)
-    rotate_90(_curr_array, _tag_bits, _tag_bits)
-
     for i in range(0, _tag_bits):
         for j in range(0, _tag_bits):
             _lt_x = _start_x + j * _pixels_per_bit
             _lt_y = _start_y + i * _pixels_per_bit
             _rb_x = _lt_x + _pixels_per_bit
             _rb_y = _lt_y + _pixels_per_bit
-            if _curr_array[i][j]:
+            if _tag_pattern[i, j]:
                 _canvas.create_rectangle(_lt_x, _lt_y, _rb_x, _rb_y,
                                          fill='white', outline="")
             else:
@@ -201,20 +220,6 @@ def render_tag_data(_canvas, _start_x, _start_y, _tag_bits, _pixels_per_bit,
                                          fill='black', outline="")
 
 
-def rotate_90(_data_array, _width, _height):
-    """
-    Rotate 2d array 90 on z axis (right hand)
-    :param _data_array:
-    :param _width:
-    :param _height:
-    :return:
-    """
-    _ori_array = deepcopy(_data_array)
-    for rIdx in range(_height):
-        for cIdx in range(_width):
-            _data_array[_width - 1 - cIdx][rIdx] = _ori_array[rIdx][cIdx]
-
-
 def render_single_april_tag(_canvas, _start_x, _start_y, _tag_size,
                             _tag_interval_ratio,
                             _tag_id, _tag_family, _symmetric_corners=True,
@@ -234,7 +239,7 @@ def render_single_april_tag(_canvas, _start_x, _start_y, _tag_size,
     :param _type: border type
     :return: None
     """
-    _tag_code = _tag_family.tagCodes[_tag_id]
+    _tag_pattern = _tag_family.code_matrix(_tag_id)
     _tag_bits = math.sqrt(_tag_family.area)
     _pixels_per_bit = _tag_size / (_tag_bits + _tag_border_bits * 2)
     _pixels_per_bit = int(_pixels_per_bit)
@@ -244,7 +249,7 @@ def render_single_april_tag(_canvas, _start_x, _start_y, _tag_size,
     render_tag_border(_canvas, _start_x, _start_y, _tag_size, _border_size,
                       _type)
     render_tag_data(_canvas, _start_x + _border_size, _start_y + _border_size,
-                    _tag_bits, _pixels_per_bit, _tag_code)
+                    _tag_bits, _pixels_per_bit, _tag_pattern)
 
     if _symmetric_corners:
         corner_size = _tag_interval_ratio * _tag_size
@@ -274,6 +279,9 @@ def render_single_april_tag(_canvas, _start_x, _start_y, _tag_size,
         _canvas.create_rectangle(_lt_x, _lt_y, _rb_x, _rb_y, fill='black')
 
 
+AXIS_FONT = "Consolas 20 bold"
+
+
 def render_axis(_canvas, _start_x, _start_y, axis_len):
     """
     Render x and y axis, which can note first and last tag
@@ -285,28 +293,298 @@ def render_axis(_canvas, _start_x, _start_y, axis_len):
     :return:
     """
     # Draw x axis
+    # `arrow='last'` is the value of `tkinter.LAST`
     _canvas.create_line(_start_x, _start_y, _start_x + axis_len, _start_y,
-                        arrow=tk.LAST, width=3, fill='red')
+                        arrow='last', width=3, fill='red')
     # Draw y axis
     _canvas.create_line(_start_x, _start_y, _start_x, _start_y + axis_len,
-                        arrow=tk.LAST, width=3, fill='green')
+                        arrow='last', width=3, fill='green')
 
     _canvas.create_text(_start_x + axis_len, _start_y, fill="darkblue",
-                        font="Consolas 20 bold",
+                        font=AXIS_FONT,
                         text="x")
     _canvas.create_text(_start_x, _start_y + axis_len, fill="darkblue",
-                        font="Consolas 20 bold",
+                        font=AXIS_FONT,
                         text="y")
 
 
+def axis_bottom(_start_x, _start_y, axis_len):
+    """
+    Pixel row below everything `render_axis` draws on `ArrayCanvas`,
+    including labels centered on the arrow tips
+
+    :return: int y
+    """
+    # `ArrayCanvas.create_line` touches 4 pixels beyond half line width
+    _line_bottom = int(math.ceil(_start_y + axis_len + 1.5 + 4))
+    return max(_line_bottom,
+               text_box(_start_x + axis_len, _start_y, 'x', AXIS_FONT)[3],
+               text_box(_start_x, _start_y + axis_len, 'y', AXIS_FONT)[3])
+
+
+OUTPUT_FORMATS = ('png', 'svg', 'pdf')
+# 'april_tag' is composed by `BoardCompositor.py`, others by
+# `PatternCompositor.py`
+GRID_TYPES = ('april_tag', 'checkerboard', 'charuco')
+
+
+def parse_output_formats(_formats):
+    """
+    :param _formats: formats separated by comma, for example 'png,pdf'
+    :return: list of lower case formats
+    """
+    _output_formats = [_format.strip().lower() for _format in
+                       _formats.split(',') if _format.strip()]
+    for _format in _output_formats:
+        if _format not in OUTPUT_FORMATS:
+            raise ValueError('Unknown output format {}'.format(_format))
+    return _output_formats
+
+
+def compute_board_layout(_num_x, _num_y, _tag_size, _tag_interval_ratio,
+                         _axis_len):
+    """
+    If draw axis, canvas's size is `N * tag_size + (N+3) * space_size)`
+    else canvas's size is `N * tag_size + (N+1) * space_size)`
+
+    :return: (total_width, total_height, tag_border_lt_x, tag_border_lt_y),
+             board itself starts at (2 * tag_border_lt_x, 2 * tag_border_lt_y)
+    """
+    _tag_border_lt_x = 0
+    _tag_border_lt_y = 0
+    if not _axis_len == 0:
+        _tag_border_lt_x = _tag_interval_ratio * _tag_size
+        _tag_border_lt_y = _tag_interval_ratio * _tag_size
+    _total_width, _total_height = grid_layout(
+        _num_x, _num_y, _tag_size, _tag_interval_ratio, _tag_border_lt_x)
+    return _total_width, _total_height, _tag_border_lt_x, _tag_border_lt_y
+
+
+def render_board_image(_num_x, _num_y, _tag_size, _tag_interval_ratio,
+                       _tag_family, _axis_len=100, _first_id=0,
+                       _symmetric_corners=True, _type=0):
+    """
+    Compose board and axis headlessly
+
+    :return: `ArrayCanvas` holding the board
+    """
+    _total_width, _total_height, _tag_border_lt_x, _tag_border_lt_y = \
+        compute_board_layout(_num_x, _num_y, _tag_size, _tag_interval_ratio,
+                             _axis_len)
+    # Axis is colorful, board itself only has black and white
+    _canvas = ArrayCanvas(_total_width, _total_height,
+                          mode='L' if 0 == _axis_len else 'RGB')
+    compose_april_board(_canvas.image, _num_x, _num_y, _tag_size,
+                        _tag_interval_ratio, _tag_family,
+                        2 * _tag_border_lt_x, 2 * _tag_border_lt_y,
+                        _first_id, _symmetric_corners, _type=_type)
+    if not _axis_len == 0:
+        render_axis(_canvas, _tag_border_lt_x, _tag_border_lt_y, _axis_len)
+    return _canvas
+
+
+def iter_board_bands(_num_x, _num_y, _tag_size, _tag_interval_ratio,
+                     _tag_family, _axis_len=100, _first_id=0,
+                     _symmetric_corners=True, _type=0):
+    """
+    Compose board band by band from top to bottom. Every band is one tag
+    row plus the interval above it, the last band also has the bottom
+    margin. Only tag rows touching a band are composed into it, so memory is
+    bounded by band size no matter how many rows the board has.
+
+    :return: iterator of (band top y, uint8 band array)
+    """
+    _total_width, _total_height, _tag_border_lt_x, _tag_border_lt_y = \
+        compute_board_layout(_num_x, _num_y, _tag_size, _tag_interval_ratio,
+                             _axis_len)
+    _lt_x = 2 * _tag_border_lt_x
+    _lt_y = 2 * _tag_border_lt_y
+    _interval_size = _tag_interval_ratio * _tag_size
+    _axis_bottom = 0
+    if not _axis_len == 0:
+        _axis_bottom = axis_bottom(_tag_border_lt_x, _tag_border_lt_y,
+                                   _axis_len)
+    _band_edges = [0] + grid_pixels(_lt_y, _num_y - 1, _tag_size,
+                                    _tag_interval_ratio, 1).tolist() + \
+        [_total_height]
+    # Rows of every tag row including corner squares, computed from the
+    # same start y as `compose_april_board`
+    _start_y = grid_starts(_lt_y + _interval_size, _num_y, _tag_size,
+                           _tag_interval_ratio).tolist()
+    _row_extents = [(_round_pixel(_y - _interval_size),
+                     _round_pixel(_y + _tag_size + _interval_size))
+                    for _y in _start_y]
+    for _band_top, _band_bottom in zip(_band_edges[:-1], _band_edges[1:]):
+        _rows = [_row for _row, (_top, _bottom) in enumerate(_row_extents)
+                 if _top < _band_bottom and _bottom > _band_top]
+        _canvas = ArrayCanvas(_total_width, _band_bottom - _band_top,
+                              mode='L' if 0 == _axis_len else 'RGB')
+        if _rows:
+            # Positions are rounded on the whole board, the same as
+            # `render_board_image`, then moved into band
+            compose_april_board(_canvas.image, _num_x, len(_rows), _tag_size,
+                                _tag_interval_ratio, _tag_family, _lt_x,
+                                _lt_y, _first_id, _symmetric_corners,
+                                _type=_type, _first_row=_rows[0],
+                                _origin_y=_band_top)
+        # Axis and its labels are near the left top corner
+        if _band_top < _axis_bottom:
+            render_axis(_canvas, _tag_border_lt_x,
+                        _tag_border_lt_y - _band_top, _axis_len)
+        yield _band_top, _canvas.image
+
+
+def stream_board_png(_file_name, _num_x, _num_y, _tag_size,
+                     _tag_interval_ratio, _tag_family, _axis_len=100,
+                     _first_id=0, _symmetric_corners=True, _type=0,
+                     _compress_level=6):
+    """
+    Write board to png band by band with `StreamingPngWriter`, for boards
+    too large to hold in memory.
+
+    :param _file_name: output png path
+    :param _compress_level: zlib compress level, 0 - 9
+    :return: None
+    """
+    _total_width, _total_height, _, _ = compute_board_layout(
+        _num_x, _num_y, _tag_size, _tag_interval_ratio, _axis_len)
+    with StreamingPngWriter(_file_name, _total_width, _total_height,
+                            mode='L' if 0 == _axis_len else 'RGB',
+                            compress_level=_compress_level) as _writer:
+        for _, _band in iter_board_bands(_num_x, _num_y, _tag_size,
+                                         _tag_interval_ratio, _tag_family,
+                                         _axis_len, _first_id,
+                                         _symmetric_corners, _type):
+            _writer.write_rows(_band)
+
+
+def save_board(_canvas, _file_name, _output_formats, _dpi):
+    """
+    Save board to every format in `_output_formats`
+
+    :param _canvas: `ArrayCanvas` from `render_board_image`
+    :param _file_name: output path without extension
+    :param _output_formats: list from `parse_output_formats`
+    :param _dpi: pixels per inch of printed svg and pdf
+    :return: list of saved file paths
+    """
+    # Output may be a hardlink of read only `RenderCache` file, unlink it
+    # instead of writing through it.
+    for _format in _output_formats:
+        if os.path.lexists(f'{_file_name}.{_format}'):
+            os.remove(f'{_file_name}.{_format}')
+    _saved_files = []
+    if 'png' in _output_formats:
+        _canvas.save(f'{_file_name}.png')
+        _saved_files.append(f'{_file_name}.png')
+    if 'svg' in _output_formats or 'pdf' in _output_formats:
+        # Axis is only rendered to png, vector files only keep black cells.
+        _rectangles = merge_black_rectangles(black_mask(_canvas.image))
+        if 'svg' in _output_formats:
+            write_svg(f'{_file_name}.svg', _canvas.width, _canvas.height,
+                      _rectangles, _dpi)
+            _saved_files.append(f'{_file_name}.svg')
+        if 'pdf' in _output_formats:
+            write_pdf(f'{_file_name}.pdf',
+                      [(_canvas.width, _canvas.height, _rectangles)], _dpi)
+            _saved_files.append(f'{_file_name}.pdf')
+    return _saved_files
+
+
+def generate_board(_file_name, _output_formats, _dpi, _num_x, _num_y,
+                   _tag_size, _tag_interval_ratio, _tag_family, _axis_len=100,
+                   _first_id=0, _symmetric_corners=True, _type=0,
+                   _render_cache=None, _stream=False, _geometry=True,
+                   _grid_type='april_tag', _marker_ratio=0.75):
+    """
+    Render and save board, reuse files from `_render_cache` if possible.
+    Tag corners are also saved to `.npz` and `.yaml` files, see
+    `BoardGeometry.py`.
+
+    For checkerboard and charuco `_grid_type`, `_tag_size` is square size,
+    `_tag_interval_ratio` is margin ratio, `_axis_len`, `_symmetric_corners`
+    and `_type` are ignored, see `render_pattern_image`.
+
+    :param _file_name: output path without extension
+    :param _output_formats: list from `parse_output_formats`
+    :param _dpi: pixels per inch of printed svg and pdf
+    :param _render_cache: `RenderCache` instance, None means no cache
+    :param _stream: write png band by band, only png format is supported
+    :param _geometry: whether save tag corners
+    :param _grid_type: one of `GRID_TYPES`
+    :param _marker_ratio: tag size relative to square size of charuco
+    :return: (list of saved file paths, whether files come from cache)
+    """
+    if _grid_type not in GRID_TYPES:
+        raise ValueError('Unknown grid type {}, known types are {}'.format(
+            _grid_type, ', '.join(GRID_TYPES)))
+    if _stream and ['png'] != _output_formats:
+        raise ValueError('Streaming render only supports png format')
+    if _stream and 'april_tag' != _grid_type:
+        raise ValueError('Streaming render only supports april_tag type')
+    _key = None
+    _saved_files = None
+    if _render_cache is not None:
+        _key = board_cache_key(_tag_family, num_x=_num_x, num_y=_num_y,
+                               tag_size=_tag_size,
+                               tag_interval=_tag_interval_ratio,
+                               axis_len=_axis_len, first_id=_first_id,
+                               symmetric_corners=_symmetric_corners,
+                               border_type=_type, dpi=_dpi,
+                               grid_type=_grid_type,
+                               marker_ratio=_marker_ratio)
+        _saved_files = _render_cache.fetch(_key, _file_name, _output_formats)
+    _from_cache = _saved_files is not None
+
+    if not _from_cache:
+        if _stream:
+            if os.path.lexists(f'{_file_name}.png'):
+                os.remove(f'{_file_name}.png')
+            stream_board_png(f'{_file_name}.png', _num_x, _num_y, _tag_size,
+                             _tag_interval_ratio, _tag_family, _axis_len,
+                             _first_id, _symmetric_corners, _type)
+            _saved_files = [f'{_file_name}.png']
+        else:
+            if 'april_tag' == _grid_type:
+                _canvas = render_board_image(_num_x, _num_y, _tag_size,
+                                             _tag_interval_ratio, _tag_family,
+                                             _axis_len, _first_id,
+                                             _symmetric_corners, _type)
+            else:
+                _canvas = render_pattern_image(_grid_type, _num_x, _num_y,
+                                               _tag_size, _tag_interval_ratio,
+                                               _tag_family, _first_id,
+                                               _marker_ratio)
+            _saved_files = save_board(_canvas, _file_name, _output_formats,
+                                      _dpi)
+        if _render_cache is not None:
+            _render_cache.store(_key, _saved_files)
+    if _geometry and 'april_tag' != _grid_type:
+        _saved_files = _saved_files + save_pattern_geometry(
+            _file_name, _grid_type, _num_x, _num_y, _tag_size,
+            _tag_interval_ratio, _tag_family, _first_id, _dpi,
+            _marker_ratio)
+    elif _geometry:
+        # Geometry is cheap to compute, so it is not kept in cache
+        _total_width, _total_height, _tag_border_lt_x, _tag_border_lt_y = \
+            compute_board_layout(_num_x, _num_y, _tag_size,
+                                 _tag_interval_ratio, _axis_len)
+        _saved_files = _saved_files + save_board_geometry(
+            _file_name, _total_width, _total_height, _num_x, _num_y,
+            _tag_size, _tag_interval_ratio, _tag_family,
+            2 * _tag_border_lt_x, 2 * _tag_border_lt_y, _first_id, _dpi,
+            _type)
+    return _saved_files, _from_cache
+
+
 if __name__ == "__main__":
     global_options = optparse.OptionParser(
         usage="Generate a PDF with a calibration pattern."
         , version="%prog 1.0")
     global_options.add_option('-t', '--type', action='store', type='string',
                               dest='grid_type', default='april_tag',
-                              help='Grid pattern type. (\'april_tag\''
-                                   ' or \'checkerboard\')')
+                              help='Grid pattern type. (\'april_tag\','
+                                   ' \'checkerboard\' or \'charuco\')')
     global_options.add_option('-x', '--nx', action='store', type='int',
                               dest='num_x', default=6,
                               help='Number of tags in x direction')
@@ -319,61 +597,166 @@ if __name__ == "__main__":
     global_options.add_option('-i', '--interval', action='store', type='float',
                               dest='tag_interval', default=0.25,
                               help='Ratio of tag interval relative to tag size')
+    global_options.add_option('-r', '--marker', action='store',
+                              type='float', dest='marker_ratio',
+                              default=0.75,
+                              help='Ratio of tag size relative to square '
+                                   'size of charuco, default is 0.75')
+    global_options.add_option('-m', '--mm', action='store', type='float',
+                              dest='tag_size_mm', default=0,
+                              help='Tag size in mm, render exact physical '
+                                   'size at dpi with anti-aliasing instead '
+                                   'of -s, no axis and no cache')
     global_options.add_option('-a', '--axis', action='store', type='int',
                               dest='axis_len', default=100,
                               help='Axis length in pixels.'
                                    'if length=0, skip rendering axis')
+    global_options.add_option('--family', action='store', type='string',
+                              dest='family', default='t36h11',
+                              help='Tag family name, default is t36h11')
+    global_options.add_option('-o', '--output', action='store', type='string',
+                              dest='output_folder', default='output',
+                              help='Output folder, default is output')
+    global_options.add_option('-f', '--format', action='store', type='string',
+                              dest='output_format', default='png',
+                              help='Output formats separated by comma, '
+                                   'png, svg or pdf, default is png')
+    global_options.add_option('-d', '--dpi', action='store', type='float',
+                              dest='dpi', default=300,
+                              help='Pixels per inch of printed svg and pdf, '
+                                   'default is 300')
+    global_options.add_option('--cache', action='store', type='string',
+                              dest='cache_folder', default='',
+                              help='Render cache folder, default is no cache')
+    global_options.add_option('--cache-size', action='store', type='int',
+                              dest='cache_size', default=1024,
+                              help='Render cache size limit in MB, '
+                                   'default is 1024')
+    global_options.add_option('-S', '--stream', action='store_true',
+                              dest='stream', default=False,
+                              help='Write png band by band with bounded '
+                                   'memory, for wall-sized boards')
+    global_options.add_option('--no-geometry', action='store_false',
+                              dest='geometry', default=True,
+                              help='Do not save tag corners to npz and yaml')
+    global_options.add_option('--check', action='store_true',
+                              dest='check', default=False,
+                              help='Verify Hamming distance of family before '
+                                   'rendering, stop if it is weak')
+    global_options.add_option('-p', '--preview', action='store_true',
+                              dest='preview', default=False,
+                              help='Also render board on Tk window and save '
+                                   'eps file, need a display')
 
     (options, args) = global_options.parse_args()
 
-    # if draw axis, canvas's size is `N * tag_size + (N+3) * space_size)`
-    # else canvas's size is `N * tag_size + (N+1) * space_size)`
-    total_width = options.num_x * options.tag_size + (
-            options.num_x + 1) * options.tag_interval * options.tag_size
-    total_height = options.num_y * options.tag_size + (
-            options.num_y + 1) * options.tag_interval * options.tag_size
-    tag_border_lt_x = 0
-    tag_border_lt_y = 0
-    if not options.axis_len == 0:
-        tag_border_lt_x = options.tag_interval * options.tag_size
-        tag_border_lt_y = options.tag_interval * options.tag_size
-        total_width = int(total_width + 2 * tag_border_lt_x)
-        total_height = int(total_height + 2 * tag_border_lt_x)
+    if options.tag_size_mm > 0:
+        # Exact board has no axis, tag size in pixels is not rounded
+        options.tag_size = options.tag_size_mm / 25.4 * options.dpi
+        options.axis_len = 0
+    if 'april_tag' == options.grid_type:
+        total_width, total_height, tag_border_lt_x, tag_border_lt_y = \
+            compute_board_layout(options.num_x, options.num_y,
+                                 options.tag_size, options.tag_interval,
+                                 options.axis_len)
+    else:
+        total_width, total_height, tag_border_lt_x, tag_border_lt_y = \
+            compute_pattern_layout(options.num_x, options.num_y,
+                                   options.tag_size, options.tag_interval)
     print('type={} num_x={} num_y={} size={} interval={} canvasWidth={} '
           'canvasHeight={} tag_border_lt_x={} tag_border_lt_y={}'
           .format(options.grid_type, options.num_x, options.num_y,
                   options.tag_size, options.tag_interval, total_width,
                   total_height, tag_border_lt_x, tag_border_lt_y))
 
-    tk_instance = Tk()
-    canvas = Canvas(tk_instance, bg="white", width=total_width,
-                    height=total_height)
-
-    render_april_board(canvas, options.num_x, options.num_y, options.tag_size,
-                       options.tag_interval, Tag36h11(), 2 * tag_border_lt_x,
-                       2 * tag_border_lt_y)
-    if not options.axis_len == 0:
-        render_axis(canvas, tag_border_lt_x, tag_border_lt_y,
-                    options.axis_len)
-
-    canvas.pack()
-
-    file_name = f'output/Tag36h11_{options.num_y}_{options.num_x}'
+    try:
+        output_formats = parse_output_formats(options.output_format)
+        tag_family = create_tag_family(options.family)
+        if options.grid_type not in GRID_TYPES:
+            raise ValueError('Unknown grid type {}, known types are {}'
+                             .format(options.grid_type, ', '.join(GRID_TYPES)))
+        if options.stream and ['png'] != output_formats:
+            raise ValueError('Streaming render only supports png format')
+        if options.stream and 'april_tag' != options.grid_type:
+            raise ValueError('Streaming render only supports april_tag type')
+        if options.tag_size_mm > 0 and ('april_tag' != options.grid_type or
+                                        options.stream):
+            raise ValueError('Exact render only supports april_tag type '
+                             'without streaming')
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    if options.check:
+        report = tag_family.analyze()
+        print('family={} codes={} min_distance={} min_self_distance={} '
+              'min_complexity={}'.format(
+                  tag_family.name, report['codes'], report['min_distance'],
+                  report['min_self_distance'], report['min_complexity']))
+        errors = analysis_errors(report)
+        if errors:
+            print('Tag family is weak: {}'.format('; '.join(errors)))
+            sys.exit(1)
+    if not os.path.isdir(options.output_folder):
+        os.makedirs(options.output_folder)
+    board_name = {
+        'april_tag': type(tag_family).__name__,
+        'checkerboard': 'Checkerboard',
+        'charuco': f'ChArUco{type(tag_family).__name__}',
+    }[options.grid_type]
+    file_name = os.path.join(
+        options.output_folder,
+        f'{board_name}_{options.num_y}_{options.num_x}')
     ps_file_name = f'{file_name}.eps'
-    png_file_name = f'{file_name}.png'
-
-    # Note:
-    #   1. Must call `update()` before `postscript()`
-    #   2. Canvas operation must before `Tk.mainloop()`
-    #   3. Default postscript will scale canvas to (0.7496, 0.7496)
-    #      To avoid this, set `pagewidth` and `pageheight`
-    canvas.update()
-    canvas.postscript(file=ps_file_name, pagewidth=total_width,
-                      pageheight=total_height)
-
-    img = Image.open(ps_file_name)  # use PIL to convert to PNG
-    # print('img.size={}'.format(img.size))
-    # foo = img.resize((total_width, total_height), Image.ANTIALIAS)
-    img.save(png_file_name, 'png')
-
-    tk_instance.mainloop()
+
+    render_cache = None
+    if options.cache_folder:
+        render_cache = RenderCache(options.cache_folder,
+                                   options.cache_size * 1024 * 1024)
+    if options.tag_size_mm > 0:
+        saved_files = save_exact_board(
+            file_name, output_formats, options.num_x, options.num_y,
+            options.tag_size_mm, options.tag_interval, tag_family,
+            options.dpi)
+        if options.geometry:
+            saved_files += save_exact_geometry(
+                file_name, options.num_x, options.num_y, options.tag_size_mm,
+                options.tag_interval, tag_family, options.dpi)
+        from_cache = False
+    else:
+        saved_files, from_cache = generate_board(
+            file_name, output_formats, options.dpi, options.num_x,
+            options.num_y, options.tag_size, options.tag_interval,
+            tag_family, options.axis_len, _render_cache=render_cache,
+            _stream=options.stream, _geometry=options.geometry,
+            _grid_type=options.grid_type, _marker_ratio=options.marker_ratio)
+    for saved_file in saved_files:
+        print('{} {}'.format('reuse' if from_cache else 'save', saved_file))
+
+    if options.preview and 'april_tag' != options.grid_type:
+        print('Preview only supports april_tag type')
+    elif options.preview:
+        import tkinter as tk
+
+        tk_instance = tk.Tk()
+        canvas = tk.Canvas(tk_instance, bg="white", width=total_width,
+                           height=total_height)
+
+        render_april_board(canvas, options.num_x, options.num_y,
+                           options.tag_size, options.tag_interval, tag_family,
+                           2 * tag_border_lt_x, 2 * tag_border_lt_y)
+        if not options.axis_len == 0:
+            render_axis(canvas, tag_border_lt_x, tag_border_lt_y,
+                        options.axis_len)
+
+        canvas.pack()
+
+        # Note:
+        #   1. Must call `update()` before `postscript()`
+        #   2. Canvas operation must before `Tk.mainloop()`
+        #   3. Default postscript will scale canvas to (0.7496, 0.7496)
+        #      To avoid this, set `pagewidth` and `pageheight`
+        canvas.update()
+        canvas.postscript(file=ps_file_name, pagewidth=total_width,
+                          pageheight=total_height)
+
+        tk_instance.mainloop()
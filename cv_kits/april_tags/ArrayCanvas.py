@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Headless canvas which draws into a numpy uint8 image.
+
+`ArrayCanvas` implements the small part of `tkinter.Canvas` used by
+`AprilTagsGenerator.py` (``create_rectangle``, ``create_line`` and
+``create_text``), so the same ``render_*`` functions can draw either on a Tk
+window or directly into memory. Every rectangle is a block fill of an array
+slice, there is no X server, no EPS file and no Ghostscript round-trip.
+
+For example, render a 6x6 board of 120 pixels tags to png:
+
+    canvas = ArrayCanvas(930, 930)
+    render_april_board(canvas, 6, 6, 120, 0.25, Tag36h11())
+    canvas.save('Tag36h11_6_6.png')
+
+"""
+
+import math
+
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+
+def _round_pixel(_value):
+    """
+    Round canvas coordinate to the nearest pixel edge, half goes up.
+
+    :param _value: canvas coordinate, may be float
+    :return: integer pixel coordinate
+    """
+    return int(math.floor(_value + 0.5))
+
+
+def _load_font(_font):
+    """
+    :param _font: Tk font string like "Consolas 20 bold", only size is used
+    :return: PIL default font of that size
+    """
+    _font_size = 10
+    for _word in (_font or '').split():
+        if _word.isdigit():
+            _font_size = int(_word)
+    try:
+        return ImageFont.load_default(size=_font_size)
+    except TypeError:
+        # Pillow older than 10.1 only has fixed size bitmap font
+        return ImageFont.load_default()
+
+
+def text_box(_x, _y, text, font=None):
+    """
+    Box of text drawn by `ArrayCanvas.create_text` at (_x, _y)
+
+    :return: (lt_x, lt_y, rb_x, rb_y) in whole pixels
+    """
+    _probe = ImageDraw.Draw(Image.new('L', (1, 1)))
+    _box = _probe.textbbox((_x, _y), text, font=_load_font(font),
+                           anchor='mm')
+    return int(math.floor(_box[0])), int(math.floor(_box[1])), \
+        int(math.ceil(_box[2])), int(math.ceil(_box[3]))
+
+
+class ArrayCanvas:
+
+    def __init__(self, _width, _height, bg='white', mode='L'):
+        """
+        :param _width: canvas width in pixels
+        :param _height: canvas height in pixels
+        :param bg: background color, any name `PIL.ImageColor` knows
+        :param mode: 'L' for gray image, 'RGB' for color image
+        """
+        if mode not in ('L', 'RGB'):
+            raise ValueError('ArrayCanvas mode must be L or RGB, '
+                             'not {}'.format(mode))
+        self.width = int(_width)
+        self.height = int(_height)
+        self.mode = mode
+        if 'L' == mode:
+            _shape = (self.height, self.width)
+        else:
+            _shape = (self.height, self.width, 3)
+        self.image = np.empty(_shape, dtype=np.uint8)
+        self.image[...] = self._color(bg)
+
+    def _color(self, _fill):
+        """
+        Convert color name to pixel value of current mode
+
+        :param _fill: color name, for example 'black' or '#ff0000'
+        :return: int for 'L' mode, tuple for 'RGB' mode
+        """
+        return ImageColor.getcolor(_fill, self.mode)
+
+    def _fill_box(self, _x0, _y0, _x1, _y1, _fill):
+        """
+        Fill pixels inside [x0, x1) x [y0, y1), clipped to canvas size.
+        """
+        _lt_x = max(0, _round_pixel(min(_x0, _x1)))
+        _lt_y = max(0, _round_pixel(min(_y0, _y1)))
+        _rb_x = min(self.width, _round_pixel(max(_x0, _x1)))
+        _rb_y = min(self.height, _round_pixel(max(_y0, _y1)))
+        if _lt_x < _rb_x and _lt_y < _rb_y:
+            self.image[_lt_y:_rb_y, _lt_x:_rb_x] = self._color(_fill)
+
+    def _fill_mask(self, _lt_x, _lt_y, _mask, _fill):
+        """
+        Fill pixels where `_mask` is True, `_mask` left top is (lt_x, lt_y).
+        """
+        _height, _width = _mask.shape
+        _x0 = max(0, _lt_x)
+        _y0 = max(0, _lt_y)
+        _x1 = min(self.width, _lt_x + _width)
+        _y1 = min(self.height, _lt_y + _height)
+        if _x0 >= _x1 or _y0 >= _y1:
+            return
+        _mask = _mask[_y0 - _lt_y:_y1 - _lt_y, _x0 - _lt_x:_x1 - _lt_x]
+        self.image[_y0:_y1, _x0:_x1][_mask] = self._color(_fill)
+
+    def create_rectangle(self, _x0, _y0, _x1, _y1, fill='', outline='black',
+                         **_kwargs):
+        """
+        Same as `tkinter.Canvas.create_rectangle`, only `fill` is rendered.
+        Outline is skipped since every rectangle of AprilTags is either
+        borderless or outlined with its own fill color.
+        """
+        if fill:
+            self._fill_box(_x0, _y0, _x1, _y1, fill)
+
+    def create_line(self, _x0, _y0, _x1, _y1, arrow=None, width=1,
+                    fill='black', **_kwargs):
+        """
+        Same as `tkinter.Canvas.create_line` with single segment.
+        Arrow head uses Tk default arrow shape (8, 10, 3).
+        """
+        _length = math.hypot(_x1 - _x0, _y1 - _y0)
+        if 0 == _length:
+            return
+        _dir_x = (_x1 - _x0) / _length
+        _dir_y = (_y1 - _y0) / _length
+        _head_len = 10 if arrow in ('last', 'both') else 0
+        _half_width = width / 2.0
+        # Line body stops at arrow head base
+        _end_x = _x1 - _dir_x * _head_len
+        _end_y = _y1 - _dir_y * _head_len
+
+        _lt_x = int(math.floor(min(_x0, _x1) - _half_width - 4))
+        _lt_y = int(math.floor(min(_y0, _y1) - _half_width - 4))
+        _rb_x = int(math.ceil(max(_x0, _x1) + _half_width + 4))
+        _rb_y = int(math.ceil(max(_y0, _y1) + _half_width + 4))
+        _ys, _xs = np.mgrid[_lt_y:_rb_y, _lt_x:_rb_x] + 0.5
+        # Project every pixel center on the line direction
+        _along = (_xs - _x0) * _dir_x + (_ys - _y0) * _dir_y
+        _across = np.abs(-(_xs - _x0) * _dir_y + (_ys - _y0) * _dir_x)
+        _end_along = (_end_x - _x0) * _dir_x + (_end_y - _y0) * _dir_y
+        _mask = (_along >= 0) & (_along <= _end_along) & (
+                _across <= _half_width)
+        if _head_len:
+            _head_half = 3 + _half_width
+            _tip_dist = _length - _along
+            _mask |= (_along > _end_along) & (_tip_dist >= 0) & (
+                    _across <= _head_half * _tip_dist / _head_len)
+        self._fill_mask(_lt_x, _lt_y, _mask, fill)
+
+    def create_text(self, _x, _y, text='', fill='black', font=None,
+                    **_kwargs):
+        """
+        Same as `tkinter.Canvas.create_text` with default anchor 'center'.
+        Text is drawn with PIL default font, only size of Tk `font` string
+        like "Consolas 20 bold" is used.
+        """
+        if not text:
+            return
+        _font = _load_font(font)
+        _box = text_box(_x, _y, text, font)
+        _lt_x = max(0, _box[0])
+        _lt_y = max(0, _box[1])
+        _rb_x = min(self.width, _box[2])
+        _rb_y = min(self.height, _box[3])
+        if _lt_x >= _rb_x or _lt_y >= _rb_y:
+            return
+        # Only draw text on the cropped region instead of whole canvas
+        _region = Image.fromarray(self.image[_lt_y:_rb_y, _lt_x:_rb_x])
+        ImageDraw.Draw(_region).text((_x - _lt_x, _y - _lt_y), text,
+                                     fill=self._color(fill), font=_font,
+                                     anchor='mm')
+        self.image[_lt_y:_rb_y, _lt_x:_rb_x] = np.asarray(_region)
+
+    def to_image(self):
+        """
+        :return: `PIL.Image` sharing nothing with canvas buffer
+        """
+        return Image.fromarray(self.image, self.mode)
+
+    def save(self, _file_name):
+        """
+        Write canvas to image file, format is decided by file extension.
+
+        :param _file_name: output file path, for example 'board.png'
+        :return: None
+        """
+        self.to_image().save(_file_name)
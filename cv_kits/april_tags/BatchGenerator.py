@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Generate many AprilTags boards in parallel from one spec file.
+
+Spec file is json, yaml (needs PyYAML) or csv. Every board is a dictionary
+whose keys are the same as `AprilTagsGenerator.py` option dests, missing keys
+use `DEFAULT_BOARD_SPEC`:
+
+    [
+        {"name": "rig_a_cam0", "num_x": 6, "num_y": 6, "tag_size": 120},
+        {"num_x": 10, "num_y": 8, "tag_size": 200, "first_id": 100,
+         "output_format": "png,pdf", "dpi": 600}
+    ]
+
+A json or yaml spec can also be a dictionary with `boards` list. A csv spec
+has one header row with the keys.
+
+Every board is rendered headlessly in a `ProcessPoolExecutor` worker and
+written to output folder by the worker itself, then timing of every board is
+reported as soon as it finishes:
+
+    python3 BatchGenerator.py -b boards.json -j 8 -o output
+
+With `--cache` folder, identical boards are linked from `RenderCache`
+instead of rendered again.
+
+"""
+
+import concurrent.futures
+import csv
+import json
+import optparse
+import os
+import sys
+import time
+
+# =============================================================================
+# Imports
+# =============================================================================
+from cv_kits.april_tags.AprilTagsGenerator import GRID_TYPES, \
+    generate_board, parse_output_formats
+from cv_kits.april_tags.RenderCache import RenderCache
+from cv_kits.april_tags.families import create_tag_family
+
+# Key is spec key, value is default value, whose type is used to convert csv
+# string value.
+DEFAULT_BOARD_SPEC = {
+    'name': '',
+    'family': 't36h11',
+    'num_x': 6,
+    'num_y': 6,
+    'tag_size': 120.0,
+    'tag_interval': 0.25,
+    'axis_len': 100,
+    'first_id': 0,
+    'symmetric_corners': True,
+    'border_type': 0,
+    'output_format': 'png',
+    'dpi': 300.0,
+    'grid_type': 'april_tag',
+    'marker_ratio': 0.75,
+}
+
+
+def _convert_value(_key, _value):
+    """
+    Convert spec value to the type of `DEFAULT_BOARD_SPEC[_key]`
+    """
+    _default = DEFAULT_BOARD_SPEC[_key]
+    if isinstance(_default, bool):
+        if isinstance(_value, str):
+            return _value.strip().lower() in ('1', 'true', 'yes', 'y')
+        return bool(_value)
+    if isinstance(_value, str) and not isinstance(_default, str):
+        _value = _value.strip()
+    return type(_default)(_value)
+
+
+def normalize_board_spec(_spec, _index):
+    """
+    Fill default values and check keys of single board spec
+
+    :param _spec: board spec dictionary from spec file
+    :param _index: board index in spec file, used for default name
+    :return: new complete board spec dictionary
+    """
+    _unknown_keys = set(_spec) - set(DEFAULT_BOARD_SPEC)
+    if _unknown_keys:
+        raise ValueError('Board {} has unknown keys: {}'.format(
+            _index, ', '.join(sorted(_unknown_keys))))
+    _board_spec = dict(DEFAULT_BOARD_SPEC)
+    for _key, _value in _spec.items():
+        # Empty csv cell means default value
+        if _value is None or _value == '':
+            continue
+        _board_spec[_key] = _convert_value(_key, _value)
+    if not _board_spec['name']:
+        _board_spec['name'] = '{}_{:04d}_{}_{}_{}'.format(
+            _board_spec['family'], _index, _board_spec['num_y'],
+            _board_spec['num_x'], _board_spec['first_id'])
+    # Fail in main process instead of in worker
+    parse_output_formats(_board_spec['output_format'])
+    if _board_spec['grid_type'] not in GRID_TYPES:
+        raise ValueError('Board {} has unknown grid type {}'.format(
+            _index, _board_spec['grid_type']))
+    return _board_spec
+
+
+def load_board_specs(_spec_path):
+    """
+    Load board specs from json, yaml or csv file
+
+    :param _spec_path: spec file path, format is decided by extension
+    :return: list of complete board spec dictionaries
+    """
+    _extension = os.path.splitext(_spec_path)[1].lower()
+    with open(_spec_path, newline='') as _fp:
+        if '.csv' == _extension:
+            _specs = list(csv.DictReader(_fp))
+        elif _extension in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError('Loading yaml spec needs PyYAML, '
+                                 'run `pip install pyyaml`')
+            _specs = yaml.safe_load(_fp)
+        else:
+            _specs = json.load(_fp)
+    if isinstance(_specs, dict):
+        _specs = _specs.get('boards', [])
+    _board_specs = [normalize_board_spec(_spec, _idx)
+                    for _idx, _spec in enumerate(_specs)]
+    _names = [_spec['name'] for _spec in _board_specs]
+    if len(set(_names)) != len(_names):
+        raise ValueError('Board names in {} are not unique'.format(_spec_path))
+    return _board_specs
+
+
+def render_board_spec(_board_spec, _output_folder, _render_cache=None):
+    """
+    Render single board and save it, run in worker process
+
+    :param _board_spec: complete board spec from `load_board_specs`
+    :param _output_folder: folder to save board files
+    :param _render_cache: `RenderCache` instance, None means no cache
+    :return: (board name, list of saved files, whether files come from
+             cache, seconds)
+    """
+    _start = time.perf_counter()
+    _saved_files, _from_cache = generate_board(
+        os.path.join(_output_folder, _board_spec['name']),
+        parse_output_formats(_board_spec['output_format']),
+        _board_spec['dpi'], _board_spec['num_x'], _board_spec['num_y'],
+        _board_spec['tag_size'], _board_spec['tag_interval'],
+        create_tag_family(_board_spec['family']), _board_spec['axis_len'],
+        _board_spec['first_id'], _board_spec['symmetric_corners'],
+        _board_spec['border_type'], _render_cache,
+        _grid_type=_board_spec['grid_type'],
+        _marker_ratio=_board_spec['marker_ratio'])
+    return _board_spec['name'], _saved_files, _from_cache, \
+        time.perf_counter() - _start
+
+
+def render_board_batch(_board_specs, _output_folder, _jobs=None,
+                       _render_cache=None):
+    """
+    Render all boards in process pool, report every board when it is done
+
+    :param _board_specs: list from `load_board_specs`
+    :param _output_folder: folder to save board files
+    :param _jobs: worker processes, None means cpu count
+    :param _render_cache: `RenderCache` instance, None means no cache
+    :return: list of failed board names
+    """
+    if not os.path.isdir(_output_folder):
+        os.makedirs(_output_folder)
+    _failed_names = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=_jobs) as _pool:
+        _futures = {_pool.submit(render_board_spec, _spec, _output_folder,
+                                 _render_cache): _spec['name']
+                    for _spec in _board_specs}
+        for _future in concurrent.futures.as_completed(_futures):
+            try:
+                _name, _saved_files, _from_cache, _seconds = \
+                    _future.result()
+            except Exception as _e:
+                _failed_names.append(_futures[_future])
+                print('FAILED {}: {}'.format(_futures[_future], _e))
+                continue
+            print('{:.3f} s  {}{}  {}'.format(
+                _seconds, _name, ' (cached)' if _from_cache else '',
+                ' '.join(_saved_files)))
+    return _failed_names
+
+
+if __name__ == '__main__':
+    global_options = optparse.OptionParser(
+        usage='Generate AprilTags boards from spec file', version='%prog 1.0')
+    global_options.add_option('-b', '--batch', action='store', type='string',
+                              dest='spec_path', default='',
+                              help='Board spec file, json, yaml or csv')
+    global_options.add_option('-o', '--output', action='store', type='string',
+                              dest='output_folder', default='output',
+                              help='Output folder, default is output')
+    global_options.add_option('-j', '--jobs', action='store', type='int',
+                              dest='jobs', default=0,
+                              help='Worker processes, default is cpu count')
+    global_options.add_option('--cache', action='store', type='string',
+                              dest='cache_folder', default='',
+                              help='Render cache folder, default is no cache')
+    global_options.add_option('--cache-size', action='store', type='int',
+                              dest='cache_size', default=1024,
+                              help='Render cache size limit in MB, '
+                                   'default is 1024')
+    (options, args) = global_options.parse_args()
+
+    if not options.spec_path:
+        global_options.print_help()
+        sys.exit(1)
+    try:
+        board_specs = load_board_specs(options.spec_path)
+    except (OSError, ValueError) as e:
+        print('Load spec {} failed: {}'.format(options.spec_path, e))
+        sys.exit(1)
+    print('Render {} boards to {}'.format(len(board_specs),
+                                          options.output_folder))
+
+    render_cache = None
+    if options.cache_folder:
+        render_cache = RenderCache(options.cache_folder,
+                                   options.cache_size * 1024 * 1024)
+    batch_start = time.perf_counter()
+    failed_names = render_board_batch(board_specs, options.output_folder,
+                                      options.jobs or None, render_cache)
+    print('Render {} boards in {:.3f} s, {} failed'.format(
+        len(board_specs), time.perf_counter() - batch_start,
+        len(failed_names)))
+    if failed_names:
+        sys.exit(1)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Benchmark rendering one AprilTags board with different backends:
+
+    1. `compose_april_board`: batched numpy compositor.
+    2. `render_april_board` on `ArrayCanvas`: one array fill per rectangle.
+    3. `render_april_board` on Tk canvas, then `postscript()` to eps, which
+       is the original path. Skipped when there is no display.
+
+Family Tag36h11 only has 587 codes, so the default board is 24x24 tags
+(576 tags) of 200 pixels:
+
+    python3 BoardBenchmark.py -x 24 -y 24 -s 200
+
+"""
+
+import optparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+# =============================================================================
+# Imports
+# =============================================================================
+from cv_kits.april_tags.ArrayCanvas import ArrayCanvas
+from cv_kits.april_tags.AprilTagsGenerator import render_april_board
+from cv_kits.april_tags.BoardCompositor import compose_april_board
+from cv_kits.april_tags.families.Tag36h11 import Tag36h11
+
+
+def bench_compositor(_width, _height, _num_x, _num_y, _tag_size,
+                     _tag_interval_ratio, _tag_family):
+    _canvas = ArrayCanvas(_width, _height)
+    _start = time.perf_counter()
+    compose_april_board(_canvas.image, _num_x, _num_y, _tag_size,
+                        _tag_interval_ratio, _tag_family)
+    return time.perf_counter() - _start, _canvas.image
+
+
+def bench_array_canvas(_width, _height, _num_x, _num_y, _tag_size,
+                       _tag_interval_ratio, _tag_family):
+    _canvas = ArrayCanvas(_width, _height)
+    _start = time.perf_counter()
+    render_april_board(_canvas, _num_x, _num_y, _tag_size,
+                       _tag_interval_ratio, _tag_family)
+    return time.perf_counter() - _start, _canvas.image
+
+
+def bench_tk_canvas(_width, _height, _num_x, _num_y, _tag_size,
+                    _tag_interval_ratio, _tag_family):
+    """
+    :return: seconds, or None if Tk can not open a window
+    """
+    try:
+        import tkinter as tk
+        _tk_instance = tk.Tk()
+    except Exception as _e:
+        print('Skip Tk canvas: {}'.format(_e))
+        return None
+    _start = time.perf_counter()
+    _canvas = tk.Canvas(_tk_instance, bg='white', width=_width,
+                        height=_height)
+    render_april_board(_canvas, _num_x, _num_y, _tag_size,
+                       _tag_interval_ratio, _tag_family)
+    _canvas.pack()
+    _canvas.update()
+    with tempfile.TemporaryDirectory() as _folder:
+        _canvas.postscript(file=os.path.join(_folder, 'board.eps'),
+                           pagewidth=_width, pageheight=_height)
+    _seconds = time.perf_counter() - _start
+    _tk_instance.destroy()
+    return _seconds
+
+
+if __name__ == '__main__':
+    global_options = optparse.OptionParser(
+        usage='Benchmark AprilTags board backends', version='%prog 1.0')
+    global_options.add_option('-x', '--nx', action='store', type='int',
+                              dest='num_x', default=24,
+                              help='Number of tags in x direction')
+    global_options.add_option('-y', '--ny', action='store', type='int',
+                              dest='num_y', default=24,
+                              help='Number of tags in y direction')
+    global_options.add_option('-s', '--size', action='store', type='float',
+                              dest='tag_size', default=200,
+                              help='Tag size in pixels')
+    global_options.add_option('-i', '--interval', action='store', type='float',
+                              dest='tag_interval', default=0.25,
+                              help='Ratio of tag interval relative to tag size')
+    (options, args) = global_options.parse_args()
+
+    tag_family = Tag36h11()
+    # Build the cached code table before timing
+    tag_family.code_matrices()
+    total_width = int(options.num_x * options.tag_size + (
+            options.num_x + 1) * options.tag_interval * options.tag_size)
+    total_height = int(options.num_y * options.tag_size + (
+            options.num_y + 1) * options.tag_interval * options.tag_size)
+    board_args = (total_width, total_height, options.num_x, options.num_y,
+                  options.tag_size, options.tag_interval, tag_family)
+    print('board {}x{} tags, canvas {}x{} pixels'.format(
+        options.num_x, options.num_y, total_width, total_height))
+
+    compositor_seconds, compositor_image = bench_compositor(*board_args)
+    print('compose_april_board      : {:.3f} s'.format(compositor_seconds))
+    array_seconds, array_image = bench_array_canvas(*board_args)
+    print('ArrayCanvas rectangles   : {:.3f} s  ({:.1f}x)'.format(
+        array_seconds, array_seconds / compositor_seconds))
+    print('different pixels         : {}'.format(
+        np.count_nonzero(compositor_image != array_image)))
+    tk_seconds = bench_tk_canvas(*board_args)
+    if tk_seconds is not None:
+        print('Tk canvas and postscript : {:.3f} s  ({:.1f}x)'.format(
+            tk_seconds, tk_seconds / compositor_seconds))
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Compose whole AprilTags board with batched numpy operations.
+
+`render_april_board` in `AprilTagsGenerator.py` draws tag by tag and bit by
+bit. `compose_april_board` builds the same board in one pass:
+
+    1. fetch bit patterns of the selected ID range from
+       `TagFamily.code_matrices()`.
+    2. upsample all patterns together to `_pixels_per_bit` with
+       `numpy.repeat`.
+    3. write border and patterns of all tiles with one assignment each,
+       through a strided (num_y, tile, num_x, tile) view of the board.
+       When rounded tag positions are not a regular grid, tiles are built
+       first and scattered with a single fancy index assignment instead.
+    4. scatter all corner squares with a single fancy index assignment.
+
+Tag size and interval are snapped to whole pixels, which is exactly what
+`ArrayCanvas` does when `_tag_size` and `_tag_interval_ratio * _tag_size` are
+integers.
+
+`grid_layout`, `grid_starts` and `grid_pixels` are the layout of cells shared
+by tag boards and the checkerboard and charuco boards of
+`PatternCompositor.py`.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+from cv_kits.april_tags.ArrayCanvas import _round_pixel
+
+
+def grid_layout(_num_x, _num_y, _cell_size, _gap_ratio, _margin=0):
+    """
+    Size of `_num_x` x `_num_y` cells with gaps of `_gap_ratio * _cell_size`
+    between cells and outside outer cells, plus `_margin` on every side
+
+    :return: (total_width, total_height) in whole pixels
+    """
+    _total_width = _num_x * _cell_size + (
+            _num_x + 1) * _gap_ratio * _cell_size + 2 * _margin
+    _total_height = _num_y * _cell_size + (
+            _num_y + 1) * _gap_ratio * _cell_size + 2 * _margin
+    return int(_total_width), int(_total_height)
+
+
+def grid_starts(_origin, _count, _cell_size, _gap_ratio, _first=0):
+    """
+    Left or top of cells `_first` to `_first + _count` of one grid row or
+    column, neighbour cells are `(1 + _gap_ratio) * _cell_size` apart
+
+    :param _origin: left or top of cell 0
+    :return: float array with shape (_count,)
+    """
+    _pitch = (1 + _gap_ratio) * _cell_size
+    return _origin + np.arange(_first, _first + _count) * _pitch
+
+
+def grid_pixels(_origin, _count, _cell_size, _gap_ratio, _first=0):
+    """
+    `grid_starts` rounded the same way as `_round_pixel`
+
+    :return: int64 array with shape (_count,)
+    """
+    return np.floor(grid_starts(_origin, _count, _cell_size, _gap_ratio,
+                                _first) + 0.5).astype(np.int64)
+
+
+def _border_tile(_tile_size, _border_size, _type):
+    """
+    Create single tag tile with border only, the same as `render_tag_border`
+
+    :param _tile_size: tag size in whole pixels
+    :param _border_size: border size in pixels
+    :param _type: border type, see `render_tag_border`
+    :return: uint8 array with shape (tile_size, tile_size)
+    """
+    _half = _border_size // 2
+    _outer = 255 if 1 == _type else 0
+    _inner = 255 if 2 == _type else 0
+    _inner_len = _tile_size - _border_size
+    _tile = np.full((_tile_size, _tile_size), 255, dtype=np.uint8)
+    # Same drawing order as `render_tag_border`: top, bottom, left, right.
+    _tile[:_half, :] = _outer
+    _tile[_half:2 * _half, _half:_half + _inner_len] = _inner
+    _tile[_tile_size - _half:, :] = _outer
+    _tile[_inner_len:_inner_len + _half, _half:_half + _inner_len] = _inner
+    _tile[:, :_half] = _outer
+    _tile[_half:_half + _inner_len, _half:2 * _half] = _inner
+    _tile[:, _tile_size - _half:] = _outer
+    _tile[_half:_half + _inner_len, _inner_len:_inner_len + _half] = _inner
+    return _tile
+
+
+def _clipped_index(_starts, _length, _limit):
+    """
+    Expand every start to `_length` consecutive indexes.
+
+    :return: (flat index array, bool mask of indexes inside [0, limit))
+    """
+    _index = (np.asarray(_starts)[:, None] + np.arange(_length)).ravel()
+    return _index, (_index >= 0) & (_index < _limit)
+
+
+def _uniform_pitch(_starts, _tile_size):
+    """
+    :return: distance between neighbour starts if all distances are equal and
+             not less than tile size, else None
+    """
+    if 1 == len(_starts):
+        return _tile_size
+    _steps = set(np.diff(_starts).tolist())
+    if 1 == len(_steps):
+        _step = _steps.pop()
+        if _step >= _tile_size:
+            return _step
+    return None
+
+
+def _compose_tiles(_image, _tag_family, _first_id, _num_x, _rows, _cols,
+                   _pixel_y, _pixel_x, _tile_size, _border, _border_size,
+                   _pixels_per_bit):
+    """
+    Write border and bit pattern of tags on `_rows` x `_cols` of board.
+
+    :param _rows: tag row indexes, `_pixel_y` are their top y in image
+    :param _cols: tag column indexes, `_pixel_x` are their left x in image
+    :param _border: tile with border only, from `_border_tile`
+    """
+    _height, _width = _image.shape[:2]
+    _num_y = len(_rows)
+    _num_x_in = len(_cols)
+    _tag_bits = _tag_family.tagBits
+    _data = slice(_border_size, _border_size + _tag_bits * _pixels_per_bit)
+
+    # Bit patterns of selected tags in board layout
+    # (num_y, tag_bits, num_x, tag_bits), 255 is white.
+    _tag_ids = _first_id + np.asarray(_rows)[:, None] * _num_x + \
+        np.asarray(_cols)[None, :]
+    _patterns = _tag_family.code_matrices()[0][_tag_ids]
+    _patterns = np.where(_patterns, np.uint8(255), np.uint8(0))
+    _patterns = _patterns.transpose(0, 2, 1, 3)
+    # Upsample all patterns at once
+    _patterns = np.repeat(np.repeat(_patterns, _pixels_per_bit, axis=1),
+                          _pixels_per_bit, axis=3)
+
+    _pitch_x = _uniform_pitch(_pixel_x, _tile_size)
+    _pitch_y = _uniform_pitch(_pixel_y, _tile_size)
+    if (_pitch_x and _pitch_y and min(_pixel_x[0], _pixel_y[0]) >= 0
+            and _pixel_x[-1] + _tile_size <= _width
+            and _pixel_y[-1] + _tile_size <= _height):
+        # Every tag lies on a regular grid inside image, write tiles through
+        # a strided (num_y, tile, num_x, tile) view of board, no index array
+        # needed.
+        _origin = _image[_pixel_y[0]:, _pixel_x[0]:]
+        _tiles = as_strided(
+            _origin,
+            shape=(_num_y, _tile_size, _num_x_in, _tile_size) +
+            _image.shape[2:],
+            strides=(_pitch_y * _image.strides[0], _image.strides[0],
+                     _pitch_x * _image.strides[1], _image.strides[1]) +
+            _image.strides[2:])
+        if 3 == _image.ndim:
+            _border = _border[..., None]
+            _patterns = _patterns[..., None]
+        _tiles[...] = _border[None, :, None, :]
+        _tiles[:, _data, :, _data] = _patterns
+    else:
+        _tiles = np.empty((_num_y, _tile_size, _num_x_in, _tile_size),
+                          dtype=np.uint8)
+        _tiles[...] = _border[None, :, None, :]
+        _tiles[:, _data, :, _data] = _patterns
+        _tiles = _tiles.reshape(_num_y * _tile_size, _num_x_in * _tile_size)
+        _cols, _col_mask = _clipped_index(_pixel_x, _tile_size, _width)
+        _rows, _row_mask = _clipped_index(_pixel_y, _tile_size, _height)
+        _tiles = _tiles[_row_mask][:, _col_mask]
+        if 3 == _image.ndim:
+            _tiles = _tiles[..., None]
+        _image[np.ix_(_rows[_row_mask], _cols[_col_mask])] = _tiles
+
+
+def compose_april_board(_image, _num_x, _num_y, _tag_size,
+                        _tag_interval_ratio, _tag_family, _lt_x=0, _lt_y=0,
+                        _first_id=0, _symmetric_corners=True,
+                        _tag_border_bits=2, _type=0, _first_row=0,
+                        _origin_y=0):
+    """
+    Render all tags of board into `_image` at once.
+    Parameters are the same as `render_april_board` and
+    `render_single_april_tag`.
+
+    A band of a larger board is composed with `_first_row` and `_origin_y`,
+    tag positions are rounded on the whole board first and then moved up by
+    `_origin_y`, so pixels are the same as composing the whole board.
+
+    :param _image: uint8 array with shape (height, width) or
+                   (height, width, 3), for example `ArrayCanvas.image`
+    :param _num_x: num of tags every row
+    :param _num_y: num of tag rows to compose, from `_first_row`
+    :param _tag_size: every tag size in pixels
+    :param _tag_interval_ratio: ratio of tag interval relative to tag size
+    :param _tag_family: every tag's shape is decided by tag_family
+    :param _lt_x: left top x of board
+    :param _lt_y: left top y of board
+    :param _first_id: tag id of left top tag of board, not of `_first_row`
+    :param _symmetric_corners: whether render corner squares
+    :param _tag_border_bits: border width in bits
+    :param _type: border type, see `render_tag_border`
+    :param _first_row: board row index of first composed tag row
+    :param _origin_y: board pixel row of `_image` top, an integer
+    :return: `_image`
+    """
+    _num_tags = _num_x * _num_y
+    _first_row_id = _first_id + _first_row * _num_x
+    if _first_id < 0 or _first_row_id + _num_tags > len(_tag_family.tagCodes):
+        raise ValueError('Tag id range [{}, {}) out of family {} with {} codes'
+                         .format(_first_row_id, _first_row_id + _num_tags,
+                                 _tag_family.name,
+                                 len(_tag_family.tagCodes)))
+    _tag_bits = _tag_family.tagBits
+    _pixels_per_bit = int(_tag_size / (_tag_bits + _tag_border_bits * 2))
+    _border_size = _tag_border_bits * _pixels_per_bit
+    _tile_size = _round_pixel(_tag_size)
+
+    _height, _width = _image.shape[:2]
+    _interval_size = _tag_interval_ratio * _tag_size
+    _start_x = grid_starts(_lt_x + _interval_size, _num_x, _tag_size,
+                           _tag_interval_ratio).tolist()
+    _start_y = grid_starts(_lt_y + _interval_size, _num_y, _tag_size,
+                           _tag_interval_ratio, _first_row).tolist()
+    _pixel_x = [_round_pixel(_x) for _x in _start_x]
+    _pixel_y = [_round_pixel(_y) - _origin_y for _y in _start_y]
+
+    # Tag rows and columns outside image are skipped, which happens when
+    # board is composed band by band.
+    _rows_in = [_idx for _idx, _y in enumerate(_pixel_y)
+                if _y < _height and _y + _tile_size > 0]
+    _cols_in = [_idx for _idx, _x in enumerate(_pixel_x)
+                if _x < _width and _x + _tile_size > 0]
+    if _rows_in and _cols_in:
+        _compose_tiles(_image, _tag_family, _first_row_id, _num_x, _rows_in,
+                       _cols_in, [_pixel_y[_idx] for _idx in _rows_in],
+                       [_pixel_x[_idx] for _idx in _cols_in], _tile_size,
+                       _border_tile(_tile_size, _border_size, _type),
+                       _border_size, _pixels_per_bit)
+
+    if _symmetric_corners:
+        # Corners of every tag are the cartesian product of its left/right
+        # and top/bottom squares, so all corners of board are the product
+        # of all left/right squares and all top/bottom squares.
+        _corner_size = _interval_size
+        _corner_cols = [
+            np.arange(_round_pixel(_x0), _round_pixel(_x0 + _corner_size))
+            for _x in _start_x for _x0 in (_x - _corner_size, _x + _tag_size)]
+        _corner_rows = [
+            np.arange(_round_pixel(_y0), _round_pixel(_y0 + _corner_size))
+            - _origin_y
+            for _y in _start_y for _y0 in (_y - _corner_size, _y + _tag_size)]
+        _corner_cols = np.unique(np.concatenate(_corner_cols))
+        _corner_rows = np.unique(np.concatenate(_corner_rows))
+        _corner_cols = _corner_cols[(_corner_cols >= 0) &
+                                    (_corner_cols < _width)]
+        _corner_rows = _corner_rows[(_corner_rows >= 0) &
+                                    (_corner_rows < _height)]
+        _image[np.ix_(_corner_rows, _corner_cols)] = 0
+    return _image
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Export calibration target geometry of rendered AprilTags board.
+
+Corners of every tag are the outer corners of its black border, in the same
+pixel grid as `compose_april_board`, computed for all tags at once from grid
+parameters. They are written next to board files:
+
+    1. `<board>.npz` with arrays:
+
+        tag_ids       int32 (n,)
+        corners_px    float64 (n, 4, 2), corners lt, rt, rb, lb of image,
+                      x right and y down, origin at left top of image
+        corners_m     float64 (n, 4, 2), the same corners in meters at `dpi`
+        centers_px    float64 (n, 2)
+        centers_m     float64 (n, 2)
+        image_size_px int64 (2,), width and height
+        dpi           float64 ()
+        tag_size_m    float64 (), side of black border in meters
+
+    2. `<board>.yaml` with kalibr aprilgrid keys (`target_type`, `tagCols`,
+       `tagRows`, `tagSize`, `tagSpacing`) and corners of every tag in
+       meters, so calibration jobs read it without PyYAML specific types.
+
+Tag `tag_ids[k]` is the k-th tag of board in row major order from left top,
+which is `first_id + k`.
+
+Checkerboard and charuco boards of `PatternCompositor.py` also have
+`chessboard_corners_px` and `chessboard_corners_m` with shape (m, 2), the
+inner corners between squares row by row, and `square_size_m`. Their yaml
+uses kalibr checkerboard keys (`targetCols`, `targetRows`,
+`rowSpacingMeters`, `colSpacingMeters`), charuco adds `markerSize` and tags.
+"""
+
+import numpy as np
+
+# =============================================================================
+# Imports
+# =============================================================================
+from cv_kits.april_tags.BoardCompositor import grid_pixels
+from cv_kits.april_tags.PatternCompositor import _square_edges, \
+    charuco_tag_boxes, charuco_tag_count, compute_pattern_layout
+
+METERS_PER_INCH = 0.0254
+
+
+def board_geometry(_width, _height, _num_x, _num_y, _tag_size,
+                   _tag_interval_ratio, _tag_family, _lt_x=0, _lt_y=0,
+                   _first_id=0, _dpi=300.0, _tag_border_bits=2, _type=0):
+    """
+    Corners of every tag on board from `compose_april_board` with the same
+    parameters
+
+    :param _width: image width in pixels
+    :param _height: image height in pixels
+    :param _lt_x: left top x of board
+    :param _lt_y: left top y of board
+    :param _dpi: pixels per inch of printed board, decides meters
+    :param _type: border type, the outer half of border is white for type 1
+    :return: dict of arrays, keys are described in module doc
+    """
+    _pixels_per_bit = int(_tag_size / (_tag_family.tagBits +
+                                       _tag_border_bits * 2))
+    _inset = 0
+    if 1 == _type:
+        _inset = _tag_border_bits * _pixels_per_bit // 2
+    _tile_size = np.floor(_tag_size + 0.5)
+    _interval_size = _tag_interval_ratio * _tag_size
+    # Same layout and rounding as `compose_april_board`
+    _x = grid_pixels(_lt_x + _interval_size, _num_x, _tag_size,
+                     _tag_interval_ratio) + _inset
+    _y = grid_pixels(_lt_y + _interval_size, _num_y, _tag_size,
+                     _tag_interval_ratio) + _inset
+    _side = _tile_size - 2 * _inset
+    _lt = np.stack(np.broadcast_arrays(_x[None, :], _y[:, None]),
+                   axis=-1).reshape(-1, 1, 2)
+    _offsets = np.array([[0, 0], [1, 0], [1, 1], [0, 1]]) * _side
+    _corners_px = _lt + _offsets
+    _meters_per_pixel = METERS_PER_INCH / _dpi
+    return {
+        'tag_ids': np.arange(_first_id, _first_id + _num_x * _num_y,
+                             dtype=np.int32),
+        'corners_px': _corners_px,
+        'corners_m': _corners_px * _meters_per_pixel,
+        'centers_px': _corners_px.mean(axis=1),
+        'centers_m': _corners_px.mean(axis=1) * _meters_per_pixel,
+        'image_size_px': np.array([_width, _height], dtype=np.int64),
+        'dpi': np.float64(_dpi),
+        'tag_size_m': np.float64(_side * _meters_per_pixel),
+    }
+
+
+def write_geometry_yaml(_file_name, _geometry, _num_x, _num_y,
+                        _tag_interval_ratio, _family_name):
+    """
+    Write geometry as plain yaml, one flow sequence per tag
+
+    :param _geometry: dict from `board_geometry`
+    :return: None
+    """
+    _lines = ['target_type: aprilgrid',
+              'tagFamily: {}'.format(_family_name),
+              'tagCols: {}'.format(_num_x),
+              'tagRows: {}'.format(_num_y),
+              'tagSize: {:.9g}'.format(float(_geometry['tag_size_m'])),
+              'tagSpacing: {:.9g}'.format(_tag_interval_ratio),
+              'dpi: {:.9g}'.format(float(_geometry['dpi'])),
+              'imageSize: [{}, {}]'.format(*_geometry['image_size_px']),
+              'corners_order: [lt, rt, rb, lb]',
+              'tags:']
+    _lines.extend(_tag_yaml_lines(_geometry))
+    with open(_file_name, 'w') as _fp:
+        _fp.write('\n'.join(_lines) + '\n')
+
+
+def _tag_yaml_lines(_geometry):
+    """
+    :return: one yaml line per tag of `_geometry`
+    """
+    return ['  - {{id: {}, corners_m: [{}]}}'.format(
+        _tag_id, ', '.join('[{:.9g}, {:.9g}]'.format(*_corner)
+                           for _corner in _corners))
+        for _tag_id, _corners in zip(_geometry['tag_ids'].tolist(),
+                                     _geometry['corners_m'].tolist())]
+
+
+def save_board_geometry(_file_name, _width, _height, _num_x, _num_y,
+                        _tag_size, _tag_interval_ratio, _tag_family, _lt_x=0,
+                        _lt_y=0, _first_id=0, _dpi=300.0, _type=0):
+    """
+    Write `<_file_name>.npz` and `<_file_name>.yaml`, parameters are the
+    same as `board_geometry`
+
+    :param _file_name: output path without extension, the same as board
+    :return: list of saved file paths
+    """
+    _geometry = board_geometry(_width, _height, _num_x, _num_y, _tag_size,
+                               _tag_interval_ratio, _tag_family, _lt_x, _lt_y,
+                               _first_id, _dpi, _type=_type)
+    np.savez_compressed(f'{_file_name}.npz', **_geometry)
+    write_geometry_yaml(f'{_file_name}.yaml', _geometry, _num_x, _num_y,
+                        _tag_interval_ratio, _tag_family.name)
+    return [f'{_file_name}.npz', f'{_file_name}.yaml']
+
+
+def pattern_geometry(_grid_type, _num_x, _num_y, _square_size,
+                     _margin_ratio, _tag_family=None, _first_id=0,
+                     _dpi=300.0, _marker_ratio=0.75, _tag_border_bits=2):
+    """
+    Inner corners of squares, and tag corners of charuco board, on board
+    from `render_pattern_image` with the same parameters
+
+    :return: dict of arrays, keys are described in module doc
+    """
+    _width, _height, _lt_x, _lt_y = compute_pattern_layout(
+        _num_x, _num_y, _square_size, _margin_ratio)
+    _x_edges = _square_edges(_lt_x, _num_x, _square_size)[1:-1]
+    _y_edges = _square_edges(_lt_y, _num_y, _square_size)[1:-1]
+    _corners_px = np.stack(np.broadcast_arrays(
+        _x_edges[None, :], _y_edges[:, None]), axis=-1).reshape(-1, 2)
+    _corners_px = _corners_px.astype(np.float64)
+    _meters_per_pixel = METERS_PER_INCH / _dpi
+    _geometry = {
+        'chessboard_corners_px': _corners_px,
+        'chessboard_corners_m': _corners_px * _meters_per_pixel,
+        'image_size_px': np.array([_width, _height], dtype=np.int64),
+        'dpi': np.float64(_dpi),
+        'square_size_m': np.float64(_square_size * _meters_per_pixel),
+    }
+    if 'charuco' == _grid_type:
+        _x, _y, _tag_size, _ = charuco_tag_boxes(
+            _num_x, _num_y, _square_size, _marker_ratio, _tag_family.tagBits,
+            _lt_x, _lt_y, _tag_border_bits)
+        _lt = np.stack([_x, _y], axis=-1)[:, None, :].astype(np.float64)
+        _tag_corners_px = _lt + np.array(
+            [[0, 0], [1, 0], [1, 1], [0, 1]]) * _tag_size
+        _geometry.update({
+            'tag_ids': np.arange(
+                _first_id, _first_id + charuco_tag_count(_num_x, _num_y),
+                dtype=np.int32),
+            'corners_px': _tag_corners_px,
+            'corners_m': _tag_corners_px * _meters_per_pixel,
+            'centers_px': _tag_corners_px.mean(axis=1),
+            'centers_m': _tag_corners_px.mean(axis=1) * _meters_per_pixel,
+            'tag_size_m': np.float64(_tag_size * _meters_per_pixel),
+        })
+    return _geometry
+
+
+def save_pattern_geometry(_file_name, _grid_type, _num_x, _num_y,
+                          _square_size, _margin_ratio, _tag_family=None,
+                          _first_id=0, _dpi=300.0, _marker_ratio=0.75):
+    """
+    Write `<_file_name>.npz` and `<_file_name>.yaml` of checkerboard or
+    charuco board, parameters are the same as `pattern_geometry`
+
+    :return: list of saved file paths
+    """
+    _geometry = pattern_geometry(_grid_type, _num_x, _num_y, _square_size,
+                                 _margin_ratio, _tag_family, _first_id, _dpi,
+                                 _marker_ratio)
+    np.savez_compressed(f'{_file_name}.npz', **_geometry)
+    _square_m = float(_geometry['square_size_m'])
+    _lines = ['target_type: {}'.format(_grid_type),
+              'targetCols: {}'.format(_num_x - 1),
+              'targetRows: {}'.format(_num_y - 1),
+              'rowSpacingMeters: {:.9g}'.format(_square_m),
+              'colSpacingMeters: {:.9g}'.format(_square_m),
+              'dpi: {:.9g}'.format(float(_geometry['dpi'])),
+              'imageSize: [{}, {}]'.format(*_geometry['image_size_px'])]
+    if 'charuco' == _grid_type:
+        _lines += ['tagFamily: {}'.format(_tag_family.name),
+                   'markerSize: {:.9g}'.format(
+                       float(_geometry['tag_size_m'])),
+                   'corners_order: [lt, rt, rb, lb]',
+                   'tags:']
+        _lines.extend(_tag_yaml_lines(_geometry))
+    with open(f'{_file_name}.yaml', 'w') as _fp:
+        _fp.write('\n'.join(_lines) + '\n')
+    return [f'{_file_name}.npz', f'{_file_name}.yaml']
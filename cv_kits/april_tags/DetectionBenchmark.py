@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Benchmark whether generated boards decode fast and reliably.
+
+Every trial renders a board with `render_board_image`, then with numpy only:
+
+    1. warps it by a random perspective transform, jittering the 4 board
+       corners by `--warp` of board size and rotating by a random multiple
+       of 90 degrees.
+    2. blurs it by a gaussian of `--blur` pixels sigma.
+    3. adds gaussian noise of `--noise` gray levels.
+
+`ReferenceDecoder` then decodes every tag from its warped outer border quad,
+which is known from the warp, so quad detection is not measured. Corners of
+quad start from the left top one in image, the decoder does not know which
+side of tag is up. It samples the cell grid through a homography, checks the
+black border, thresholds data bits and looks the code up in
+`TagFamily.code_index()`, a hash table of all 4 rotations and every code
+within `--index-errors` bits of them. Codes not in the hash table are
+corrected to the nearest code within `(min_hamming - 1) // 2` bits by
+popcount.
+
+Decode throughput (tags/s) and error rates are reported per family and tag
+size:
+
+    python3 DetectionBenchmark.py --family t36h11 --sizes 30,50,100 -n 5
+
+Only border type 0 (all black border) is supported. Tag size must be a
+multiple of cells (data bits and 2 border bits each side), see
+`check_tag_size`.
+"""
+
+import optparse
+import re
+import sys
+import time
+
+import numpy as np
+
+# =============================================================================
+# Imports
+# =============================================================================
+from cv_kits.april_tags.AprilTagsGenerator import render_board_image
+from cv_kits.april_tags.ArrayCanvas import _round_pixel
+from cv_kits.april_tags.BoardCompositor import grid_pixels
+from cv_kits.april_tags.families import create_tag_family
+from cv_kits.april_tags.families.TagFamily import code_rotations, popcount64
+
+# Corners of unit square in the same order as quads: lt, rt, rb, lb
+_UNIT_SQUARE = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=np.float64)
+
+
+def homographies(_src, _dst):
+    """
+    Solve homographies mapping 4 points to 4 points
+
+    :param _src: float array with shape (..., 4, 2)
+    :param _dst: float array with shape (..., 4, 2)
+    :return: float array with shape (..., 3, 3)
+    """
+    _src = np.asarray(_src, dtype=np.float64)
+    _dst = np.broadcast_to(np.asarray(_dst, dtype=np.float64),
+                           np.broadcast_shapes(_src.shape, np.shape(_dst)))
+    _src = np.broadcast_to(_src, _dst.shape)
+    _x, _y = _src[..., 0], _src[..., 1]
+    _u, _v = _dst[..., 0], _dst[..., 1]
+    _zeros = np.zeros_like(_x)
+    _ones = np.ones_like(_x)
+    # u = (h0 x + h1 y + h2) / (h6 x + h7 y + 1), v likewise with h3 h4 h5
+    _rows_u = np.stack([_x, _y, _ones, _zeros, _zeros, _zeros,
+                        -_u * _x, -_u * _y], axis=-1)
+    _rows_v = np.stack([_zeros, _zeros, _zeros, _x, _y, _ones,
+                        -_v * _x, -_v * _y], axis=-1)
+    _a = np.concatenate([_rows_u, _rows_v], axis=-2)
+    _b = np.concatenate([_u, _v], axis=-1)
+    _h = np.linalg.solve(_a, _b[..., None])[..., 0]
+    _h = np.concatenate([_h, np.ones(_h.shape[:-1] + (1,))], axis=-1)
+    return _h.reshape(_h.shape[:-1] + (3, 3))
+
+
+def apply_homographies(_h, _points):
+    """
+    :param _h: float array with shape (..., 3, 3)
+    :param _points: float array with shape (..., m, 2), broadcast with `_h`
+    :return: float array with shape (..., m, 2)
+    """
+    _points = np.asarray(_points, dtype=np.float64)
+    _mapped = _points @ np.swapaxes(_h[..., :, :2], -1, -2) + \
+        _h[..., None, :, 2]
+    return _mapped[..., :2] / _mapped[..., 2:]
+
+
+def sample_bilinear(_image, _points, _fill=255.0):
+    """
+    :param _image: 2d array
+    :param _points: float array with shape (..., 2) of pixel centers (x, y),
+                    pixel (i, j) covers [j, j + 1) x [i, i + 1)
+    :param _fill: value outside image
+    :return: float32 array with shape `_points.shape[:-1]`
+    """
+    _height, _width = _image.shape
+    _x = _points[..., 0] - 0.5
+    _y = _points[..., 1] - 0.5
+    _x0 = np.floor(_x)
+    _y0 = np.floor(_y)
+    _fx = (_x - _x0).astype(np.float32)
+    _fy = (_y - _y0).astype(np.float32)
+    _x0 = _x0.astype(np.int64)
+    _y0 = _y0.astype(np.int64)
+    _result = np.zeros(_fx.shape, dtype=np.float32)
+    for _dy, _wy in ((0, 1 - _fy), (1, _fy)):
+        for _dx, _wx in ((0, 1 - _fx), (1, _fx)):
+            _xi = _x0 + _dx
+            _yi = _y0 + _dy
+            _inside = (_xi >= 0) & (_xi < _width) & (_yi >= 0) & \
+                (_yi < _height)
+            _values = np.full(_fx.shape, _fill, dtype=np.float32)
+            _values[_inside] = _image[_yi[_inside], _xi[_inside]]
+            _result += _wx * _wy * _values
+    return _result
+
+
+def gaussian_blur(_image, _sigma):
+    """
+    Separable gaussian blur, edges are extended
+
+    :param _image: 2d array
+    :param _sigma: sigma in pixels, 0 means no blur
+    :return: float32 array
+    """
+    _image = np.asarray(_image, dtype=np.float32)
+    if _sigma <= 0:
+        return _image
+    _radius = max(1, int(3 * _sigma + 0.5))
+    _kernel = np.exp(-0.5 * (np.arange(-_radius, _radius + 1) / _sigma) ** 2)
+    _kernel = (_kernel / _kernel.sum()).astype(np.float32)
+    for _axis in (0, 1):
+        _padding = [(0, 0), (0, 0)]
+        _padding[_axis] = (_radius, _radius)
+        _padded = np.pad(_image, _padding, mode='edge')
+        _length = _image.shape[_axis]
+        _blurred = np.zeros_like(_image)
+        for _offset, _weight in enumerate(_kernel):
+            _blurred += _weight * np.take(
+                _padded, np.arange(_offset, _offset + _length), axis=_axis)
+        _image = _blurred
+    return _image
+
+
+def board_tag_quads(_num_x, _num_y, _tag_size, _tag_interval_ratio,
+                    _tag_family, _tag_border_bits=2):
+    """
+    Outer border quads of all tags on board rendered without axis, in the
+    same pixel grid as `compose_april_board`.
+
+    :return: float array with shape (num_y * num_x, 4, 2), corners are
+             lt, rt, rb, lb, index is tag id
+    """
+    check_tag_size(_tag_size, _tag_family, _tag_border_bits)
+    # Outer border is at edges of the whole tile
+    _tile_size = _round_pixel(_tag_size)
+    _interval_size = _tag_interval_ratio * _tag_size
+    _x = grid_pixels(_interval_size, _num_x, _tag_size, _tag_interval_ratio)
+    _y = grid_pixels(_interval_size, _num_y, _tag_size, _tag_interval_ratio)
+    _lt = np.stack(np.broadcast_arrays(_x[None, :], _y[:, None]),
+                   axis=-1).reshape(-1, 1, 2)
+    return (_UNIT_SQUARE * _tile_size + _lt).astype(np.float64)
+
+
+def check_tag_size(_tag_size, _tag_family, _tag_border_bits=2):
+    """
+    Tag tile of `compose_april_board` keeps outer border at tile edges, so a
+    tile wider than its cells leaves a white gap between data bits and right
+    and bottom border. Cells of such tag are not evenly spaced in its quad
+    and can not be sampled without knowing tag rotation.
+
+    :raise ValueError: when rounded tag size is not a multiple of cells
+    """
+    _cells = _tag_family.tagBits + 2 * _tag_border_bits
+    _pixels_per_bit = int(_tag_size / _cells)
+    if _pixels_per_bit < 1 or \
+            _round_pixel(_tag_size) != _cells * _pixels_per_bit:
+        raise ValueError('Tag size {:g} of {} is not a multiple of {} cells'
+                         .format(_tag_size, _tag_family.name, _cells))
+
+
+def random_warp(_width, _height, _warp, _rng):
+    """
+    :param _warp: corner jitter relative to board size
+    :return: (homography from board to warped image, warped width,
+              warped height)
+    """
+    _corners = _UNIT_SQUARE * (_width, _height)
+    _jitter = _rng.uniform(-_warp, _warp, size=(4, 2)) * max(_width, _height)
+    # Rotate by multiple of 90 degrees around origin
+    _angle = int(_rng.integers(4)) * np.pi / 2
+    _rotation = np.array([[np.cos(_angle), -np.sin(_angle)],
+                          [np.sin(_angle), np.cos(_angle)]])
+    _target = _corners @ _rotation.T
+    _target = _target + _jitter
+    _target -= _target.min(axis=0)
+    _size = np.ceil(_target.max(axis=0)).astype(int) + 1
+    return homographies(_corners, _target), int(_size[0]), int(_size[1])
+
+
+def warp_image(_image, _h, _width, _height, _band_rows=256):
+    """
+    Warp image by inverse mapping every output pixel, band by band
+
+    :param _h: homography from `_image` to output
+    :return: float32 array with shape (height, width), outside is white
+    """
+    _inverse = np.linalg.inv(_h)
+    _output = np.empty((_height, _width), dtype=np.float32)
+    _xs = np.arange(_width) + 0.5
+    for _start in range(0, _height, _band_rows):
+        _ys = np.arange(_start, min(_height, _start + _band_rows)) + 0.5
+        _points = np.stack(np.meshgrid(_xs, _ys), axis=-1)
+        _source = apply_homographies(_inverse, _points.reshape(-1, 2))
+        _output[_start:_start + len(_ys)] = sample_bilinear(
+            _image, _source).reshape(len(_ys), _width)
+    return _output
+
+
+def canonical_quads(_quads):
+    """
+    Start every quad from its left top corner in image, keeping the cyclic
+    order, so decoder can not know the tag rotation from corner order.
+    """
+    _start = np.argmin(_quads.sum(axis=-1), axis=-1)
+    _order = (_start[:, None] + np.arange(4)) % 4
+    return np.take_along_axis(_quads, _order[..., None], axis=1)
+
+
+class ReferenceDecoder:
+
+    def __init__(self, _tag_family, _max_errors=None, _index_errors=2,
+                 _index_folder=None, _tag_border_bits=2, _min_contrast=20):
+        """
+        :param _tag_family: `TagFamily` instance
+        :param _max_errors: corrected bits, None means
+                            `(min_hamming - 1) // 2` of family name
+        :param _index_errors: bits corrected by hash probe, more errors are
+                              corrected by popcount search
+        :param _index_folder: cache folder of `TagFamily.code_index()`
+        :param _tag_border_bits: border width in bits
+        :param _min_contrast: minimum gray difference between black border
+                              and white bits
+        """
+        self.tag_family = _tag_family
+        self.tag_bits = _tag_family.tagBits
+        self.border_bits = _tag_border_bits
+        self.min_contrast = _min_contrast
+        if _max_errors is None:
+            _match = re.search(r'h(\d+)$', _tag_family.name)
+            _max_errors = (int(_match.group(1)) - 1) // 2 if _match else 0
+        self.max_errors = _max_errors
+        self.code_index = _tag_family.code_index(
+            min(_index_errors, _max_errors), _index_folder)
+        self.search_errors = _max_errors > _index_errors
+        # Row r of table is codes rotated r times
+        self.rotated_codes = code_rotations(_tag_family.tagCodes,
+                                            self.tag_bits).ravel()
+        _cells = self.tag_bits + 2 * self.border_bits
+        _centers = (np.arange(_cells) + 0.5) / _cells
+        self.cell_centers = np.stack(np.meshgrid(_centers, _centers),
+                                     axis=-1).reshape(-1, 2)
+        self.bit_shifts = np.arange(self.tag_bits * self.tag_bits,
+                                    dtype=np.uint64)
+        # Inner ring of border cells around data bits
+        _inner = slice(self.border_bits - 1, _cells - self.border_bits + 1)
+        _data = slice(self.border_bits, _cells - self.border_bits)
+        self.ring_mask = np.zeros((_cells, _cells), dtype=bool)
+        self.ring_mask[_inner, _inner] = True
+        self.ring_mask[_data, _data] = False
+
+    def read_codes(self, _image, _quads):
+        """
+        Sample cell grid of quads and threshold data bits
+
+        :param _image: 2d gray image
+        :param _quads: float array with shape (n, 4, 2), corners in cyclic
+                       order
+        :return: (uint64 codes with shape (n,), bool array of quads with
+                  black border and enough contrast)
+        """
+        _cells = self.tag_bits + 2 * self.border_bits
+        _h = homographies(_UNIT_SQUARE, _quads)
+        _values = sample_bilinear(
+            _image, apply_homographies(_h, self.cell_centers))
+        _values = _values.reshape(-1, _cells, _cells)
+        _border = self.border_bits
+        _data = _values[:, _border:_border + self.tag_bits,
+                        _border:_border + self.tag_bits]
+        # Inner border ring is black for border type 0 and 1, every cell of
+        # it must be darker than threshold
+        _ring = _values[:, self.ring_mask]
+        _ring_mean = _ring.mean(axis=1)
+        _white = _data.max(axis=(1, 2))
+        _threshold = (_ring_mean + _white) / 2
+        _valid = (_white - _ring_mean >= self.min_contrast) & \
+            (_ring.max(axis=1) < _threshold)
+        # Code is rendered after rotating 180 degrees, see
+        # `TagFamily.code_matrices()`
+        _bits = (_data > _threshold[:, None, None])[:, ::-1, ::-1]
+        _bits = _bits.reshape(len(_bits), -1).astype(np.uint64)
+        _codes = np.bitwise_or.reduce(_bits << self.bit_shifts, axis=1)
+        return _codes, _valid
+
+    def decode(self, _image, _quads):
+        """
+        :return: list of (tag id, rotation, corrected bits) of every quad,
+                 tag id is -1 when quad can not be decoded
+        """
+        _codes, _valid = self.read_codes(_image, _quads)
+        _results = []
+        _misses = []
+        for _idx, _code in enumerate(_codes.tolist()):
+            _found = self.code_index.get(_code) if _valid[_idx] else None
+            if _found is None:
+                _results.append((-1, 0, 0))
+                if _valid[_idx] and self.search_errors:
+                    _misses.append(_idx)
+            else:
+                _results.append(_found)
+        if _misses:
+            _distances = popcount64(_codes[_misses, None] ^
+                                    self.rotated_codes[None, :])
+            _nearest = _distances.argmin(axis=1)
+            _num_codes = len(self.tag_family.tagCodes)
+            for _idx, _position, _distance in zip(
+                    _misses, _nearest.tolist(),
+                    _distances[np.arange(len(_misses)), _nearest].tolist()):
+                if _distance <= self.max_errors:
+                    _results[_idx] = (_position % _num_codes,
+                                      _position // _num_codes, _distance)
+        return _results
+
+
+def run_trial(_decoder, _num_x, _num_y, _tag_size, _tag_interval_ratio,
+              _warp, _blur, _noise, _rng):
+    """
+    Render, distort and decode one board
+
+    :return: (decode seconds, tags, correct, wrong, missed)
+    """
+    _tag_family = _decoder.tag_family
+    _board = render_board_image(_num_x, _num_y, _tag_size,
+                                _tag_interval_ratio, _tag_family,
+                                _axis_len=0).image
+    _quads = board_tag_quads(_num_x, _num_y, _tag_size, _tag_interval_ratio,
+                             _tag_family, _decoder.border_bits)
+    _h, _width, _height = random_warp(_board.shape[1], _board.shape[0],
+                                      _warp, _rng)
+    _image = warp_image(_board, _h, _width, _height)
+    _image = gaussian_blur(_image, _blur)
+    if _noise > 0:
+        _image += _rng.normal(0, _noise, size=_image.shape).astype(np.float32)
+    _image = np.clip(_image, 0, 255)
+    _quads = canonical_quads(apply_homographies(_h, _quads))
+
+    _start = time.perf_counter()
+    _results = _decoder.decode(_image, _quads)
+    _seconds = time.perf_counter() - _start
+    _ids = np.array([_result[0] for _result in _results])
+    _missed = int(np.count_nonzero(_ids < 0))
+    _correct = int(np.count_nonzero(_ids == np.arange(len(_ids))))
+    return _seconds, len(_ids), _correct, len(_ids) - _correct - _missed, \
+        _missed
+
+
+def run_benchmark(_tag_family, _tag_sizes, _trials, _num_x, _num_y,
+                  _tag_interval_ratio, _warp, _blur, _noise, _seed=0,
+                  _index_errors=2, _index_folder=None):
+    """
+    :return: list of dict per tag size with keys 'size', 'tags', 'seconds',
+             'correct', 'wrong', 'missed'
+    """
+    _decoder = ReferenceDecoder(_tag_family, _index_errors=_index_errors,
+                                _index_folder=_index_folder)
+    for _tag_size in _tag_sizes:
+        check_tag_size(_tag_size, _tag_family, _decoder.border_bits)
+    _rng = np.random.default_rng(_seed)
+    _rows = []
+    for _tag_size in _tag_sizes:
+        _row = {'size': _tag_size, 'tags': 0, 'seconds': 0.0, 'correct': 0,
+                'wrong': 0, 'missed': 0}
+        for _ in range(_trials):
+            _seconds, _tags, _correct, _wrong, _missed = run_trial(
+                _decoder, _num_x, _num_y, _tag_size, _tag_interval_ratio,
+                _warp, _blur, _noise, _rng)
+            _row['seconds'] += _seconds
+            _row['tags'] += _tags
+            _row['correct'] += _correct
+            _row['wrong'] += _wrong
+            _row['missed'] += _missed
+        _rows.append(_row)
+    return _rows
+
+
+if __name__ == '__main__':
+    global_options = optparse.OptionParser(
+        usage='Benchmark decoding of distorted AprilTags boards',
+        version='%prog 1.0')
+    global_options.add_option('--family', action='store', type='string',
+                              dest='families', default='t36h11',
+                              help='Tag families separated by comma')
+    global_options.add_option('--sizes', action='store', type='string',
+                              dest='tag_sizes', default='30,50,100',
+                              help='Tag sizes in pixels separated by comma')
+    global_options.add_option('-n', '--trials', action='store', type='int',
+                              dest='trials', default=5,
+                              help='Boards of every family and size')
+    global_options.add_option('-x', '--nx', action='store', type='int',
+                              dest='num_x', default=6,
+                              help='Number of tags in x direction')
+    global_options.add_option('-y', '--ny', action='store', type='int',
+                              dest='num_y', default=6,
+                              help='Number of tags in y direction')
+    global_options.add_option('-i', '--interval', action='store', type='float',
+                              dest='tag_interval', default=0.25,
+                              help='Ratio of tag interval relative to tag size')
+    global_options.add_option('--warp', action='store', type='float',
+                              dest='warp', default=0.1,
+                              help='Corner jitter relative to board size')
+    global_options.add_option('--blur', action='store', type='float',
+                              dest='blur', default=1.0,
+                              help='Gaussian blur sigma in pixels')
+    global_options.add_option('--noise', action='store', type='float',
+                              dest='noise', default=8.0,
+                              help='Gaussian noise sigma in gray levels')
+    global_options.add_option('--index-errors', action='store', type='int',
+                              dest='index_errors', default=2,
+                              help='Bits corrected by hash probe, default is '
+                                   '2')
+    global_options.add_option('--index-cache', action='store',
+                              type='string', dest='index_folder', default='',
+                              help='Folder to save and load code index, '
+                                   'default is no file')
+    global_options.add_option('--seed', action='store', type='int',
+                              dest='seed', default=0,
+                              help='Random seed')
+    (options, args) = global_options.parse_args()
+
+    try:
+        tag_sizes = [float(size) for size in options.tag_sizes.split(',')
+                     if size.strip()]
+        tag_families = [create_tag_family(name.strip()) for name in
+                        options.families.split(',') if name.strip()]
+        for tag_family in tag_families:
+            for tag_size in tag_sizes:
+                check_tag_size(tag_size, tag_family)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    print('{:<10} {:>6} {:>7} {:>12} {:>8} {:>8}'.format(
+        'family', 'size', 'tags', 'tags/s', 'wrong', 'missed'))
+    for tag_family in tag_families:
+        rows = run_benchmark(tag_family, tag_sizes, options.trials,
+                             options.num_x, options.num_y,
+                             options.tag_interval, options.warp, options.blur,
+                             options.noise, options.seed,
+                             options.index_errors,
+                             options.index_folder or None)
+        for row in rows:
+            print('{:<10} {:>6g} {:>7} {:>12.0f} {:>7.2%} {:>7.2%}'.format(
+                tag_family.name, row['size'], row['tags'],
+                row['tags'] / max(row['seconds'], 1e-9),
+                row['wrong'] / row['tags'], row['missed'] / row['tags']))
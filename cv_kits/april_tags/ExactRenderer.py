@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Render AprilTags board of exact physical size with anti-aliasing.
+
+`compose_april_board` truncates pixels per bit to an integer and snaps tags
+to whole pixels, so at a given dpi the bits shrink and the board drifts from
+the requested size. Here tag size is given in millimeters and every edge
+stays at its exact sub-pixel position:
+
+    1. tag size in pixels is `size_mm / 25.4 * dpi`, cell size is tag size
+       divided by cells, nothing is rounded.
+    2. all rectangle edges of the board are collected per axis, which split
+       the board into a grid of segments. Black rectangles are painted on
+       this segment grid, one value per segment.
+    3. the image is box filtered exactly: pixel value is the black area
+       inside the pixel, which is the limit of infinite supersampling.
+       Because every segment is a rectangle, the coverage is separable and
+       the whole image is `Cy @ B @ Cx.T`, where `Cx[j, s]` is the length
+       of segment s inside pixel column j.
+
+Vector output uses the same segment grid, black segments are merged into
+rectangles with float coordinates, so svg and pdf are exact too.
+
+`measure_geometric_error` compares the white bit area and centroid of every
+tag with the ideal geometry, for this renderer and `compose_april_board`:
+
+    python3 ExactRenderer.py --sizes 10,15,20,25.4,30 -d 300
+
+"""
+
+import math
+import optparse
+
+import numpy as np
+
+# =============================================================================
+# Imports
+# =============================================================================
+from cv_kits.april_tags.ArrayCanvas import ArrayCanvas
+from cv_kits.april_tags.BoardCompositor import compose_april_board
+from cv_kits.april_tags.BoardGeometry import METERS_PER_INCH, \
+    write_geometry_yaml
+from cv_kits.april_tags.VectorWriter import merge_black_rectangles, \
+    write_pdf, write_svg
+from cv_kits.april_tags.families.Tag36h11 import Tag36h11
+
+MM_PER_INCH = 25.4
+# Edges closer than this in pixels are the same edge
+_EDGE_TOLERANCE = 1e-6
+# Gray levels this close to x.5 are ties when rounding to uint8
+_TIE_OFFSET = 2e-3
+
+
+def exact_tag_layout(_num_x, _num_y, _tag_size_mm, _tag_interval_ratio,
+                     _dpi):
+    """
+    :return: (board width, board height, tag size, tag left x array, tag top
+             y array), all in float pixels
+    """
+    _tag_size = _tag_size_mm / MM_PER_INCH * _dpi
+    _interval = _tag_interval_ratio * _tag_size
+    _pitch = _tag_size + _interval
+    _width = _num_x * _tag_size + (_num_x + 1) * _interval
+    _height = _num_y * _tag_size + (_num_y + 1) * _interval
+    _x = _interval + np.arange(_num_x) * _pitch
+    _y = _interval + np.arange(_num_y) * _pitch
+    return _width, _height, _tag_size, _x, _y
+
+
+def _axis_edges(_starts, _tag_size, _cell_size, _interval, _tag_bits,
+                _tag_border_bits):
+    """
+    All edges of tags starting at `_starts` along one axis
+    """
+    _offsets = np.concatenate([
+        [-_interval, 0, _tag_border_bits * _cell_size / 2,
+         _tag_size - _tag_border_bits * _cell_size / 2, _tag_size,
+         _tag_size + _interval],
+        (_tag_border_bits + np.arange(_tag_bits + 1)) * _cell_size])
+    _edges = np.sort((np.asarray(_starts)[:, None] +
+                      _offsets[None, :]).ravel())
+    _keep = np.concatenate([[True], np.diff(_edges) > _EDGE_TOLERANCE])
+    return _edges[_keep]
+
+
+def _segment_range(_edges, _start, _end):
+    """
+    :return: slice of segments covering [_start, _end), which are edges
+    """
+    return slice(
+        int(np.searchsorted(_edges, _start - _EDGE_TOLERANCE)),
+        int(np.searchsorted(_edges, _end - _EDGE_TOLERANCE)))
+
+
+def exact_segment_grid(_num_x, _num_y, _tag_size_mm, _tag_interval_ratio,
+                       _tag_family, _dpi, _first_id=0,
+                       _symmetric_corners=True, _tag_border_bits=2, _type=0):
+    """
+    Paint board on its segment grid
+
+    :return: (x edges, y edges, bool array with shape (len(y edges) - 1,
+             len(x edges) - 1), True for black segment)
+    """
+    _num_tags = _num_x * _num_y
+    if _first_id < 0 or _first_id + _num_tags > len(_tag_family.tagCodes):
+        raise ValueError('Tag id range [{}, {}) out of family {} with {} codes'
+                         .format(_first_id, _first_id + _num_tags,
+                                 _tag_family.name,
+                                 len(_tag_family.tagCodes)))
+    _, _, _tag_size, _xs, _ys = exact_tag_layout(
+        _num_x, _num_y, _tag_size_mm, _tag_interval_ratio, _dpi)
+    _tag_bits = _tag_family.tagBits
+    _cell = _tag_size / (_tag_bits + 2 * _tag_border_bits)
+    _interval = _tag_interval_ratio * _tag_size
+    _x_edges = _axis_edges(_xs, _tag_size, _cell, _interval, _tag_bits,
+                           _tag_border_bits)
+    _y_edges = _axis_edges(_ys, _tag_size, _cell, _interval, _tag_bits,
+                           _tag_border_bits)
+    _black = np.zeros((len(_y_edges) - 1, len(_x_edges) - 1), dtype=bool)
+    _half = _tag_border_bits * _cell / 2
+    _data = _tag_border_bits * _cell
+    _patterns = _tag_family.code_matrices()[0]
+    for _idx_y, _y in enumerate(_ys):
+        for _idx_x, _x in enumerate(_xs):
+            # Same colors as `render_tag_border`
+            if 1 == _type:
+                _black[_segment_range(_y_edges, _y + _half,
+                                      _y + _tag_size - _half),
+                       _segment_range(_x_edges, _x + _half,
+                                      _x + _tag_size - _half)] = True
+            else:
+                _black[_segment_range(_y_edges, _y, _y + _tag_size),
+                       _segment_range(_x_edges, _x, _x + _tag_size)] = True
+            if 2 == _type:
+                _black[_segment_range(_y_edges, _y + _half,
+                                      _y + _tag_size - _half),
+                       _segment_range(_x_edges, _x + _half,
+                                      _x + _tag_size - _half)] = False
+            # Cell edges of data area are consecutive edges
+            _rows = _segment_range(_y_edges, _y + _data,
+                                   _y + _tag_size - _data)
+            _cols = _segment_range(_x_edges, _x + _data,
+                                   _x + _tag_size - _data)
+            _pattern = _patterns[_first_id + _idx_y * _num_x + _idx_x]
+            _black[_rows, _cols] = ~_pattern
+    if _symmetric_corners:
+        for _y in _ys:
+            for _y0 in (_y - _interval, _y + _tag_size):
+                _rows = _segment_range(_y_edges, _y0, _y0 + _interval)
+                for _x in _xs:
+                    for _x0 in (_x - _interval, _x + _tag_size):
+                        _black[_rows, _segment_range(
+                            _x_edges, _x0, _x0 + _interval)] = True
+    return _x_edges, _y_edges, _black
+
+
+def coverage_matrix(_edges, _pixels):
+    """
+    :param _edges: sorted float edges of segments
+    :param _pixels: number of pixels along axis
+    :return: float32 array with shape (pixels, segments), length of every
+             segment inside every pixel
+    """
+    _starts = np.asarray(_edges[:-1])[None, :]
+    _ends = np.asarray(_edges[1:])[None, :]
+    _pixel = np.arange(_pixels, dtype=np.float64)[:, None]
+    return np.clip(np.minimum(_ends, _pixel + 1) -
+                   np.maximum(_starts, _pixel), 0, 1).astype(np.float32)
+
+
+def render_exact_board(_num_x, _num_y, _tag_size_mm, _tag_interval_ratio,
+                       _tag_family, _dpi, _first_id=0,
+                       _symmetric_corners=True, _tag_border_bits=2, _type=0):
+    """
+    Render anti-aliased board of exact physical size
+
+    :param _tag_size_mm: tag size in millimeters
+    :param _dpi: pixels per inch
+    :return: (`ArrayCanvas` holding the board, exact board width and height
+             in float pixels), canvas size is rounded up to whole pixels
+    """
+    _width, _height, _, _, _ = exact_tag_layout(
+        _num_x, _num_y, _tag_size_mm, _tag_interval_ratio, _dpi)
+    _x_edges, _y_edges, _black = exact_segment_grid(
+        _num_x, _num_y, _tag_size_mm, _tag_interval_ratio, _tag_family, _dpi,
+        _first_id, _symmetric_corners, _tag_border_bits, _type)
+    _canvas = ArrayCanvas(math.ceil(_width), math.ceil(_height))
+    _darkness = coverage_matrix(_y_edges, _canvas.height) @ \
+        _black.astype(np.float32) @ \
+        coverage_matrix(_x_edges, _canvas.width).T
+    # Edges at half pixels give many ties of x.5 gray levels, rounding them
+    # all the same way biases the white area, so round ties up and down
+    # alternately in a checkerboard
+    _ties = ((np.arange(_canvas.height)[:, None] +
+              np.arange(_canvas.width)[None, :]) % 2 - 0.5) * _TIE_OFFSET
+    _canvas.image[...] = np.floor(
+        255 * (1 - np.clip(_darkness, 0, 1)) + 0.5 + _ties)
+    return _canvas, (_width, _height)
+
+
+def exact_black_rectangles(_x_edges, _y_edges, _black):
+    """
+    :return: list of (x, y, width, height) in float pixels
+    """
+    return [(float(_x_edges[_x]), float(_y_edges[_y]),
+             float(_x_edges[_x + _w] - _x_edges[_x]),
+             float(_y_edges[_y + _h] - _y_edges[_y]))
+            for _x, _y, _w, _h in merge_black_rectangles(_black)]
+
+
+def save_exact_board(_file_name, _output_formats, _num_x, _num_y,
+                     _tag_size_mm, _tag_interval_ratio, _tag_family, _dpi,
+                     _first_id=0, _symmetric_corners=True, _type=0):
+    """
+    Save exact board to png, svg and pdf
+
+    :param _file_name: output path without extension
+    :param _output_formats: list from `parse_output_formats`
+    :return: list of saved file paths
+    """
+    _saved_files = []
+    if 'png' in _output_formats:
+        _canvas, _ = render_exact_board(
+            _num_x, _num_y, _tag_size_mm, _tag_interval_ratio, _tag_family,
+            _dpi, _first_id, _symmetric_corners, _type=_type)
+        _canvas.to_image().save(f'{_file_name}.png', dpi=(_dpi, _dpi))
+        _saved_files.append(f'{_file_name}.png')
+    if 'svg' in _output_formats or 'pdf' in _output_formats:
+        _width, _height, _, _, _ = exact_tag_layout(
+            _num_x, _num_y, _tag_size_mm, _tag_interval_ratio, _dpi)
+        _rectangles = exact_black_rectangles(*exact_segment_grid(
+            _num_x, _num_y, _tag_size_mm, _tag_interval_ratio, _tag_family,
+            _dpi, _first_id, _symmetric_corners, _type=_type))
+        if 'svg' in _output_formats:
+            write_svg(f'{_file_name}.svg', _width, _height, _rectangles, _dpi)
+            _saved_files.append(f'{_file_name}.svg')
+        if 'pdf' in _output_formats:
+            write_pdf(f'{_file_name}.pdf', [(_width, _height, _rectangles)],
+                      _dpi)
+            _saved_files.append(f'{_file_name}.pdf')
+    return _saved_files
+
+
+def save_exact_geometry(_file_name, _num_x, _num_y, _tag_size_mm,
+                        _tag_interval_ratio, _tag_family, _dpi, _first_id=0):
+    """
+    Write `<_file_name>.npz` and `<_file_name>.yaml` with the same keys as
+    `BoardGeometry.save_board_geometry`, corners are exact
+
+    :return: list of saved file paths
+    """
+    _width, _height, _tag_size, _xs, _ys = exact_tag_layout(
+        _num_x, _num_y, _tag_size_mm, _tag_interval_ratio, _dpi)
+    _lt = np.stack(np.broadcast_arrays(_xs[None, :], _ys[:, None]),
+                   axis=-1).reshape(-1, 1, 2)
+    _corners_px = _lt + np.array([[0, 0], [1, 0], [1, 1], [0, 1]]) * \
+        _tag_size
+    _meters_per_pixel = METERS_PER_INCH / _dpi
+    _geometry = {
+        'tag_ids': np.arange(_first_id, _first_id + _num_x * _num_y,
+                             dtype=np.int32),
+        'corners_px': _corners_px,
+        'corners_m': _corners_px * _meters_per_pixel,
+        'centers_px': _corners_px.mean(axis=1),
+        'centers_m': _corners_px.mean(axis=1) * _meters_per_pixel,
+        'image_size_px': np.array([math.ceil(_width), math.ceil(_height)],
+                                  dtype=np.int64),
+        'dpi': np.float64(_dpi),
+        'tag_size_m': np.float64(_tag_size_mm / 1000),
+    }
+    np.savez_compressed(f'{_file_name}.npz', **_geometry)
+    write_geometry_yaml(f'{_file_name}.yaml', _geometry, _num_x, _num_y,
+                        _tag_interval_ratio, _tag_family.name)
+    return [f'{_file_name}.npz', f'{_file_name}.yaml']
+
+
+def tag_white_moments(_image, _x, _y, _tag_size, _tag_border_bits,
+                      _tag_bits):
+    """
+    White area and its centroid inside the black border of one tag. The
+    window edges are in the middle of the border, so only data bits count.
+
+    :return: (area in square pixels, centroid x, centroid y)
+    """
+    _cell = _tag_size / (_tag_bits + 2 * _tag_border_bits)
+    _inset = _tag_border_bits * _cell / 2
+    _x0 = math.ceil(_x + _inset)
+    _x1 = math.floor(_x + _tag_size - _inset)
+    _y0 = math.ceil(_y + _inset)
+    _y1 = math.floor(_y + _tag_size - _inset)
+    _white = _image[_y0:_y1, _x0:_x1].astype(np.float64) / 255
+    _area = _white.sum()
+    _cx = (_white.sum(axis=0) * (np.arange(_x0, _x1) + 0.5)).sum() / _area
+    _cy = (_white.sum(axis=1) * (np.arange(_y0, _y1) + 0.5)).sum() / _area
+    return _area, _cx, _cy
+
+
+def ideal_white_moments(_pattern, _x, _y, _tag_size, _tag_border_bits):
+    """
+    :return: (area, centroid x, centroid y) of white bits at exact geometry
+    """
+    _cell = _tag_size / (len(_pattern) + 2 * _tag_border_bits)
+    _rows, _cols = np.nonzero(_pattern)
+    _area = len(_rows) * _cell * _cell
+    _cx = _x + (_tag_border_bits + _cols.mean() + 0.5) * _cell
+    _cy = _y + (_tag_border_bits + _rows.mean() + 0.5) * _cell
+    return _area, _cx, _cy
+
+
+def measure_geometric_error(_image, _num_x, _num_y, _tag_size_mm,
+                            _tag_interval_ratio, _tag_family, _dpi,
+                            _first_id=0, _tag_border_bits=2):
+    """
+    Compare white bits of every tag in `_image` with the ideal geometry of
+    `_tag_size_mm` at `_dpi`
+
+    :return: (maximum relative area error, maximum centroid error in pixels)
+    """
+    _, _, _tag_size, _xs, _ys = exact_tag_layout(
+        _num_x, _num_y, _tag_size_mm, _tag_interval_ratio, _dpi)
+    _patterns = _tag_family.code_matrices()[0]
+    _area_error = 0.0
+    _centroid_error = 0.0
+    for _idx_y, _y in enumerate(_ys):
+        for _idx_x, _x in enumerate(_xs):
+            _pattern = _patterns[_first_id + _idx_y * _num_x + _idx_x]
+            _area, _cx, _cy = tag_white_moments(
+                _image, _x, _y, _tag_size, _tag_border_bits, len(_pattern))
+            _ideal_area, _ideal_cx, _ideal_cy = ideal_white_moments(
+                _pattern, _x, _y, _tag_size, _tag_border_bits)
+            _area_error = max(_area_error,
+                              abs(_area - _ideal_area) / _ideal_area)
+            _centroid_error = max(_centroid_error,
+                                  math.hypot(_cx - _ideal_cx, _cy - _ideal_cy))
+    return _area_error, _centroid_error
+
+
+if __name__ == '__main__':
+    global_options = optparse.OptionParser(
+        usage='Measure geometric error of exact and pixel snapped boards',
+        version='%prog 1.0')
+    global_options.add_option('--sizes', action='store', type='string',
+                              dest='tag_sizes', default='10,15,20,25.4,30',
+                              help='Tag sizes in mm separated by comma')
+    global_options.add_option('-x', '--nx', action='store', type='int',
+                              dest='num_x', default=6,
+                              help='Number of tags in x direction')
+    global_options.add_option('-y', '--ny', action='store', type='int',
+                              dest='num_y', default=6,
+                              help='Number of tags in y direction')
+    global_options.add_option('-i', '--interval', action='store', type='float',
+                              dest='tag_interval', default=0.25,
+                              help='Ratio of tag interval relative to tag size')
+    global_options.add_option('-d', '--dpi', action='store', type='float',
+                              dest='dpi', default=300,
+                              help='Pixels per inch, default is 300')
+    (options, args) = global_options.parse_args()
+
+    tag_family = Tag36h11()
+    print('{:>8} {:>9} {:>12} {:>12} {:>12} {:>12}'.format(
+        'size mm', 'size px', 'snap area', 'snap px', 'exact area',
+        'exact px'))
+    for size_mm in [float(size) for size in options.tag_sizes.split(',')
+                    if size.strip()]:
+        width, height, tag_size, _, _ = exact_tag_layout(
+            options.num_x, options.num_y, size_mm, options.tag_interval,
+            options.dpi)
+        snapped = ArrayCanvas(math.ceil(width), math.ceil(height))
+        compose_april_board(snapped.image, options.num_x, options.num_y,
+                            tag_size, options.tag_interval, tag_family)
+        exact, _ = render_exact_board(options.num_x, options.num_y, size_mm,
+                                      options.tag_interval, tag_family,
+                                      options.dpi)
+        errors = [measure_geometric_error(
+            canvas.image, options.num_x, options.num_y, size_mm,
+            options.tag_interval, tag_family, options.dpi)
+            for canvas in (snapped, exact)]
+        print('{:>8g} {:>9.3f} {:>11.2%} {:>12.3f} {:>11.2%} {:>12.3f}'
+              .format(size_mm, tag_size, errors[0][0], errors[0][1],
+                      errors[1][0], errors[1][1]))
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Pack many AprilTags boards onto paper pages and write one multi-page pdf.
+
+Boards come from the same spec file as `BatchGenerator.py`, of any
+`grid_type`. `tag_size` is in pixels of page `--dpi`, `axis_len`, `dpi` and
+`output_format` of boards are ignored. Boards of the same family must have
+disjoint ID ranges, so every printed tag is unique in a calibration session.
+
+Boards are packed by first fit decreasing height shelves:
+
+    1. sort boards by height, tallest first.
+    2. put every board on the first shelf of any page with enough room, a
+       shelf is as tall as its first board.
+    3. otherwise open a new shelf under the last shelf of the first page
+       with enough height left, or a new page.
+
+Every board is rendered headlessly with `render_board_image`, its black
+pixels are merged into rectangles and moved to its place on page, then all
+pages are written by `write_pdf` in one pass:
+
+    python3 PageLayout.py -b boards.json -p A4 -d 600 -o session.pdf
+
+With `-f pdf,png`, every page is also saved to png next to the pdf.
+"""
+
+import optparse
+import os
+import sys
+
+# =============================================================================
+# Imports
+# =============================================================================
+from cv_kits.april_tags.AprilTagsGenerator import compute_board_layout, \
+    render_board_image
+from cv_kits.april_tags.ArrayCanvas import ArrayCanvas
+from cv_kits.april_tags.PatternCompositor import charuco_tag_count, \
+    compute_pattern_layout, render_pattern_image
+from cv_kits.april_tags.BatchGenerator import load_board_specs
+from cv_kits.april_tags.VectorWriter import black_mask, \
+    merge_black_rectangles, write_pdf
+from cv_kits.april_tags.families import create_tag_family
+
+# Key is paper name, value is (width, height) in millimeters, portrait
+PAPER_SIZES = {
+    'A0': (841, 1189),
+    'A1': (594, 841),
+    'A2': (420, 594),
+    'A3': (297, 420),
+    'A4': (210, 297),
+    'A5': (148, 210),
+    'Letter': (215.9, 279.4),
+    'Legal': (215.9, 355.6),
+    'Tabloid': (279.4, 431.8),
+}
+
+
+def mm_to_pixels(_mm, _dpi):
+    return int(_mm / 25.4 * _dpi)
+
+
+def board_pixel_size(_board_spec):
+    """
+    :return: (width, height) in pixels of board rendered without axis
+    """
+    if 'april_tag' == _board_spec['grid_type']:
+        _width, _height, _, _ = compute_board_layout(
+            _board_spec['num_x'], _board_spec['num_y'],
+            _board_spec['tag_size'], _board_spec['tag_interval'], 0)
+    else:
+        _width, _height, _, _ = compute_pattern_layout(
+            _board_spec['num_x'], _board_spec['num_y'],
+            _board_spec['tag_size'], _board_spec['tag_interval'])
+    return _width, _height
+
+
+def board_tag_count(_board_spec):
+    """
+    :return: number of tags on board
+    """
+    if 'april_tag' == _board_spec['grid_type']:
+        return _board_spec['num_x'] * _board_spec['num_y']
+    if 'charuco' == _board_spec['grid_type']:
+        return charuco_tag_count(_board_spec['num_x'], _board_spec['num_y'])
+    return 0
+
+
+def check_id_ranges(_board_specs):
+    """
+    Check ID ranges of boards fit in family and do not overlap
+
+    :param _board_specs: list from `load_board_specs`
+    :return: None
+    """
+    _ranges = {}
+    for _spec in _board_specs:
+        _start = _spec['first_id']
+        _end = _start + board_tag_count(_spec)
+        if _end == _start:
+            continue
+        _tag_family = create_tag_family(_spec['family'])
+        _num_codes = len(_tag_family.tagCodes)
+        if _start < 0 or _end > _num_codes:
+            raise ValueError('Board {} uses tag id [{}, {}) out of family {} '
+                             'with {} codes'.format(_spec['name'], _start,
+                                                    _end, _spec['family'],
+                                                    _num_codes))
+        # Key by family name, aliases such as Tag36h11 and t36h11 are the
+        # same family
+        _ranges.setdefault(_tag_family.name, []).append(
+            (_start, _end, _spec['name']))
+    for _family, _family_ranges in _ranges.items():
+        _family_ranges.sort()
+        for (_, _end, _name), (_next_start, _, _next_name) in zip(
+                _family_ranges, _family_ranges[1:]):
+            if _next_start < _end:
+                raise ValueError('Boards {} and {} share tag ids of {}'
+                                 .format(_name, _next_name, _family))
+
+
+def pack_boards(_sizes, _page_width, _page_height, _gap=0):
+    """
+    Pack boards onto pages by first fit decreasing height shelves
+
+    :param _sizes: list of (width, height) of boards
+    :param _page_width: usable page width
+    :param _page_height: usable page height
+    :param _gap: space between neighbour boards
+    :return: list of pages, every page is list of (board index, x, y)
+    """
+    _order = sorted(range(len(_sizes)), key=lambda _idx: (
+        -_sizes[_idx][1], -_sizes[_idx][0]))
+    _pages = []
+    # Per page, list of shelves [y, height, used width] and next shelf y
+    _shelves = []
+    _next_y = []
+    for _idx in _order:
+        _width, _height = _sizes[_idx]
+        if _width > _page_width or _height > _page_height:
+            raise ValueError('Board {} of {}x{} does not fit page of {}x{}'
+                             .format(_idx, _width, _height, _page_width,
+                                     _page_height))
+        _placed = False
+        for _page, _page_shelves in enumerate(_shelves):
+            for _shelf in _page_shelves:
+                if _height <= _shelf[1] and \
+                        _shelf[2] + _width <= _page_width:
+                    _pages[_page].append((_idx, _shelf[2], _shelf[0]))
+                    _shelf[2] += _width + _gap
+                    _placed = True
+                    break
+            if _placed:
+                break
+        if _placed:
+            continue
+        for _page in range(len(_pages)):
+            if _next_y[_page] + _height <= _page_height:
+                break
+        else:
+            _pages.append([])
+            _shelves.append([])
+            _next_y.append(0)
+            _page = len(_pages) - 1
+        _shelves[_page].append([_next_y[_page], _height, _width + _gap])
+        _pages[_page].append((_idx, 0, _next_y[_page]))
+        _next_y[_page] += _height + _gap
+    return _pages
+
+
+def render_pages(_board_specs, _pages, _page_width, _page_height, _margin=0,
+                 _png_file_names=None):
+    """
+    Render boards and move their black rectangles to pages
+
+    :param _board_specs: list from `load_board_specs`
+    :param _pages: list from `pack_boards`
+    :param _page_width: page width in pixels
+    :param _page_height: page height in pixels
+    :param _margin: page margin in pixels
+    :param _png_file_names: png path of every page, None means no png
+    :return: list of (width, height, rectangles) for `write_pdf`
+    """
+    _pdf_pages = []
+    for _page_idx, _placements in enumerate(_pages):
+        _canvas = None
+        if _png_file_names is not None:
+            _canvas = ArrayCanvas(_page_width, _page_height)
+        _rectangles = []
+        for _idx, _x, _y in _placements:
+            _spec = _board_specs[_idx]
+            if 'april_tag' == _spec['grid_type']:
+                _board = render_board_image(
+                    _spec['num_x'], _spec['num_y'], _spec['tag_size'],
+                    _spec['tag_interval'], create_tag_family(_spec['family']),
+                    0, _spec['first_id'], _spec['symmetric_corners'],
+                    _spec['border_type']).image
+            else:
+                _board = render_pattern_image(
+                    _spec['grid_type'], _spec['num_x'], _spec['num_y'],
+                    _spec['tag_size'], _spec['tag_interval'],
+                    create_tag_family(_spec['family']), _spec['first_id'],
+                    _spec['marker_ratio']).image
+            _x += _margin
+            _y += _margin
+            _rectangles.extend(
+                (_x + _rx, _y + _ry, _rw, _rh) for _rx, _ry, _rw, _rh in
+                merge_black_rectangles(black_mask(_board)))
+            if _canvas is not None:
+                _canvas.image[_y:_y + _board.shape[0],
+                              _x:_x + _board.shape[1]] = _board
+        if _canvas is not None:
+            _canvas.save(_png_file_names[_page_idx])
+        _pdf_pages.append((_page_width, _page_height, _rectangles))
+    return _pdf_pages
+
+
+def layout_boards(_board_specs, _file_name, _paper='A4', _landscape=False,
+                  _dpi=300.0, _margin_mm=10.0, _gap_mm=5.0, _png=False):
+    """
+    Pack boards onto pages and write one pdf
+
+    :param _board_specs: list from `load_board_specs`
+    :param _file_name: output pdf path
+    :param _paper: key of `PAPER_SIZES`
+    :param _landscape: whether rotate paper
+    :param _dpi: pixels per inch, `tag_size` of boards is in these pixels
+    :param _margin_mm: page margin in millimeters
+    :param _gap_mm: space between boards in millimeters
+    :param _png: also save every page to png next to pdf
+    :return: list of pages from `pack_boards`
+    """
+    if _paper not in PAPER_SIZES:
+        raise ValueError('Unknown paper {}, known papers are {}'.format(
+            _paper, ', '.join(PAPER_SIZES)))
+    check_id_ranges(_board_specs)
+    _width_mm, _height_mm = PAPER_SIZES[_paper]
+    if _landscape:
+        _width_mm, _height_mm = _height_mm, _width_mm
+    _page_width = mm_to_pixels(_width_mm, _dpi)
+    _page_height = mm_to_pixels(_height_mm, _dpi)
+    _margin = mm_to_pixels(_margin_mm, _dpi)
+    _sizes = [board_pixel_size(_spec) for _spec in _board_specs]
+    for _spec, (_width, _height) in zip(_board_specs, _sizes):
+        if _width > _page_width - 2 * _margin or \
+                _height > _page_height - 2 * _margin:
+            raise ValueError('Board {} of {:.1f}x{:.1f} mm does not fit {} '
+                             'paper with {} mm margin'.format(
+                                 _spec['name'], _width / _dpi * 25.4,
+                                 _height / _dpi * 25.4, _paper, _margin_mm))
+    _pages = pack_boards(_sizes, _page_width - 2 * _margin,
+                         _page_height - 2 * _margin,
+                         mm_to_pixels(_gap_mm, _dpi))
+    _png_file_names = None
+    if _png:
+        _png_file_names = ['{}_{:03d}.png'.format(
+            os.path.splitext(_file_name)[0], _idx + 1)
+            for _idx in range(len(_pages))]
+    write_pdf(_file_name, render_pages(_board_specs, _pages, _page_width,
+                                       _page_height, _margin,
+                                       _png_file_names), _dpi)
+    return _pages
+
+
+if __name__ == '__main__':
+    global_options = optparse.OptionParser(
+        usage='Pack AprilTags boards onto pages of one pdf',
+        version='%prog 1.0')
+    global_options.add_option('-b', '--batch', action='store', type='string',
+                              dest='spec_path', default='',
+                              help='Board spec file, json, yaml or csv')
+    global_options.add_option('-o', '--output', action='store', type='string',
+                              dest='output_file', default='boards.pdf',
+                              help='Output pdf, default is boards.pdf')
+    global_options.add_option('-p', '--paper', action='store', type='string',
+                              dest='paper', default='A4',
+                              help='Paper size, one of {}, default is A4'
+                              .format(', '.join(PAPER_SIZES)))
+    global_options.add_option('-l', '--landscape', action='store_true',
+                              dest='landscape', default=False,
+                              help='Use landscape paper')
+    global_options.add_option('-d', '--dpi', action='store', type='float',
+                              dest='dpi', default=300.0,
+                              help='Pixels per inch, tag size of boards is '
+                                   'in these pixels, default is 300')
+    global_options.add_option('-m', '--margin', action='store', type='float',
+                              dest='margin', default=10.0,
+                              help='Page margin in mm, default is 10')
+    global_options.add_option('-g', '--gap', action='store', type='float',
+                              dest='gap', default=5.0,
+                              help='Space between boards in mm, default is 5')
+    global_options.add_option('-f', '--format', action='store', type='string',
+                              dest='output_format', default='pdf',
+                              help='pdf, or pdf,png to also save every page '
+                                   'to png')
+    (options, args) = global_options.parse_args()
+
+    if not options.spec_path:
+        global_options.print_help()
+        sys.exit(1)
+    try:
+        board_specs = load_board_specs(options.spec_path)
+        output_dir = os.path.dirname(os.path.abspath(options.output_file))
+        if not os.path.isdir(output_dir):
+            os.makedirs(output_dir)
+        pages = layout_boards(
+            board_specs, options.output_file, options.paper,
+            options.landscape, options.dpi, options.margin, options.gap,
+            'png' in options.output_format.lower().split(','))
+    except (OSError, ValueError) as e:
+        print(e)
+        sys.exit(1)
+    for page_idx, placements in enumerate(pages):
+        print('page {}: {}'.format(page_idx + 1, ', '.join(
+            board_specs[idx]['name'] for idx, _, _ in placements)))
+    print('Write {} boards on {} pages to {}'.format(
+        len(board_specs), len(pages), options.output_file))
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Compose checkerboard and ChArUco-like boards with batched numpy operations.
+
+Both patterns are `num_x` x `num_y` squares of `_square_size` pixels with
+a white margin of `_margin_ratio * _square_size` around them, the left top
+square is black:
+
+    1. checkerboard: color of every pixel is the parity of its square row
+       plus square column, written with one `numpy.where`.
+    2. charuco: checkerboard with an AprilTag of `_marker_ratio` of square
+       size in the center of every white square. Tag ids go row by row from
+       left top white square. All tags are bordered, upsampled and scattered
+       with a single fancy index assignment, like `compose_april_board`.
+
+Squares are laid out by `grid_layout` and `grid_pixels` of
+`BoardCompositor.py`, the same as tags of AprilTags board with no gap, so
+square edges are rounded to whole pixels the same way as `ArrayCanvas`.
+"""
+
+import numpy as np
+
+# =============================================================================
+# Imports
+# =============================================================================
+from cv_kits.april_tags.ArrayCanvas import ArrayCanvas
+from cv_kits.april_tags.BoardCompositor import grid_layout, grid_pixels
+
+
+def compute_pattern_layout(_num_x, _num_y, _square_size, _margin_ratio):
+    """
+    :return: (total_width, total_height, lt_x, lt_y), squares start at
+             (lt_x, lt_y)
+    """
+    _margin = _margin_ratio * _square_size
+    _total_width, _total_height = grid_layout(_num_x, _num_y, _square_size, 0,
+                                              _margin)
+    return _total_width, _total_height, _margin, _margin
+
+
+def _square_edges(_lt, _count, _square_size):
+    """
+    :return: int array of `_count + 1` square edges in pixels
+    """
+    return grid_pixels(_lt, _count + 1, _square_size, 0)
+
+
+def compose_checkerboard(_image, _num_x, _num_y, _square_size, _lt_x=0,
+                         _lt_y=0):
+    """
+    Render checkerboard into `_image`, left top square is black
+
+    :param _image: uint8 array with shape (height, width) or
+                   (height, width, 3)
+    :return: `_image`
+    """
+    _height, _width = _image.shape[:2]
+    _x_edges = _square_edges(_lt_x, _num_x, _square_size)
+    _y_edges = _square_edges(_lt_y, _num_y, _square_size)
+    _x0, _x1 = max(0, _x_edges[0]), min(_width, _x_edges[-1])
+    _y0, _y1 = max(0, _y_edges[0]), min(_height, _y_edges[-1])
+    if _x0 >= _x1 or _y0 >= _y1:
+        return _image
+    # Square column and row of every pixel
+    _cols = np.searchsorted(_x_edges, np.arange(_x0, _x1), side='right') - 1
+    _rows = np.searchsorted(_y_edges, np.arange(_y0, _y1), side='right') - 1
+    _board = np.where((_rows[:, None] + _cols[None, :]) % 2 == 0,
+                      np.uint8(0), np.uint8(255))
+    if 3 == _image.ndim:
+        _board = _board[..., None]
+    _image[_y0:_y1, _x0:_x1] = _board
+    return _image
+
+
+def charuco_tag_count(_num_x, _num_y):
+    """
+    :return: number of white squares, which is the number of tags
+    """
+    return _num_x * _num_y // 2
+
+
+def charuco_tag_squares(_num_x, _num_y):
+    """
+    :return: (rows, cols) int arrays of white squares in tag id order
+    """
+    _rows, _cols = np.nonzero((np.arange(_num_y)[:, None] +
+                               np.arange(_num_x)[None, :]) % 2 == 1)
+    return _rows, _cols
+
+
+def charuco_tag_boxes(_num_x, _num_y, _square_size, _marker_ratio,
+                      _tag_bits, _lt_x=0, _lt_y=0, _tag_border_bits=2):
+    """
+    :return: (left x, top y, tag size, pixels per bit), x and y are int
+             arrays in tag id order, tag size includes border
+    """
+    _cells = _tag_bits + 2 * _tag_border_bits
+    _pixels_per_bit = int(_marker_ratio * _square_size / _cells)
+    if _pixels_per_bit < 1:
+        raise ValueError('Tag of {} bits does not fit {} of square {}'
+                         .format(_cells, _marker_ratio, _square_size))
+    _tag_size = _cells * _pixels_per_bit
+    _x_edges = _square_edges(_lt_x, _num_x, _square_size)
+    _y_edges = _square_edges(_lt_y, _num_y, _square_size)
+    _rows, _cols = charuco_tag_squares(_num_x, _num_y)
+    # Center tag in rounded square
+    _x = _x_edges[_cols] + (_x_edges[_cols + 1] - _x_edges[_cols] -
+                            _tag_size) // 2
+    _y = _y_edges[_rows] + (_y_edges[_rows + 1] - _y_edges[_rows] -
+                            _tag_size) // 2
+    return _x, _y, _tag_size, _pixels_per_bit
+
+
+def compose_charuco_board(_image, _num_x, _num_y, _square_size,
+                          _marker_ratio, _tag_family, _lt_x=0, _lt_y=0,
+                          _first_id=0, _tag_border_bits=2):
+    """
+    Render checkerboard with an AprilTag in every white square
+
+    :param _image: uint8 array with shape (height, width) or
+                   (height, width, 3)
+    :param _marker_ratio: tag size with border relative to square size
+    :param _tag_family: every tag's shape is decided by tag_family
+    :param _first_id: tag id of left top white square
+    :param _tag_border_bits: black border width in bits
+    :return: `_image`
+    """
+    _num_tags = charuco_tag_count(_num_x, _num_y)
+    if _first_id < 0 or _first_id + _num_tags > len(_tag_family.tagCodes):
+        raise ValueError('Tag id range [{}, {}) out of family {} with {} codes'
+                         .format(_first_id, _first_id + _num_tags,
+                                 _tag_family.name,
+                                 len(_tag_family.tagCodes)))
+    compose_checkerboard(_image, _num_x, _num_y, _square_size, _lt_x, _lt_y)
+    if 0 == _num_tags:
+        return _image
+    _x, _y, _tag_size, _pixels_per_bit = charuco_tag_boxes(
+        _num_x, _num_y, _square_size, _marker_ratio, _tag_family.tagBits,
+        _lt_x, _lt_y, _tag_border_bits)
+    _patterns = _tag_family.code_matrices()[0][
+        _first_id:_first_id + _num_tags]
+    _tiles = np.where(_patterns, np.uint8(255), np.uint8(0))
+    _tiles = np.pad(_tiles, ((0, 0), (_tag_border_bits, _tag_border_bits),
+                             (_tag_border_bits, _tag_border_bits)))
+    # Upsample all tags at once
+    _tiles = np.repeat(np.repeat(_tiles, _pixels_per_bit, axis=1),
+                       _pixels_per_bit, axis=2)
+    _height, _width = _image.shape[:2]
+    _offsets = np.arange(_tag_size)
+    _rows = _y[:, None] + _offsets
+    _cols = _x[:, None] + _offsets
+    # Tags are inside their squares, only squares may be outside image
+    _inside = (_rows[:, 0] >= 0) & (_rows[:, -1] < _height) & \
+        (_cols[:, 0] >= 0) & (_cols[:, -1] < _width)
+    _rows, _cols, _tiles = _rows[_inside], _cols[_inside], _tiles[_inside]
+    if 3 == _image.ndim:
+        _tiles = _tiles[..., None]
+    _image[_rows[:, :, None], _cols[:, None, :]] = _tiles
+    return _image
+
+
+def render_pattern_image(_grid_type, _num_x, _num_y, _square_size,
+                         _margin_ratio, _tag_family=None, _first_id=0,
+                         _marker_ratio=0.75):
+    """
+    Compose checkerboard or charuco board headlessly
+
+    :param _grid_type: 'checkerboard' or 'charuco'
+    :return: `ArrayCanvas` holding the board
+    """
+    _total_width, _total_height, _lt_x, _lt_y = compute_pattern_layout(
+        _num_x, _num_y, _square_size, _margin_ratio)
+    _canvas = ArrayCanvas(_total_width, _total_height)
+    if 'checkerboard' == _grid_type:
+        compose_checkerboard(_canvas.image, _num_x, _num_y, _square_size,
+                             _lt_x, _lt_y)
+    elif 'charuco' == _grid_type:
+        compose_charuco_board(_canvas.image, _num_x, _num_y, _square_size,
+                              _marker_ratio, _tag_family, _lt_x, _lt_y,
+                              _first_id)
+    else:
+        raise ValueError('Unknown pattern type {}'.format(_grid_type))
+    return _canvas
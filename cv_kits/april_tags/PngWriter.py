@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Write png row band by row band, without holding the whole image in memory.
+
+Every band is filtered and compressed into the IDAT stream as soon as it is
+written, so peak memory is one band plus zlib window no matter how high the
+image is. Rows use png filter type 2 (Up): board rows mostly repeat the row
+above, so filtered rows are zeros and compress well even when a row is wider
+than the 32 KB deflate window.
+
+For example, write 3 bands of 100 rows:
+
+    with StreamingPngWriter('board.png', 1000, 300) as writer:
+        for _ in range(3):
+            writer.write_rows(np.zeros((100, 1000), dtype=np.uint8))
+
+"""
+
+import struct
+import zlib
+
+import numpy as np
+
+# Key is image mode, value is (channels, png color type)
+_PNG_MODES = {'L': (1, 0), 'RGB': (3, 2)}
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# Flush IDAT chunk when compressed buffer reaches this size
+_IDAT_CHUNK_SIZE = 1 << 20
+
+
+class StreamingPngWriter:
+
+    def __init__(self, _file_name, _width, _height, mode='L',
+                 compress_level=6):
+        """
+        :param _file_name: output png path
+        :param _width: image width in pixels
+        :param _height: image height in pixels
+        :param mode: 'L' for gray image, 'RGB' for color image
+        :param compress_level: zlib compress level, 0 - 9
+        """
+        if mode not in _PNG_MODES:
+            raise ValueError('StreamingPngWriter mode must be L or RGB, '
+                             'not {}'.format(mode))
+        self.width = int(_width)
+        self.height = int(_height)
+        self.mode = mode
+        self._channels, _color_type = _PNG_MODES[mode]
+        self._rows_written = 0
+        self._previous_row = np.zeros(self.width * self._channels,
+                                      dtype=np.uint8)
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = bytearray()
+        self._fp = open(_file_name, 'wb')
+        self._fp.write(_PNG_SIGNATURE)
+        self._write_chunk(b'IHDR', struct.pack('>IIBBBBB', self.width,
+                                               self.height, 8, _color_type,
+                                               0, 0, 0))
+
+    def _write_chunk(self, _chunk_type, _data):
+        self._fp.write(struct.pack('>I', len(_data)))
+        self._fp.write(_chunk_type)
+        self._fp.write(_data)
+        self._fp.write(struct.pack('>I', zlib.crc32(_data,
+                                                    zlib.crc32(_chunk_type))))
+
+    def _flush_pending(self, _force=False):
+        if self._pending and (_force or
+                              len(self._pending) >= _IDAT_CHUNK_SIZE):
+            self._write_chunk(b'IDAT', bytes(self._pending))
+            self._pending.clear()
+
+    def write_rows(self, _rows):
+        """
+        Append rows to image
+
+        :param _rows: uint8 array with shape (n, width) for 'L' mode or
+                      (n, width, 3) for 'RGB' mode
+        :return: None
+        """
+        _rows = np.asarray(_rows, dtype=np.uint8).reshape(
+            -1, self.width * self._channels)
+        if self._rows_written + len(_rows) > self.height:
+            raise ValueError('Write {} rows after {} rows, image height is {}'
+                             .format(len(_rows), self._rows_written,
+                                     self.height))
+        if 0 == len(_rows):
+            return
+        # Filter type 2 (Up): byte minus the byte right above, modulo 256
+        _filtered = np.empty((len(_rows), 1 + _rows.shape[1]), dtype=np.uint8)
+        _filtered[:, 0] = 2
+        _filtered[0, 1:] = _rows[0] - self._previous_row
+        _filtered[1:, 1:] = _rows[1:] - _rows[:-1]
+        self._previous_row = _rows[-1].copy()
+        self._pending += self._compressor.compress(_filtered.tobytes())
+        self._flush_pending()
+        self._rows_written += len(_rows)
+
+    def close(self):
+        """
+        Finish IDAT stream and write IEND chunk
+        """
+        if self._fp is None:
+            return
+        try:
+            if self._rows_written != self.height:
+                raise ValueError('Only {} rows written, image height is {}'
+                                 .format(self._rows_written, self.height))
+            self._pending += self._compressor.flush()
+            self._flush_pending(True)
+            self._write_chunk(b'IEND', b'')
+        finally:
+            self._fp.close()
+            self._fp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _exc_type, _exc_value, _traceback):
+        if _exc_type is None:
+            self.close()
+        elif self._fp is not None:
+            # Keep original exception, file is incomplete anyway
+            self._fp.close()
+            self._fp = None
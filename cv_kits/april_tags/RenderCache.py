@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Content-addressed on-disk cache of rendered boards.
+
+Key of a board is the sha256 of its full render spec, including family name
+and `TagFamily.code_table_hash()`, so the same spec always maps to the same
+files no matter which job renders it. Layout of cache folder:
+
+    <cache_folder>/<key[:2]>/<key>.png
+    <cache_folder>/<key[:2]>/<key>.pdf
+
+Cached files are read only. A cache hit hardlinks them to the output path
+(copy when hardlink fails, for example across file systems) and touches their
+mtime, so eviction removes least recently used files first until the cache
+is below `max_bytes`.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+# Bump when rendering output changes, so old cached files are never reused.
+RENDER_CACHE_VERSION = 1
+
+
+def board_cache_key(_tag_family, **_render_spec):
+    """
+    :param _tag_family: `TagFamily` instance
+    :param _render_spec: every parameter which changes output files
+    :return: sha256 hex digest string
+    """
+    _spec = dict(_render_spec)
+    _spec['family'] = _tag_family.name
+    _spec['family_codes'] = _tag_family.code_table_hash()
+    _spec['cache_version'] = RENDER_CACHE_VERSION
+    _text = json.dumps(_spec, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(_text.encode()).hexdigest()
+
+
+def _link_or_copy(_source, _destination):
+    """
+    Hardlink `_source` to `_destination`, copy if hardlink is impossible.
+    Existing `_destination` is replaced.
+    """
+    if os.path.lexists(_destination):
+        os.remove(_destination)
+    try:
+        os.link(_source, _destination)
+    except OSError:
+        shutil.copyfile(_source, _destination)
+
+
+class RenderCache:
+
+    def __init__(self, _cache_folder, _max_bytes=1 << 30):
+        """
+        :param _cache_folder: cache root folder, created if not exist
+        :param _max_bytes: total size limit of cached files
+        """
+        self.cache_folder = _cache_folder
+        self.max_bytes = _max_bytes
+        if not os.path.isdir(_cache_folder):
+            os.makedirs(_cache_folder, exist_ok=True)
+
+    def _cache_path(self, _key, _extension):
+        return os.path.join(self.cache_folder, _key[:2],
+                            '{}.{}'.format(_key, _extension))
+
+    def fetch(self, _key, _file_name, _extensions):
+        """
+        Link cached files of `_key` to `_file_name` + extension
+
+        :param _key: from `board_cache_key`
+        :param _file_name: output path without extension
+        :param _extensions: list of extensions, like ['png', 'pdf']
+        :return: list of output files, None if any extension is not cached
+        """
+        _cache_paths = [self._cache_path(_key, _extension)
+                        for _extension in _extensions]
+        if not all(os.path.isfile(_path) for _path in _cache_paths):
+            return None
+        _output_files = []
+        try:
+            for _cache_path, _extension in zip(_cache_paths, _extensions):
+                _output_file = '{}.{}'.format(_file_name, _extension)
+                _link_or_copy(_cache_path, _output_file)
+                # Mark as recently used
+                os.utime(_cache_path)
+                _output_files.append(_output_file)
+        except FileNotFoundError:
+            # Evicted by another process right now
+            return None
+        return _output_files
+
+    def store(self, _key, _files):
+        """
+        Copy rendered files into cache, then evict old files
+
+        :param _key: from `board_cache_key`
+        :param _files: rendered files, extension of every file is kept
+        :return: None
+        """
+        _folder = os.path.join(self.cache_folder, _key[:2])
+        os.makedirs(_folder, exist_ok=True)
+        for _file in _files:
+            _extension = os.path.splitext(_file)[1].lstrip('.')
+            # Copy to temp file then rename, so other processes never see a
+            # half written file.
+            _fd, _temp_path = tempfile.mkstemp(dir=_folder, suffix='.tmp')
+            os.close(_fd)
+            try:
+                shutil.copyfile(_file, _temp_path)
+                os.chmod(_temp_path, 0o444)
+                os.replace(_temp_path, self._cache_path(_key, _extension))
+            except OSError:
+                if os.path.exists(_temp_path):
+                    os.remove(_temp_path)
+                raise
+        self.evict()
+
+    def evict(self):
+        """
+        Remove least recently used files until total size <= `max_bytes`
+
+        :return: number of removed files
+        """
+        _entries = []
+        _total_bytes = 0
+        for _folder, _, _names in os.walk(self.cache_folder):
+            for _name in _names:
+                if _name.endswith('.tmp'):
+                    continue
+                _path = os.path.join(_folder, _name)
+                try:
+                    _stat = os.stat(_path)
+                except FileNotFoundError:
+                    continue
+                _entries.append((_stat.st_mtime, _stat.st_size, _path))
+                _total_bytes += _stat.st_size
+        _removed = 0
+        for _mtime, _size, _path in sorted(_entries):
+            if _total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(_path)
+                _removed += 1
+            except FileNotFoundError:
+                pass
+            _total_bytes -= _size
+        return _removed
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Write AprilTags board to print-ready SVG or PDF without Tk `postscript()`.
+
+Tk eps has one rectangle per bit, eight border rectangles and four corner
+squares per tag. Here black pixels of the composed board are merged into
+maximal rectangles first:
+
+    1. every row is split into horizontal runs of black pixels.
+    2. a run with the same (x0, x1) as the run right above extends that
+       rectangle downward, otherwise a new rectangle starts.
+
+Rows which are equal to the previous row are skipped directly, so the cost is
+proportional to the number of distinct rows, which is a few per bit.
+
+Coordinates are board pixels, `_dpi` decides the physical size of one pixel,
+so the printed board is exactly `pixels / dpi` inches.
+"""
+
+import zlib
+
+import numpy as np
+
+
+def black_mask(_image):
+    """
+    :param _image: uint8 array with shape (height, width) or
+                   (height, width, 3)
+    :return: bool array with shape (height, width), True for black pixel
+    """
+    if 3 == _image.ndim:
+        return ~_image.any(axis=2)
+    return 0 == _image
+
+
+def merge_black_rectangles(_mask):
+    """
+    Merge black pixels into rectangles, see module document.
+
+    :param _mask: bool array with shape (height, width), True for black
+    :return: list of (x, y, width, height) in pixels
+    """
+    _height, _width = _mask.shape
+    _rectangles = []
+    # key is run (x0, x1), value is y of rectangle top
+    _open_runs = {}
+    _padded = np.zeros(_width + 2, dtype=np.int8)
+    _changed = np.ones(_height, dtype=bool)
+    _changed[1:] = (_mask[1:] != _mask[:-1]).any(axis=1)
+    for _y in np.flatnonzero(_changed).tolist():
+        _padded[1:-1] = _mask[_y]
+        _edges = np.flatnonzero(np.diff(_padded))
+        _runs = set(zip(_edges[0::2].tolist(), _edges[1::2].tolist()))
+        for _run in set(_open_runs) - _runs:
+            _top = _open_runs.pop(_run)
+            _rectangles.append((_run[0], _top, _run[1] - _run[0], _y - _top))
+        for _run in _runs - set(_open_runs):
+            _open_runs[_run] = _y
+    for _run, _top in _open_runs.items():
+        _rectangles.append((_run[0], _top, _run[1] - _run[0],
+                            _height - _top))
+    # Keep output stable: top to bottom, left to right
+    _rectangles.sort(key=lambda _rect: (_rect[1], _rect[0]))
+    return _rectangles
+
+
+def write_svg(_file_name, _width, _height, _rectangles, _dpi):
+    """
+    Write black rectangles to svg as a single path.
+
+    :param _file_name: output svg path
+    :param _width: board width in pixels
+    :param _height: board height in pixels
+    :param _rectangles: list of (x, y, width, height) in pixels
+    :param _dpi: pixels per inch of printed board
+    :return: None
+    """
+    _mm_per_pixel = 25.4 / _dpi
+    with open(_file_name, 'w') as _fp:
+        _fp.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        _fp.write('<svg xmlns="http://www.w3.org/2000/svg" version="1.1" '
+                  'width="{:.4f}mm" height="{:.4f}mm" viewBox="0 0 {} {}" '
+                  'shape-rendering="crispEdges">\n'
+                  .format(_width * _mm_per_pixel, _height * _mm_per_pixel,
+                          _width, _height))
+        _fp.write('<rect width="{}" height="{}" fill="white"/>\n'
+                  .format(_width, _height))
+        _fp.write('<path fill="black" d="')
+        _fp.write(''.join('M{} {}h{}v{}h{}z'.format(_x, _y, _w, _h, -_w)
+                          for _x, _y, _w, _h in _rectangles))
+        _fp.write('"/>\n</svg>\n')
+
+
+def _pdf_page_content(_height, _rectangles, _points_per_pixel):
+    """
+    :return: page content stream, `cm` operator maps pixel coordinates with
+             y axis downward to pdf points with y axis upward
+    """
+    _lines = ['{0:.6f} 0 0 {1:.6f} 0 {2:.4f} cm'.format(
+        _points_per_pixel, -_points_per_pixel, _height * _points_per_pixel),
+        '0 g']
+    _lines.extend('{} {} {} {} re'.format(_x, _y, _w, _h)
+                  for _x, _y, _w, _h in _rectangles)
+    _lines.append('f')
+    return '\n'.join(_lines).encode('ascii')
+
+
+def write_pdf(_file_name, _pages, _dpi):
+    """
+    Write pages of black rectangles to one pdf file.
+
+    :param _file_name: output pdf path
+    :param _pages: list of (width, height, rectangles), size in pixels,
+                   rectangles are list of (x, y, width, height) in pixels
+    :param _dpi: pixels per inch of printed board
+    :return: None
+    """
+    _points_per_pixel = 72.0 / _dpi
+    # Object 1 is catalog, 2 is page tree, then (page, content) per page
+    _objects = [None, None]
+    _page_ids = []
+    for _width, _height, _rectangles in _pages:
+        _content = zlib.compress(
+            _pdf_page_content(_height, _rectangles, _points_per_pixel))
+        _page_id = len(_objects) + 1
+        _page_ids.append(_page_id)
+        _objects.append(
+            '<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {:.4f} {:.4f}] '
+            '/Contents {} 0 R >>'.format(_width * _points_per_pixel,
+                                         _height * _points_per_pixel,
+                                         _page_id + 1).encode('ascii'))
+        _objects.append(b'<< /Length ' + str(len(_content)).encode('ascii') +
+                        b' /Filter /FlateDecode >>\nstream\n' + _content +
+                        b'\nendstream')
+    _objects[0] = b'<< /Type /Catalog /Pages 2 0 R >>'
+    _objects[1] = '<< /Type /Pages /Kids [{}] /Count {} >>'.format(
+        ' '.join('{} 0 R'.format(_id) for _id in _page_ids),
+        len(_page_ids)).encode('ascii')
+
+    with open(_file_name, 'wb') as _fp:
+        _fp.write(b'%PDF-1.4\n')
+        _offsets = []
+        for _idx, _object in enumerate(_objects):
+            _offsets.append(_fp.tell())
+            _fp.write('{} 0 obj\n'.format(_idx + 1).encode('ascii'))
+            _fp.write(_object)
+            _fp.write(b'\nendobj\n')
+        _xref_offset = _fp.tell()
+        _fp.write('xref\n0 {}\n'.format(len(_objects) + 1).encode('ascii'))
+        _fp.write(b'0000000000 65535 f \n')
+        for _offset in _offsets:
+            _fp.write('{:010d} 00000 n \n'.format(_offset).encode('ascii'))
+        _fp.write('trailer\n<< /Size {} /Root 1 0 R >>\nstartxref\n{}\n'
+                  '%%EOF\n'.format(len(_objects) + 1,
+                                   _xref_offset).encode('ascii'))
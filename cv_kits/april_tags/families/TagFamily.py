@@ -5,9 +5,381 @@
 # Created Date: 2020-12-25
 # =============================================================================
 
+import hashlib
+import itertools
+import math
+import os
+import re
+import tempfile
+
+import numpy as np
+
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0f0f0f0f0f0f0f0f)
+_H01 = np.uint64(0x0101010101010101)
+
+
+def popcount64(_values):
+    """
+    Count set bits of every uint64 value
+
+    :param _values: uint64 array
+    :return: uint8 array with the same shape
+    """
+    _values = np.asarray(_values, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(_values)
+    # numpy older than 2.0, SWAR popcount
+    _values = _values - ((_values >> np.uint64(1)) & _M1)
+    _values = (_values & _M2) + ((_values >> np.uint64(2)) & _M2)
+    _values = (_values + (_values >> np.uint64(4))) & _M4
+    return ((_values * _H01) >> np.uint64(56)).astype(np.uint8)
+
+
+def rotate_codes_90(_codes, _tag_bits):
+    """
+    Rotate codes 90 degrees counterclockwise. Bit `tag_bits * i + j` of code
+    is cell (i, j), so the bit matrix of result is `numpy.rot90` of the bit
+    matrix of input.
+
+    :param _codes: uint64 array
+    :param _tag_bits: bits of every side
+    :return: uint64 array with the same shape
+    """
+    _codes = np.asarray(_codes, dtype=np.uint64)
+    _rotated = np.zeros_like(_codes)
+    for _i in range(_tag_bits):
+        for _j in range(_tag_bits):
+            # out[i, j] = in[j, tag_bits - 1 - i]
+            _source = np.uint64(_tag_bits * _j + _tag_bits - 1 - _i)
+            _rotated |= ((_codes >> _source) & np.uint64(1)) << np.uint64(
+                _tag_bits * _i + _j)
+    return _rotated
+
+
+def code_rotations(_codes, _tag_bits):
+    """
+    :param _codes: uint64 array with shape (n,)
+    :param _tag_bits: bits of every side
+    :return: uint64 array with shape (4, n), row r is rotated r times
+    """
+    _rotations = [np.asarray(_codes, dtype=np.uint64)]
+    for _ in range(3):
+        _rotations.append(rotate_codes_90(_rotations[-1], _tag_bits))
+    return np.stack(_rotations)
+
+
+def _row_masks(_tag_bits):
+    """
+    :return: (mask of bits whose right neighbour is in the same row,
+              mask of bits which have a neighbour in next row)
+    """
+    _horizontal = 0
+    for _i in range(_tag_bits):
+        for _j in range(_tag_bits - 1):
+            _horizontal |= 1 << (_tag_bits * _i + _j)
+    _vertical = (1 << (_tag_bits * (_tag_bits - 1))) - 1
+    return np.uint64(_horizontal), np.uint64(_vertical)
+
+
+def code_complexity(_codes, _tag_bits):
+    """
+    Complexity of codes, the number of edges between neighbouring bits with
+    different color plus white bits next to black border. Simple patterns like
+    solid squares and stripes have few edges.
+
+    :param _codes: uint64 array
+    :param _tag_bits: bits of every side
+    :return: int array with the same shape
+    """
+    _codes = np.asarray(_codes, dtype=np.uint64)
+    _horizontal, _vertical = _row_masks(_tag_bits)
+    _edges = popcount64((_codes ^ (_codes >> np.uint64(1))) & _horizontal)
+    _edges = _edges.astype(np.int64)
+    _edges += popcount64((_codes ^ (_codes >> np.uint64(_tag_bits))) &
+                         _vertical)
+    # Border is black, so every white bit on the outer ring is an edge
+    _ring = np.uint64(0)
+    for _k in range(_tag_bits):
+        for _bit in (_k, _tag_bits * (_tag_bits - 1) + _k, _tag_bits * _k,
+                     _tag_bits * _k + _tag_bits - 1):
+            _ring |= np.uint64(1 << _bit)
+    # Corner bits have 2 border edges
+    _corners = np.uint64((1 << 0) | (1 << (_tag_bits - 1)) |
+                         (1 << (_tag_bits * (_tag_bits - 1))) |
+                         (1 << (_tag_bits * _tag_bits - 1)))
+    _edges += popcount64(_codes & _ring)
+    _edges += popcount64(_codes & _corners)
+    return _edges
+
+
+def min_rotation_distance(_codes, _tag_bits):
+    """
+    :param _codes: uint64 array with shape (n,)
+    :param _tag_bits: bits of every side
+    :return: int array with shape (n,), minimum Hamming distance between
+             every code and its own 3 rotations
+    """
+    _rotations = code_rotations(_codes, _tag_bits)
+    return popcount64(_rotations[0] ^ _rotations[1:]).min(axis=0)
+
+
+def analyze_tag_codes(_codes, _tag_bits, _min_hamming=0, _min_complexity=0,
+                      _chunk_size=1 << 22):
+    """
+    Analyze Hamming distance and complexity of codes. Distance of a pair is
+    the minimum over all 4 rotations, and every pair is compared once, by
+    chunk of rows so memory is about `_chunk_size` bytes for any number of
+    codes.
+
+    :param _codes: int codes
+    :param _tag_bits: bits of every side, `_tag_bits ** 2` <= 64
+    :param _min_hamming: pairs and codes closer than this are reported
+    :param _min_complexity: codes less complex than this are reported
+    :param _chunk_size: compared pairs of every chunk
+    :return: dict with keys:
+             'codes': number of codes,
+             'min_distance': minimum pair distance, None for one code,
+             'distance_histogram': int array, item d is number of pairs
+                                   with distance d,
+             'weak_pairs': list of (id, id, distance) closer than
+                           `_min_hamming`,
+             'min_self_distance': minimum distance between code and its
+                                  own rotations,
+             'weak_self_ids': ids closer than `_min_hamming` to their own
+                              rotation,
+             'min_complexity': minimum `code_complexity`,
+             'low_complexity_ids': ids less complex than `_min_complexity`
+    """
+    _area = _tag_bits * _tag_bits
+    if _area > 64:
+        raise ValueError('Tag codes with {} bits is more than 64 bits'
+                         .format(_area))
+    _codes = np.asarray(_codes, dtype=np.uint64)
+    _count = len(_codes)
+    _rotations = code_rotations(_codes, _tag_bits)
+    _histogram = np.zeros(_area + 1, dtype=np.int64)
+    _weak_pairs = []
+    _rows = max(1, _chunk_size // max(1, _count))
+    for _start in range(0, _count - 1, _rows):
+        _end = min(_count - 1, _start + _rows)
+        # Row i only compares with columns after i
+        _columns = _rotations[:, _start + 1:]
+        _distances = popcount64(
+            _codes[_start:_end, None] ^ _columns[0][None, :])
+        for _rotation in range(1, 4):
+            np.minimum(_distances, popcount64(
+                _codes[_start:_end, None] ^ _columns[_rotation][None, :]),
+                out=_distances)
+        _upper = np.arange(_start, _end)[:, None] < \
+            np.arange(_start + 1, _count)[None, :]
+        _histogram += np.bincount(_distances[_upper], minlength=_area + 1)
+        for _i, _j in zip(*np.nonzero(_upper & (_distances < _min_hamming))):
+            _weak_pairs.append((_start + int(_i), _start + 1 + int(_j),
+                                int(_distances[_i, _j])))
+    _self_distances = min_rotation_distance(_codes, _tag_bits)
+    _complexity = code_complexity(_codes, _tag_bits)
+    _nonzero = np.flatnonzero(_histogram)
+    return {
+        'codes': _count,
+        'min_distance': int(_nonzero[0]) if len(_nonzero) else None,
+        'distance_histogram': _histogram,
+        'weak_pairs': _weak_pairs,
+        'min_self_distance': int(_self_distances.min()) if _count else None,
+        'weak_self_ids': np.flatnonzero(
+            _self_distances < _min_hamming).tolist(),
+        'min_complexity': int(_complexity.min()) if _count else None,
+        'low_complexity_ids': np.flatnonzero(
+            _complexity < _min_complexity).tolist(),
+    }
+
+
+def analysis_errors(_report, _max_items=10):
+    """
+    :param _report: dict of `analyze_tag_codes`
+    :param _max_items: weak pairs or ids listed in every error
+    :return: list of error strings, empty when family is good
+    """
+    _errors = []
+    if _report['weak_pairs']:
+        _errors.append('{} weak pairs (id, id, distance): {}'.format(
+            len(_report['weak_pairs']), _report['weak_pairs'][:_max_items]))
+    if _report['weak_self_ids']:
+        _errors.append('{} codes close to own rotation: {}'.format(
+            len(_report['weak_self_ids']),
+            _report['weak_self_ids'][:_max_items]))
+    if _report['low_complexity_ids']:
+        _errors.append('{} codes of low complexity: {}'.format(
+            len(_report['low_complexity_ids']),
+            _report['low_complexity_ids'][:_max_items]))
+    return _errors
+
+
+def error_masks(_area, _max_errors):
+    """
+    :param _area: bits of code
+    :param _max_errors: maximum set bits
+    :return: (uint64 masks with at most `_max_errors` set bits, ordered by
+              set bits, uint8 set bits of every mask)
+    """
+    _masks = []
+    _distances = []
+    for _distance in range(_max_errors + 1):
+        for _bits in itertools.combinations(range(_area), _distance):
+            _masks.append(sum(1 << _bit for _bit in _bits))
+            _distances.append(_distance)
+    return np.array(_masks, dtype=np.uint64), \
+        np.array(_distances, dtype=np.uint8)
+
+
 class TagFamily:
 
     def __init__(self, _name, _area, _codes):
         self.name = _name
         self.area = _area
         self.tagCodes = _codes
+        self.tagBits = int(math.sqrt(_area))
+        # Built by `code_matrices()` on first use
+        self._code_matrices = None
+        self._code_table_hash = None
+        # Built by `code_index()`, key is max errors
+        self._code_indexes = {}
+
+    def code_table_hash(self):
+        """
+        Hash of area and all codes, changes whenever any code changes.
+
+        :return: sha256 hex digest string
+        """
+        if self._code_table_hash is None:
+            _digest = hashlib.sha256('{}:{}'.format(self.area, ','.join(
+                format(_code, 'x') for _code in self.tagCodes)).encode())
+            self._code_table_hash = _digest.hexdigest()
+        return self._code_table_hash
+
+    def code_matrices(self):
+        """
+        Bit matrices of all codes with 4 rotations, built once and cached.
+
+        `matrices[0][tag_id]` is the pattern as rendered on board, True means
+        white bit. `matrices[r]` is `numpy.rot90(matrices[0], r)` of every
+        tag. The array is read only, so callers can share it without copy.
+
+        :return: bool array with shape (4, n_codes, tagBits, tagBits)
+        """
+        if self._code_matrices is None:
+            if self.area > 64:
+                raise ValueError('TagFamily {} has {} bits, more than 64'
+                                 .format(self.name, self.area))
+            _codes = np.asarray(self.tagCodes, dtype=np.uint64)
+            _shifts = np.arange(self.tagBits * self.tagBits, dtype=np.uint64)
+            # Bit `tagBits * i + j` of code is cell (i, j)
+            _raw = ((_codes[:, None] >> _shifts) & np.uint64(1)).astype(bool)
+            _raw = _raw.reshape(-1, self.tagBits, self.tagBits)
+            # Code is rendered after rotating 180 degrees
+            _rendered = _raw[:, ::-1, ::-1]
+            _matrices = np.stack([np.rot90(_rendered, _rotation, axes=(1, 2))
+                                  for _rotation in range(4)])
+            _matrices.setflags(write=False)
+            self._code_matrices = _matrices
+        return self._code_matrices
+
+    def code_index_arrays(self, _max_errors=0, _cache_folder=None):
+        """
+        Every code within `_max_errors` bits of any rotated code, sorted by
+        code. When a code is close to several rotated codes, the nearest one
+        is kept, ties keep the smaller rotation then the smaller tag id.
+
+        :param _max_errors: corrected bits, larger than
+                            `(min_hamming - 1) // 2` makes some codes
+                            ambiguous
+        :param _cache_folder: folder to load and save arrays as npz, named by
+                              family name, `code_table_hash()` and
+                              `_max_errors`, None means no file
+        :return: (uint64 codes, tag ids, rotations, distances), all with the
+                 same shape (n,)
+        """
+        _path = None
+        if _cache_folder:
+            _path = os.path.join(_cache_folder, '{}_{}_{}.npz'.format(
+                self.name, self.code_table_hash()[:16], _max_errors))
+            if os.path.isfile(_path):
+                with np.load(_path) as _arrays:
+                    return _arrays['codes'], _arrays['ids'], \
+                        _arrays['rotations'], _arrays['distances']
+        if self.area > 64:
+            raise ValueError('TagFamily {} has {} bits, more than 64'
+                             .format(self.name, self.area))
+        _masks, _mask_distances = error_masks(self.area, _max_errors)
+        _rotations = code_rotations(self.tagCodes, self.tagBits)
+        _num_codes = len(self.tagCodes)
+        # Axes are (mask, rotation, tag id), so flat order is by distance,
+        # then rotation, then tag id
+        _codes = (_rotations[None, :, :] ^ _masks[:, None, None]).ravel()
+        _codes, _first = np.unique(_codes, return_index=True)
+        _ids = (_first % _num_codes).astype(np.int32)
+        _rotation_ids = (_first // _num_codes % 4).astype(np.uint8)
+        _distances = _mask_distances[_first // (4 * _num_codes)]
+        if _path is not None:
+            os.makedirs(_cache_folder, exist_ok=True)
+            # Save to temp file then rename, so other processes never load a
+            # half written file.
+            _fd, _temp_path = tempfile.mkstemp(dir=_cache_folder,
+                                               suffix='.tmp')
+            try:
+                with os.fdopen(_fd, 'wb') as _fp:
+                    np.savez(_fp, codes=_codes, ids=_ids,
+                             rotations=_rotation_ids, distances=_distances)
+                os.replace(_temp_path, _path)
+            except OSError:
+                if os.path.exists(_temp_path):
+                    os.remove(_temp_path)
+                raise
+        return _codes, _ids, _rotation_ids, _distances
+
+    def code_index(self, _max_errors=0, _cache_folder=None):
+        """
+        Rotation invariant lookup table, built once per `_max_errors` and
+        cached, so decoding a sampled code is a single dict probe:
+
+            tag_id, rotation, distance = family.code_index(2)[code]
+
+        Code of `rotation` is `tagCodes[tag_id]` rotated `rotation` times by
+        `rotate_codes_90`. See `code_index_arrays` for arguments.
+
+        :return: dict from int code to (tag id, rotation, distance)
+        """
+        if _max_errors not in self._code_indexes:
+            _codes, _ids, _rotations, _distances = self.code_index_arrays(
+                _max_errors, _cache_folder)
+            self._code_indexes[_max_errors] = dict(zip(
+                _codes.tolist(),
+                zip(_ids.tolist(), _rotations.tolist(),
+                    _distances.tolist())))
+        return self._code_indexes[_max_errors]
+
+    def code_matrix(self, _tag_id, _rotation=0):
+        """
+        Rendered bit pattern of single tag, see `code_matrices()`
+
+        :param _tag_id: index of `tagCodes`
+        :param _rotation: times of rotating 90 degrees counterclockwise
+        :return: read only bool array with shape (tagBits, tagBits)
+        """
+        return self.code_matrices()[_rotation % 4, _tag_id]
+
+    def analyze(self, _min_hamming=None, _min_complexity=0):
+        """
+        Verify family before printing, see `analyze_tag_codes`
+
+        :param _min_hamming: None means the distance in name, like 11 of
+                             't36h11'
+        :param _min_complexity: minimum `code_complexity` of every code
+        :return: dict of `analyze_tag_codes`
+        """
+        if _min_hamming is None:
+            _match = re.search(r'h(\d+)$', self.name)
+            _min_hamming = int(_match.group(1)) if _match else 0
+        return analyze_tag_codes(self.tagCodes, self.tagBits, _min_hamming,
+                                 _min_complexity)
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Generate new tag family code table and write it as a `TagFamily` subclass.
+
+Codes are visited in the order of a full period additive generator over
+`2 ** (tag_bits * tag_bits)` values, like the original AprilTag generator. A
+candidate is accepted when:
+
+  1. its complexity (see `code_complexity`) is at least `min_complexity`,
+     which rejects simple patterns like stripes that appear in background;
+  2. Hamming distance between the candidate and its own 3 rotations is at
+     least `min_hamming`, so rotation of a tag is never ambiguous;
+  3. Hamming distance to all 4 rotations of every accepted code is at least
+     `min_hamming`.
+
+Candidates are filtered by batch with numpy popcount. The accepted rotations
+array is the Hamming distance index, so check 3 of a whole batch is a single
+`(batch, 4 * accepted)` xor and popcount, split among worker processes with
+`-j`. Survivors of a batch are then accepted one by one against codes
+accepted in the same batch.
+
+For example, generate 6x6 bits family with minimum distance 11, like
+Tag36h11, and write `Tag36h11b.py` next to this file:
+
+    python3 TagFamilyGenerator.py -b 6 -d 11 -n 200 -c Tag36h11b -j 8
+
+Then `create_tag_family('Tag36h11b')` loads it by class name.
+"""
+
+import multiprocessing
+import optparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# =============================================================================
+# Imports
+# =============================================================================
+from cv_kits.april_tags.families.TagFamily import analysis_errors, \
+    analyze_tag_codes, code_complexity, code_rotations, \
+    min_rotation_distance, popcount64
+
+# Step of additive generator, odd, so it visits every code once per period
+_GENERATOR_STEP = 982451653
+# Number of accepted rotations compared with a candidate chunk at once
+_INDEX_CHUNK_SIZE = 1 << 14
+
+
+def far_from_index(_candidates, _index, _min_hamming):
+    """
+    :param _candidates: uint64 array with shape (n,)
+    :param _index: uint64 array of all rotations of accepted codes
+    :param _min_hamming: minimum Hamming distance
+    :return: bool array with shape (n,), True when candidate is at least
+             `_min_hamming` away from every code in `_index`
+    """
+    _far = np.ones(len(_candidates), dtype=bool)
+    for _start in range(0, len(_index), _INDEX_CHUNK_SIZE):
+        if not _far.any():
+            break
+        _chunk = _index[_start:_start + _INDEX_CHUNK_SIZE]
+        _distances = popcount64(_candidates[_far, None] ^ _chunk[None, :])
+        _far[_far] = _distances.min(axis=1) >= _min_hamming
+    return _far
+
+
+def _far_from_index_worker(_arguments):
+    return far_from_index(*_arguments)
+
+
+def default_min_complexity(_tag_bits):
+    """
+    Default minimum complexity, every code of Tag36h11 has at least 32 edges
+    and 30 of 36 bits scales to other sizes.
+    """
+    return _tag_bits * _tag_bits * 5 // 6
+
+
+def generate_tag_codes(_tag_bits, _min_hamming, _min_complexity=None,
+                       _max_codes=None, _max_candidates=None, _seed=0,
+                       _jobs=1, _batch_size=1 << 14, _progress=None):
+    """
+    Search code space for a tag family
+
+    :param _tag_bits: bits of every side, area is `_tag_bits ** 2` <= 64
+    :param _min_hamming: minimum Hamming distance over all rotations
+    :param _min_complexity: minimum `code_complexity` of every code, None
+                            means `default_min_complexity`
+    :param _max_codes: stop when this number of codes is found, None means
+                       no limit
+    :param _max_candidates: stop after visiting this number of candidates,
+                            None means the whole code space
+    :param _seed: first candidate of additive generator
+    :param _jobs: worker processes for index check, 1 means no process
+    :param _batch_size: candidates filtered together
+    :param _progress: callable of (visited candidates, accepted codes), called
+                      after every batch
+    :return: list of int codes in accepted order
+    """
+    _area = _tag_bits * _tag_bits
+    if _area > 64:
+        raise ValueError('Tag family with {} bits is more than 64 bits'
+                         .format(_area))
+    if _min_complexity is None:
+        _min_complexity = default_min_complexity(_tag_bits)
+    _space = 1 << _area
+    _mask = np.uint64(_space - 1)
+    _step = np.uint64((_GENERATOR_STEP % _space) | 1)
+    _total = _space if _max_candidates is None else \
+        min(_space, _max_candidates)
+    _value = np.uint64(_seed % _space)
+    _accepted = []
+    _index = np.empty(0, dtype=np.uint64)
+    _visited = 0
+    _pool = multiprocessing.Pool(_jobs) if _jobs > 1 else None
+    try:
+        while _visited < _total and \
+                (_max_codes is None or len(_accepted) < _max_codes):
+            _count = min(_batch_size, _total - _visited)
+            # uint64 arithmetic wraps modulo 2 ** 64, then mask to area
+            _offsets = np.arange(1, _count + 1, dtype=np.uint64)
+            _candidates = (_value + _step * _offsets) & _mask
+            _value = _candidates[-1]
+            _visited += _count
+            _candidates = _candidates[code_complexity(
+                _candidates, _tag_bits) >= _min_complexity]
+            _candidates = _candidates[min_rotation_distance(
+                _candidates, _tag_bits) >= _min_hamming]
+            if len(_index) and len(_candidates):
+                if _pool is None:
+                    _far = far_from_index(_candidates, _index, _min_hamming)
+                else:
+                    _parts = np.array_split(_candidates, _jobs)
+                    _far = np.concatenate(_pool.map(
+                        _far_from_index_worker,
+                        [(_part, _index, _min_hamming) for _part in _parts]))
+                _candidates = _candidates[_far]
+            # Survivors may still be close to each other
+            _batch_index = np.empty(0, dtype=np.uint64)
+            for _candidate in _candidates:
+                if len(_batch_index) and popcount64(
+                        _candidate ^ _batch_index).min() < _min_hamming:
+                    continue
+                _accepted.append(int(_candidate))
+                _batch_index = np.concatenate([_batch_index, code_rotations(
+                    _candidate[None], _tag_bits)[:, 0]])
+                if _max_codes is not None and len(_accepted) >= _max_codes:
+                    break
+            _index = np.concatenate([_index, _batch_index])
+            if _progress is not None:
+                _progress(_visited, len(_accepted))
+    finally:
+        if _pool is not None:
+            _pool.close()
+            _pool.join()
+    return _accepted
+
+
+def check_tag_codes(_codes, _tag_bits, _min_hamming, _min_complexity=0):
+    """
+    Check family properties of codes, used to verify generated or existing
+    families, for example `check_tag_codes(Tag36h11().tagCodes, 6, 11)`.
+
+    :return: list of error strings, empty when all properties hold
+    """
+    return analysis_errors(analyze_tag_codes(
+        _codes, _tag_bits, _min_hamming, _min_complexity))
+
+
+def write_tag_family_module(_file_path, _class_name, _family_name, _area,
+                            _codes):
+    """
+    Write `TagFamily` subclass file in the same format as `Tag36h11.py`
+
+    :param _file_path: output .py path
+    :param _class_name: class name, should be the same as module name
+    :param _family_name: `TagFamily.name`, like 't36h11'
+    :param _area: bits of code
+    :param _codes: list of int codes
+    :return: None
+    """
+    _digits = (_area + 3) // 4
+    _call = '  TagFamily.__init__('
+    # Code list starts under the first argument, continuation lines are
+    # aligned after its opening bracket
+    _list_indent = ' ' * len(_call)
+    _indent = _list_indent + ' '
+    _lines = []
+    for _start in range(0, len(_codes), 4):
+        _lines.append(', '.join('0x{:0{}x}'.format(_code, _digits)
+                                for _code in _codes[_start:_start + 4]))
+    _code_text = (',\n' + _indent).join(_lines)
+    with open(_file_path, 'w') as _fp:
+        _fp.write('#!/usr/bin/env python3\n'
+                  '# -*- coding: utf-8 -*-\n'
+                  '# ' + '=' * 77 + '\n'
+                  '# Created By  : TagFamilyGenerator.py\n'
+                  '# Created Date: {}\n'.format(time.strftime('%Y-%m-%d')) +
+                  '# ' + '=' * 77 + '\n\n'
+                  'from .TagFamily import TagFamily\n\n\n'
+                  'class {}(TagFamily):\n\n'.format(_class_name) +
+                  ' def __init__(self):\n' +
+                  _call + 'self, {!r}, {},\n'.format(_family_name, _area) +
+                  _list_indent + '[' + _code_text + '])\n')
+
+
+if __name__ == '__main__':
+    global_options = optparse.OptionParser(
+        usage='Generate tag family code table', version='%prog 1.0')
+    global_options.add_option('-b', '--bits', action='store', type='int',
+                              dest='tag_bits', default=6,
+                              help='Bits of every side, default is 6')
+    global_options.add_option('-d', '--distance', action='store', type='int',
+                              dest='min_hamming', default=11,
+                              help='Minimum Hamming distance, default is 11')
+    global_options.add_option('-m', '--complexity', action='store',
+                              type='int', dest='min_complexity', default=-1,
+                              help='Minimum code complexity, default is 5/6 '
+                                   'of bits')
+    global_options.add_option('-n', '--num', action='store', type='int',
+                              dest='max_codes', default=0,
+                              help='Stop after finding this number of codes, '
+                                   'default is no limit')
+    global_options.add_option('--candidates', action='store', type='int',
+                              dest='max_candidates', default=0,
+                              help='Stop after visiting this number of '
+                                   'candidates, default is whole code space')
+    global_options.add_option('--seed', action='store', type='int',
+                              dest='seed', default=0,
+                              help='First candidate, default is 0')
+    global_options.add_option('-j', '--jobs', action='store', type='int',
+                              dest='jobs', default=1,
+                              help='Worker processes, default is 1')
+    global_options.add_option('-c', '--class', action='store', type='string',
+                              dest='class_name', default='',
+                              help='Class name of new family, default is '
+                                   'Tag<area>h<distance>')
+    global_options.add_option('-o', '--output', action='store', type='string',
+                              dest='output_folder',
+                              default=os.path.dirname(
+                                  os.path.abspath(__file__)),
+                              help='Output folder, default is families '
+                                   'folder')
+    (options, args) = global_options.parse_args()
+
+    area = options.tag_bits * options.tag_bits
+    if options.min_complexity < 0:
+        options.min_complexity = default_min_complexity(options.tag_bits)
+    class_name = options.class_name or 'Tag{}h{}'.format(
+        area, options.min_hamming)
+    family_name = 't{}h{}'.format(area, options.min_hamming)
+    start = time.perf_counter()
+
+    def print_progress(_visited, _accepted):
+        sys.stdout.write('\r{} candidates, {} codes, {:.1f} s'.format(
+            _visited, _accepted, time.perf_counter() - start))
+        sys.stdout.flush()
+
+    try:
+        codes = generate_tag_codes(
+            options.tag_bits, options.min_hamming, options.min_complexity,
+            options.max_codes or None, options.max_candidates or None,
+            options.seed, options.jobs, _progress=print_progress)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    print('')
+    errors = check_tag_codes(codes, options.tag_bits, options.min_hamming,
+                             options.min_complexity)
+    if errors:
+        print('Generated family is invalid: {}'.format('; '.join(errors)))
+        sys.exit(1)
+    file_path = os.path.join(options.output_folder, class_name + '.py')
+    write_tag_family_module(file_path, class_name, family_name, area, codes)
+    print('Write {} codes of {} to {}'.format(len(codes), family_name,
+                                              file_path))
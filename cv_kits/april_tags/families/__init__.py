@@ -1,4 +1,39 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-__all__ = ['TagFamily', 'Tag36h11']
+import importlib
+
+from .TagFamily import TagFamily
+from .Tag36h11 import Tag36h11
+
+__all__ = ['TagFamily', 'Tag36h11', 'TAG_FAMILIES', 'create_tag_family']
+
+# Key is `TagFamily.name` or class name, value is `TagFamily` subclass
+TAG_FAMILIES = {
+    't36h11': Tag36h11,
+    'Tag36h11': Tag36h11,
+}
+
+
+def create_tag_family(_name):
+    """
+    Create tag family by name
+
+    Families written by `TagFamilyGenerator.py` are loaded from module of the
+    same name as their class, like 'Tag36h11b' from `Tag36h11b.py`.
+
+    :param _name: family name like 't36h11' or class name like 'Tag36h11'
+    :return: `TagFamily` instance
+    """
+    if _name not in TAG_FAMILIES and _name.isidentifier():
+        try:
+            _module = importlib.import_module('.' + _name, __name__)
+        except ImportError:
+            _module = None
+        _class = getattr(_module, _name, None)
+        if isinstance(_class, type) and issubclass(_class, TagFamily):
+            TAG_FAMILIES[_name] = _class
+    if _name not in TAG_FAMILIES:
+        raise ValueError('Unknown tag family {}, known families are {}'
+                         .format(_name, ', '.join(sorted(TAG_FAMILIES))))
+    return TAG_FAMILIES[_name]()
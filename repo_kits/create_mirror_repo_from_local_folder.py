@@ -22,19 +22,44 @@
 #              a. Use list instead of dictionary. So the final <project> node order in mirror manifest is the same as ori one.
 #              b. If some project path do not exist, remove them from manifest.xml
 # Version: 1.3 2019-4-20 Fix bug when there is <include> node in manifest.xml
-
-
+# Version: 1.4 2026-10-17 Load manifest by shared `repo_manifest.py`. Include graph is parsed once and cached,
+#                         <remove-project> and <extend-project> nodes are supported.
+# Version: 1.5 2026-10-17 Take <project> nodes with child nodes from the loaded manifest instead of parsing ori
+#                         manifest again, <project> nodes in include files and moved by `dest-path` are found too.
+# Version: 1.6 2026-10-17 Use ordered dictionary of project path and name instead of two lists, so the final <project>
+#                         node order is still the same as ori one. Check project folders with one `os.scandir` per
+#                         parent folder.
+# Version: 1.7 2026-10-17 Add `-j` and `-i` options. Bare repositories are created by a thread pool, `.git` copies are
+#                         limited by `-i`, progress and throughput are printed for every project.
+#                         Commands run with `git -C` or `cwd` instead of `os.chdir`.
+# Version: 1.8 2026-10-17 Add `-s` option. `link` and `reflink` share pack files and loose objects with working
+#                         repository instead of `cp -rL`, only refs, config, HEAD and other metadata are copied.
+#                         Files are copied when hardlink or reflink is not supported.
+
+
+import collections
+import concurrent.futures
+import contextlib
+import fcntl
 import optparse
 import os
+import shutil
+import string
 import subprocess
 import sys
+import threading
+import time
 import xml.etree.ElementTree as ET
 
 from xml.dom import minidom
 
+# Shared manifest loader is in `repo_kits` package, make it importable when running this file directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from repo_kits.repo_manifest import load_manifest  # noqa: E402
+
 global_options = optparse.OptionParser(
     usage="create_mirror_repo_from_local_folder COMMAND [ARGS]"
-    , version="%prog 1.3")
+    , version="%prog 1.8")
 global_options.add_option('-b', '--base', action='store', type='string',
                           dest='base_folder', default='',
                           help='base repo folder, default is ./base_repo')
@@ -47,6 +72,21 @@ global_options.add_option('-r', '--remote', action='store', type='string',
 global_options.add_option('-c', '--cull', action='store', type='string',
                           dest='cull_prefix', default='',
                           help='cull project name prefix in manifest.xml, default cull nothing')
+global_options.add_option('-j', '--jobs', action='store', type='int',
+                          dest='jobs', default=1,
+                          help='number of projects handled concurrently, default is 1')
+global_options.add_option('-i', '--io_jobs', action='store', type='int',
+                          dest='io_jobs', default=4,
+                          help='max number of .git folders copied concurrently, default is 4')
+global_options.add_option('-s', '--share', action='store', type='choice',
+                          choices=['copy', 'link', 'reflink'], dest='share_mode', default='copy',
+                          help='copy: cp -rL .git folder; link/reflink: hardlink/reflink objects and packs, '
+                               'copy refs and config, default is copy')
+
+# Pack files which git never changes after written, `.keep` and `.promisor` may be removed, so they are copied
+IMMUTABLE_PACK_EXTENSIONS = ('.pack', '.idx', '.rev', '.bitmap')
+# `ioctl` request of Linux to clone file, see `man ioctl_ficlone`
+FICLONE = 0x40049409
 
 global_default_git_user_name = 'willie'
 global_default_git_user_email = 'xieweikol@gmail.com'
@@ -61,78 +101,225 @@ def is_empty(s):
     return (s is None) or (s == "")
 
 
-def parse_manifest_xml(out_project_path, out_project_name, repo_base_directory,
-                       manifest_folder, manifest_name,
-                       project_name_prefix_cull=''):
+def existing_project_paths(repo_base_directory, project_paths):
+    """
+    Check which project folders exist with one ``os.scandir`` per parent folder, instead of one
+    ``os.path.isdir`` per project.\n
+    :param repo_base_directory: input repo directory path
+    :param project_paths: relative project paths
+    :return: set of paths whose folder exists
+    """
+    paths_by_parent = {}
+    for path in project_paths:
+        parent, base_name = os.path.split(path.rstrip('/'))
+        paths_by_parent.setdefault(parent, []).append((base_name, path))
+
+    existing_paths = set()
+    for parent, children in paths_by_parent.items():
+        try:
+            with os.scandir(os.path.join(repo_base_directory, parent)) as entries:
+                # ``DirEntry.is_dir()`` follows symbolic link, the same as ``os.path.isdir()``
+                folder_names = {entry.name for entry in entries if entry.is_dir()}
+        except OSError:
+            # Parent folder does not exist
+            continue
+        for base_name, path in children:
+            if base_name in folder_names:
+                existing_paths.add(path)
+    return existing_paths
+
+
+def parse_manifest_xml(repo_base_directory, manifest_folder, manifest_name, project_name_prefix_cull=''):
     """
-    Parse .repo/manifest.xml, and find all <project> node save to path list and name list\n
-    If there is <include> node, load the include manifest file\n
-    :param out_project_path: output project path list
-    :param out_project_name: output project name list
+    Parse .repo/manifest.xml, and find all <project> node whose folder exists\n
+    <include> nodes are loaded by ``repo_manifest.load_manifest()``, which parses the whole include graph once\n
     :param repo_base_directory: input repo directory path
     :param manifest_folder: input path of `.repo/manifests/`
     :param manifest_name: input manifest xml name
     :param project_name_prefix_cull: <project> node `name` attribute prefix to cull
-    :return: None
+    :return: (project_dict, manifest)
+             project_dict is ordered dictionary, key is project path, value is project name. Order is the same as
+             ori manifest.
+             manifest is ``repo_manifest.Manifest`` of all projects, for ``generate_manifest()``
     """
     print(
         '\nstart parse_manifest_xml manifest_folder={}, manifest_name={}'.format(
             manifest_folder, manifest_name))
-    if not manifest_folder.endswith('/'):
-        manifest_folder = manifest_folder + '/'
-    manifest_xml_path = manifest_folder + manifest_name
-    tree = ET.parse(manifest_xml_path)
-    root = tree.getroot()
-
-    # Add all project list in <project> node, save to out_dict
-    # when meet two <project> nodes with same `path` attribute, the latter one will cover the former
-    for project in root.findall("./project"):
-        name = project.get('name')
+    manifest = load_manifest(os.path.join(manifest_folder, manifest_name))
+
+    # Add all project list in <project> node, save to project_dict
+    # when meet two <project> nodes with same `path` attribute, the latter one covers the former but keeps its position
+    project_dict = collections.OrderedDict()
+    for project in manifest.projects:
         # Use substring without `project_name_prefix_cull`
-        name = name[len(project_name_prefix_cull):]
-        path = project.get('path')
+        name = project.name[len(project_name_prefix_cull):]
         # If there is no `path` attribute, set path=name
-        if is_empty(path):
-            path = name
-        project_full_path = repo_base_directory + path
-        if not os.path.isdir(project_full_path):
-            print('Skip add project: {} for it does NOT exist'.format(
-                project_full_path))
-            continue
+        path = project.attrib.get('path') or name
+        if path in project_dict:
+            print('Update project name={}, path={}'.format(name, path))
+        project_dict[path] = name
+
+    # If some project path do not exist, remove them
+    existing_paths = existing_project_paths(repo_base_directory, project_dict.keys())
+    for path in list(project_dict.keys()):
+        if path not in existing_paths:
+            print('Skip add project: {} for it does NOT exist'.format(repo_base_directory + path))
+            del project_dict[path]
+    return project_dict, manifest
+
+
+class MirrorProgress(object):
+    """
+    Thread-safe progress and throughput report of bare repository creation
+    """
+
+    def __init__(self, total_count):
+        self.total_count = total_count
+        self.done_count = 0
+        self.failed_names = []
+        self.total_bytes = 0
+        self.start_time = time.time()
+        self.lock = threading.Lock()
+
+    def finish(self, project_name, project_bytes, is_ok):
+        """
+        Record one finished project and print progress line
+        :return: None
+        """
+        with self.lock:
+            self.done_count = self.done_count + 1
+            self.total_bytes = self.total_bytes + project_bytes
+            if not is_ok:
+                self.failed_names.append(project_name)
+            elapsed = max(time.time() - self.start_time, 1e-6)
+            eta = elapsed / self.done_count * (self.total_count - self.done_count)
+            print('[{}/{}] {} {:.1f} MB, total {:.1f} MB, {:.1f} MB/s, {:.1f} projects/s, ETA {:.0f} s{}'.format(
+                self.done_count, self.total_count, project_name, project_bytes / 1e6, self.total_bytes / 1e6,
+                self.total_bytes / 1e6 / elapsed, self.done_count / elapsed, eta, '' if is_ok else ' FAILED'))
+
+    def summary(self):
+        """
+        :return: summary string
+        """
+        elapsed = max(time.time() - self.start_time, 1e-6)
+        text = 'Created {} bare repositories, {:.1f} MB in {:.1f} s, {:.1f} MB/s'.format(
+            self.done_count, self.total_bytes / 1e6, elapsed, self.total_bytes / 1e6 / elapsed)
+        if self.failed_names:
+            text = text + '\n{} projects FAILED: {}'.format(len(self.failed_names), ', '.join(self.failed_names))
+        return text
+
+
+def folder_size(folder_path):
+    """
+    :return: total bytes of regular files under folder_path, symbolic links are not followed
+    """
+    total_bytes = 0
+    for dir_path, dir_names, file_names in os.walk(folder_path):
+        for file_name in file_names:
+            try:
+                total_bytes = total_bytes + os.lstat(os.path.join(dir_path, file_name)).st_size
+            except OSError:
+                pass
+    return total_bytes
+
+
+def is_immutable_git_file(relative_path):
+    """
+    Check whether file under `.git` is never changed after written by git, so it can be shared by hardlink.\n
+    They are pack files and loose objects. Refs, config, HEAD, index, hooks and `objects/info/*` are mutable.\n
+    :param relative_path: path relative to `.git` folder, separated by `/`
+    :return: True if immutable
+    """
+    parts = relative_path.split('/')
+    if len(parts) != 3 or 'objects' != parts[0]:
+        return False
+    if 'pack' == parts[1]:
+        return os.path.splitext(parts[2])[1] in IMMUTABLE_PACK_EXTENSIONS
+    # Loose object `objects/xx/<38 hex>`
+    return 2 == len(parts[1]) and all(c in string.hexdigits for c in parts[1] + parts[2])
+
+
+def reflink_file(src_path, dest_path):
+    """
+    Clone file with `FICLONE` ioctl, data blocks are shared until one file is written (btrfs, xfs, ...)\n
+    :return: None, raise OSError if file system does not support it
+    """
+    with open(src_path, 'rb') as src_file, open(dest_path, 'wb') as dest_file:
+        fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+    shutil.copystat(src_path, dest_path)
 
-        # print('Add project name={}, path={}'.format(name, path))
-        if path in out_project_path:
-            # Update value in out_project_name list
-            path_idx = out_project_path.index(path)
-            old_name = out_project_name[path_idx]
-            out_project_name[path_idx] = name
-            print('Update project name={}, path={}'.format(
-                out_project_name[path_idx], path))
+
+def share_file(src_path, dest_path, share_mode):
+    """
+    Hardlink or reflink file, copy it if file system does not support it, for example across file systems.\n
+    :param share_mode: 'link' or 'reflink'
+    :return: True if shared, False if copied
+    """
+    try:
+        if 'link' == share_mode:
+            os.link(src_path, dest_path)
         else:
-            out_project_path.append(path)
-            out_project_name.append(name)
-            print('Add project name={}, path={}'.format(name, path))
+            reflink_file(src_path, dest_path)
+        return True
+    except OSError:
+        if os.path.lexists(dest_path):
+            os.remove(dest_path)
+    shutil.copy2(src_path, dest_path)
+    return False
 
-    # Thirdly check include node
-    for manifest in root.findall("./include"):
-        include_xml_name = manifest.get('name')
-        print(
-            '\nAdd include manifest manifest_folder={}, include_xml_name={}'.format(
-                manifest_folder, include_xml_name))
-        parse_manifest_xml(out_project_path, out_project_name,
-                           repo_base_directory, manifest_folder,
-                           include_xml_name,
-                           project_name_prefix_cull)
+
+def share_git_folder(project_git_path, dest_project_path, share_mode):
+    """
+    Build bare repository folder from working `.git` folder like `cp -rL`, but share immutable objects with
+    hardlink or reflink, and copy only mutable metadata.\n
+    Symbolic links in `.git`, which point to `.repo/projects` and `.repo/project-objects`, are followed.\n
+    :param project_git_path: working project `.git` folder
+    :param dest_project_path: destination bare repository folder
+    :param share_mode: 'link' or 'reflink'
+    :return: (number of shared files, number of copied files)
+    """
+    shared_count = 0
+    copied_count = 0
+    visited_folders = set()
+    for dir_path, dir_names, file_names in os.walk(project_git_path, followlinks=True):
+        real_dir_path = os.path.realpath(dir_path)
+        if real_dir_path in visited_folders:
+            # Symbolic link loop
+            dir_names[:] = []
+            continue
+        visited_folders.add(real_dir_path)
+        relative_dir = os.path.relpath(dir_path, project_git_path)
+        dest_dir = os.path.normpath(os.path.join(dest_project_path, relative_dir))
+        os.makedirs(dest_dir, exist_ok=True)
+        for file_name in file_names:
+            # Follow symbolic link, the same as `cp -L`
+            src_path = os.path.realpath(os.path.join(dir_path, file_name))
+            if not os.path.isfile(src_path):
+                continue
+            dest_path = os.path.join(dest_dir, file_name)
+            relative_path = os.path.normpath(os.path.join(relative_dir, file_name)).replace(os.sep, '/')
+            if is_immutable_git_file(relative_path) and share_file(src_path, dest_path, share_mode):
+                shared_count = shared_count + 1
+            else:
+                if not os.path.exists(dest_path):
+                    shutil.copy2(src_path, dest_path)
+                copied_count = copied_count + 1
+    return shared_count, copied_count
 
 
 def handle_single_repository(base_repo_path, mirror_repo_path, project_name,
-                             project_path):
+                             project_path, io_semaphore=None, progress=None, share_mode='copy'):
     """
-    create project bare repository from working folder `.git` folder
+    create project bare repository from working folder `.git` folder\n
+    Every command runs with ``git -C`` or ``cwd``, current folder is never changed, so several projects can be
+    handled at the same time.\n
     :param base_repo_path: base repo path
     :param mirror_repo_path: destination repo path
     :param project_name: project destination relative path under mirror_repo_path
     :param project_path: project ori relative path under base_repo_path
+    :param io_semaphore: semaphore to limit how many `.git` folders are copied at the same time, None means no limit
+    :param progress: ``MirrorProgress`` to report, None means no report
+    :param share_mode: 'copy' runs `cp -rL`, 'link' and 'reflink' share objects by ``share_git_folder()``
     :return: None
     """
 
@@ -140,46 +327,89 @@ def handle_single_repository(base_repo_path, mirror_repo_path, project_name,
     project_git_path = full_project_path + "/.git"
     dest_project_path = mirror_repo_path + project_name + ".git"
     dest_project_parent_path = os.path.dirname(dest_project_path)
-    if not os.path.isdir(dest_project_parent_path):
-        os.makedirs(dest_project_parent_path)
+    # Other workers may create the same parent folder at the same time
+    os.makedirs(dest_project_parent_path, exist_ok=True)
 
-    # Before copying `.git` folder in working repository, enter working project, and try to create new branch `master`
+    # Before copying `.git` folder in working repository, try to create new branch `master` in working project
     # If there is no master branch, after mirror repo is created, and when others try to fetch this repo,
     # `repo sync` operation will be failed for `Couldn't find remote ref refs/heads/master`
-    os.chdir(full_project_path)
 
     # Since `git checkout -b master` may failed for `master` branch existed, Here use `subprocess.run` hide output
     # information.
     # os.system('git checkout -b master')
-    subprocess.run(['git', 'checkout', '-b', 'master'],
+    subprocess.run(['git', '-C', full_project_path, 'checkout', '-b', 'master'],
                    stdout=subprocess.DEVNULL,
                    stderr=subprocess.DEVNULL)
 
     # *Note* here must add `-L` option for `cp` command, so source file instead of symbolic file can be copied.
     # Use `subprocess.run` instead of `os.system` since in `subprocess.run`, I can hide output information.
     # os.system('cp -rL {} {}'.format(project_git_path, dest_project_path))
-    subprocess.run(['cp', '-rL', project_git_path, dest_project_path],
-                   stdout=subprocess.DEVNULL,
-                   stderr=subprocess.DEVNULL)
-    # enter dest_project_path
-    os.chdir(dest_project_path)
+    # Copying is limited by disk, too many copies at the same time only make disk seek more.
+    is_copied = True
+    with io_semaphore or contextlib.nullcontext():
+        if 'copy' == share_mode:
+            is_copied = 0 == subprocess.run(['cp', '-rL', project_git_path, dest_project_path],
+                                            stdout=subprocess.DEVNULL,
+                                            stderr=subprocess.DEVNULL).returncode
+        else:
+            try:
+                shared_count, copied_count = share_git_folder(project_git_path, dest_project_path, share_mode)
+                print('{}: {} files shared by {}, {} files copied'.format(project_name, shared_count, share_mode,
+                                                                          copied_count))
+            except OSError as error:
+                print('Share {} failed: {}'.format(project_git_path, error))
+                is_copied = False
     # make this project to be bare repository
-    os.system('git config --bool core.bare true')
+    config_result = subprocess.run(['git', 'config', '--file', dest_project_path + '/config', '--bool', 'core.bare',
+                                    'true'])
 
     print("finish processing {}\n".format(dest_project_path))
+    if progress is not None:
+        progress.finish(project_name, folder_size(dest_project_path), is_copied and 0 == config_result.returncode)
 
 
-def generate_manifest(mirror_repo_path, ori_manifest_path, project_path_list,
-                      project_name_list, remote_name,
+def create_all_repositories(base_repo_path, mirror_repo_path, project_dict, jobs=1, io_jobs=4, share_mode='copy'):
+    """
+    Create bare repositories of all projects, ``jobs`` projects at the same time.\n
+    :param base_repo_path: base repo path
+    :param mirror_repo_path: destination repo path
+    :param project_dict: ordered dictionary of project path and name from ``parse_manifest_xml``
+    :param jobs: number of worker threads, 1 means handling projects one by one
+    :param io_jobs: max number of `.git` folders copied at the same time
+    :param share_mode: 'copy', 'link' or 'reflink', see ``handle_single_repository()``
+    :return: ``MirrorProgress``
+    """
+    progress = MirrorProgress(len(project_dict))
+    io_semaphore = threading.BoundedSemaphore(max(1, io_jobs))
+    if jobs <= 1:
+        for index, (path, name) in enumerate(project_dict.items()):
+            print('\nStart handling No.{} project {}'.format(index, name))
+            handle_single_repository(base_repo_path, mirror_repo_path, name, path, io_semaphore, progress,
+                                     share_mode)
+        return progress
+
+    # Workers spend most of time waiting for git and cp subprocesses, so threads are enough.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = []
+        for index, (path, name) in enumerate(project_dict.items()):
+            print('\nStart handling No.{} project {}'.format(index, name))
+            futures.append(executor.submit(handle_single_repository, base_repo_path, mirror_repo_path, name, path,
+                                           io_semaphore, progress, share_mode))
+        for future in concurrent.futures.as_completed(futures):
+            # Raise exception of worker
+            future.result()
+    return progress
+
+
+def generate_manifest(mirror_repo_path, manifest, project_dict, remote_name,
                       project_name_prefix_cull):
     """
     Create New manifest.xml based on the original one.\n
     Then create working manifests git repository.\n
     Finally create bare manifests repository\n
     :param mirror_repo_path: mirror repo folder path
-    :param ori_manifest_path: original repo folder manifest.xml
-    :param project_path_list: project path list from ``parse_manifest_xml``
-    :param project_name_list: project name list from ``parse_manifest_xml``
+    :param manifest: ``repo_manifest.Manifest`` of original repo folder manifest.xml, from ``parse_manifest_xml``
+    :param project_dict: ordered dictionary of project path and name from ``parse_manifest_xml``
     :param remote_name: <remote> node name in newly created manifest.xml
     :param project_name_prefix_cull: <project> node `name` attribute prefix to cull
     :return: created bare manifests git path
@@ -190,22 +420,19 @@ def generate_manifest(mirror_repo_path, ori_manifest_path, project_path_list,
         '\ngenerate_manifest start manifests_work_folder_path={}\ndest_manifest_xml_path={}'.format(
             manifests_work_folder_path, dest_manifest_xml_path))
     os.makedirs(manifests_work_folder_path)
-    os.chdir(manifests_work_folder_path)
 
     # Save <project> node which has child node to dictionary
+    # Take them from the loaded manifest instead of parsing ori manifest again, so <remove-project> and
+    # <extend-project> are applied the same way as ``parse_manifest_xml``.
     project_with_child_dict = {}
-    # Check ori tree, Find all <project> node that have child node.
-    ori_tree = ET.parse(ori_manifest_path)
-    ori_root = ori_tree.getroot()
-    for project_node in ori_root.findall(".//project/*/.."):
-        ori_name = project_node.get('name')
-        ori_name = ori_name[len(project_name_prefix_cull):]
-        ori_path = project_node.get('path')
+    for project in manifest.projects_with_children():
+        ori_name = project.name[len(project_name_prefix_cull):]
+        ori_path = project.attrib.get('path')
         # If there is no `path` attribute, set path=name
         if (ori_path is None) or (ori_path == ""):
             ori_path = ori_name
-        # Key is project path, value is project node
-        project_with_child_dict[ori_path] = project_node
+        # Key is project path, value is project record
+        project_with_child_dict[ori_path] = project
 
     # Create manifest.xml
     mirror_root = ET.Element('manifest')
@@ -221,21 +448,21 @@ def generate_manifest(mirror_repo_path, ori_manifest_path, project_path_list,
     mirror_default_node.set('remote', remote_name)
     mirror_default_node.set('revision', 'master')
 
-    for path, name in zip(project_path_list, project_name_list):
+    for path, name in project_dict.items():
         if path in project_with_child_dict:
-            # If current <project> path is in project_with_child_dict, use it
-            project_node = project_with_child_dict[path]
+            # If current <project> path is in project_with_child_dict, copy its attributes and child nodes
+            project = project_with_child_dict[path]
+            attrib = dict(project.attrib)
             # Remove `upstream` and `revision` attributes
-            try:
-                del project_node.attrib['upstream']
-                del project_node.attrib['revision']
-            except KeyError:
-                pass
+            attrib.pop('upstream', None)
+            attrib.pop('revision', None)
             # Update `name` and `path` attributes.
-            project_node.set('name', name)
-            project_node.set('path', path)
+            attrib['name'] = name
+            attrib['path'] = path
             # Append node to manifest root node.
-            mirror_root.append(project_node)
+            project_node = ET.SubElement(mirror_root, 'project', attrib)
+            for child_tag, child_attrib in project.children:
+                ET.SubElement(project_node, child_tag, child_attrib)
         else:
             mirror_project_node = ET.SubElement(mirror_root, 'project')
             mirror_project_node.set('name', name)
@@ -251,9 +478,9 @@ def generate_manifest(mirror_repo_path, ori_manifest_path, project_path_list,
     with open(dest_manifest_xml_path, "w") as f:
         f.write(str_manifest_xml)
 
-    os.system('git init')
-    os.system('git add -A')
-    os.system('git commit -m "Init the manifests repository"')
+    subprocess.run(['git', 'init'], cwd=manifests_work_folder_path)
+    subprocess.run(['git', 'add', '-A'], cwd=manifests_work_folder_path)
+    subprocess.run(['git', 'commit', '-m', 'Init the manifests repository'], cwd=manifests_work_folder_path)
     work_manifests_git_folder_path = manifests_work_folder_path + "/.git"
     bare_manifests_folder_path = mirror_repo_path + 'platform/manifests.git'
     bare_manifests_parent_folder_path = os.path.dirname(
@@ -264,10 +491,8 @@ def generate_manifest(mirror_repo_path, ori_manifest_path, project_path_list,
     subprocess.run(['cp', '-rL', work_manifests_git_folder_path,
                     bare_manifests_folder_path], stdout=subprocess.DEVNULL,
                    stderr=subprocess.DEVNULL)
-    # enter dest_project_path
-    os.chdir(bare_manifests_folder_path)
     # make this project to be bare repository
-    os.system('git config --bool core.bare true')
+    subprocess.run(['git', 'config', '--file', bare_manifests_folder_path + '/config', '--bool', 'core.bare', 'true'])
 
     print(
         '\ngenerate_manifest done. You can sync this mirror repo with the following command:\nrepo init -u {}\nrepo sync -c -j4\n'.format(
@@ -361,28 +586,22 @@ if __name__ == '__main__':
         'Start parsing manifest folder={}, name={}'.format(manifest_xml_folder,
                                                            manifest_xml_name))
 
-    project_path_list = []
-    project_name_list = []
-    parse_manifest_xml(project_path_list, project_name_list,
-                       repo_base_directory, manifest_xml_folder,
-                       manifest_xml_name,
-                       project_name_prefix_cull)
+    project_dict, source_manifest = parse_manifest_xml(repo_base_directory, manifest_xml_folder, manifest_xml_name,
+                                                       project_name_prefix_cull)
     print(
-        'There are {} projects to be created\n'.format(len(project_path_list)))
+        'There are {} projects to be created\n'.format(len(project_dict)))
 
     # Fourthly generate bare repository in repo_mirror_directory
-    print('\nStep 4 : create all projects bare git repository')
-    index = 0
-    for path, name in zip(project_path_list, project_name_list):
-        print('\nStart handling No.{} project {}'.format(index, name))
-        handle_single_repository(repo_base_directory, repo_mirror_directory,
-                                 name, path)
-        index = index + 1
+    print('\nStep 4 : create all projects bare git repository with {} jobs, {} copies at the same time'.format(
+        options.jobs, min(options.jobs, options.io_jobs)))
+    mirror_progress = create_all_repositories(repo_base_directory, repo_mirror_directory, project_dict, options.jobs,
+                                              options.io_jobs, options.share_mode)
+    print('\n' + mirror_progress.summary())
 
     # Fifthly generate manifest bare repository
     print('\nStep 5 : generate platform/manifests.git')
-    generate_manifest(repo_mirror_directory, source_manifest_xml_path,
-                      project_path_list, project_name_list,
-                      repo_remote_name, project_name_prefix_cull)
+    generate_manifest(repo_mirror_directory, source_manifest,
+                      project_dict, repo_remote_name,
+                      project_name_prefix_cull)
 
     print('Mission Complete!')
@@ -35,17 +35,43 @@
 #              d. When branch_name is empty, use <default> node `revision` attribute.
 # Version 1.5 2019-4-12 When make patch for only one project, `-d` option and `-m` can be omitted.
 # Version 1.6 2019-4-18 Add `-c` option. It is used to make new old patch for single commit id with selected project.
-
+# Version 1.7 2026-10-17 Add `-j` option. It is used to make new old patches of several projects concurrently.
+#                        Git commands run with `git -C` instead of `os.chdir`, so workers do not share current folder.
+#                        Log of every project is collected in memory and written in project order.
+# Version 1.8 2026-10-17 Find new commit of every project with a single `git log` of remote branch before making
+#                        patch, skip projects without new commit. No more `git stash` and `git checkout -b`.
+# Version 1.9 2026-10-17 Read changed files of both commits from one `git cat-file --batch` process per project
+#                        instead of `git archive | tar xf -`.
+# Version 2.0 2026-10-17 Add `-i` option. Commits and blob ids of every project are saved to `out/.new_old_state.json`,
+#                        next run only extracts changed blobs and hardlinks others from last `out` folder.
+# Version 2.1 2026-10-17 Add `-z` and `-l` options. Files are written to zip file as soon as they are read, instead of
+#                        writing `out` folder and running `zip -r`.
+# Version 2.2 2026-10-17 Load manifest by shared `repo_manifest.py`. Include graph is parsed once and cached,
+#                        <remove-project> and <extend-project> nodes are supported.
+
+import concurrent.futures
 import datetime
+import io
+import json
 import optparse
 import os
+import posixpath
+import shutil
+import stat
 import subprocess
 import sys
-import xml.etree.ElementTree as ET
+import tempfile
+import threading
+import time
+import zipfile
+
+# Shared manifest loader is in `repo_kits` package, make it importable when running this file directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from repo_kits.repo_manifest import load_manifest  # noqa: E402
 
 global_options = optparse.OptionParser(
     usage="make_new_old_patches_in_repo COMMAND [ARGS]"
-    , version="%prog 1.6")
+    , version="%prog 2.2")
 global_options.add_option('-s', '--start', action='store', type='string', dest='start_time', default='',
                           help='start time, default is today 00:00')
 global_options.add_option('-e', '--end', action='store', type='string', dest='end_time', default='',
@@ -62,6 +88,23 @@ global_options.add_option('-p', '--project', action='store', type='string', dest
                           help='single project path, if empty, checking all projects')
 global_options.add_option('-c', '--commit_id', action='store', type='string', dest='commit_id', default='',
                           help='Single commit id in one project')
+global_options.add_option('-j', '--jobs', action='store', type='int', dest='jobs', default=1,
+                          help='number of projects handled concurrently, default is 1')
+global_options.add_option('-i', '--incremental', action='store_true', dest='incremental', default=False,
+                          help='only extract files whose blobs changed since last run, hardlink others from last out')
+global_options.add_option('-z', '--stream_zip', action='store_true', dest='stream_zip', default=False,
+                          help='write files to zip file directly instead of out folder, can not be used with -i')
+global_options.add_option('-l', '--level', action='store', type='int', dest='compress_level', default=6,
+                          help='compress level of -z, 0 means no compression, default is 6')
+
+# Blob modes in git tree
+EXECUTABLE_MODE = '100755'
+SYMLINK_MODE = '120000'
+GITLINK_MODE = '160000'
+# Read blob content from `git cat-file --batch` in chunks of this size
+BLOB_CHUNK_SIZE = 1 << 20
+# State of incremental run, it is in `out` folder so it always matches files in `out`
+STATE_FILE_NAME = '.new_old_state.json'
 
 
 def is_empty(s):
@@ -76,43 +119,35 @@ def is_empty(s):
 def parse_manifest_xml(out_dict, manifest_folder, manifest_name, revision_name):
     """
     Parse .repo/manifest.xml, and find all <project> node whose branch name is `branch_name`\n
-    If there is <include> node, check the include manifest file\n
+    <include> nodes are loaded by ``repo_manifest.load_manifest()``, which parses the whole include graph once\n
     :param out_dict: output dictionary. key is `project path`, value is `remote name`
     :param manifest_folder: Input folder of `.repo/manifests/` folder
     :param manifest_name: manifest xml name
     :param revision_name: <project> node `revision` attribute
     :return: <default> node `revision` attribute
     """
-    if not manifest_folder.endswith('/'):
-        manifest_folder = manifest_folder + '/'
-    manifest_xml_path = manifest_folder + manifest_name
-
-    tree = ET.parse(manifest_xml_path)
-    root = tree.getroot()
-    remote_node = root.find('./remote')
-    remote_name = remote_node.get('name')
-    print('\nstart parse_manifest_xml path={} remote_name={} revision_name={}'.format(manifest_xml_path, remote_name,
-                                                                                      revision_name))
+    manifest_xml_path = os.path.join(manifest_folder, manifest_name)
+    manifest = load_manifest(manifest_xml_path)
+    print('\nstart parse_manifest_xml path={} remote_name={} revision_name={}'.format(
+        manifest_xml_path, manifest.default_remote, revision_name))
 
     # Whether checking <project> 'revision' attribute base on input `branch_name`
     allow_null_revision = False
-    default_node_revision = ''
+    default_node_revision = manifest.default_revision or ''
     if is_empty(revision_name):
         allow_null_revision = True
-        default_node = root.find('default')
-        if default_node is None:
-            print("There is no <default> in this manifest, set default branch to be master\n")
+        if is_empty(default_node_revision):
+            print("There is no <default> revision in this manifest, set default branch to be master\n")
             default_revision_name = 'master'
         else:
-            default_revision_name = default_node.get('revision')
-            default_node_revision = default_revision_name
-            print('input branch_name is None, use <default> revision: {}\n'.format(revision_name))
+            default_revision_name = default_node_revision
+            print('input branch_name is None, use <default> revision: {}\n'.format(default_revision_name))
 
     # Add all project list in <project> node whose `revision` node is matched and save to out_dict
-    # when meet two <project> nodes with same `path` attribute, the latter one will cover the former
+    # when meet two <project> nodes with same `path` attribute, the latter one has covered the former in table
     project_count = 0
-    for project in root.findall("./project"):
-        revision = project.get('revision')
+    for project in manifest.projects:
+        revision = project.revision
         if allow_null_revision:
             # revision can either be None or the same as <default> node.
             accept_project = is_empty(revision) or (default_revision_name == revision)
@@ -122,26 +157,30 @@ def parse_manifest_xml(out_dict, manifest_folder, manifest_name, revision_name):
         if not accept_project:
             continue
 
-        name = project.get('name')
-        path = project.get('path')
-        # If there is no `path` attribute, set path=name
-        if is_empty(path):
-            path = name
-        print('Add project name={}, path={}'.format(name, path))
-        out_dict[path] = remote_name
+        print('Add project name={}, path={}'.format(project.name, project.path))
+        out_dict[project.path] = manifest.project_remote(project)
         project_count = project_count + 1
 
     if 0 == project_count:
         print('There is no matched project in: {}\n'.format(manifest_xml_path))
 
-    # Thirdly check include node
-    for manifest in root.findall("./include"):
-        include_xml_name = manifest.get('name')
-        parse_manifest_xml(out_dict, manifest_folder, include_xml_name, revision_name)
-
     return default_node_revision
 
 
+def run_git(git_project_path, git_args):
+    """
+    Run git command in git_project_path without changing current folder\n
+    :param git_project_path: full path of git project
+    :param git_args: git arguments list, without leading `git`
+    :return: stripped output of git command, None if git command failed
+    """
+    result = subprocess.run(['git', '-C', git_project_path] + git_args, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, universal_newlines=True)
+    if 0 != result.returncode:
+        return None
+    return result.stdout.strip()
+
+
 def fetch_commit_time(git_full_path, commit_id):
     """
     Find commit time of commit_id in git directory
@@ -149,9 +188,7 @@ def fetch_commit_time(git_full_path, commit_id):
     :param commit_id: CommitID to be checked
     :return: Commit time in string format
     """
-    os.chdir(git_full_path)
-    str_fetch_commit_time_cmd = 'git log --pretty="%ci" {} -1'.format(commit_id)
-    str_commit_time = os.popen(str_fetch_commit_time_cmd).read().strip()
+    str_commit_time = run_git(git_full_path, ['log', '--pretty=%ci', commit_id, '-1'])
     # Since current time is like "2019-04-08 19:30:38 +0800", Need to trim last "+0800"
     last_space_idx = str_commit_time.rindex(' ')
     trim_commit_time = str_commit_time[:last_space_idx]
@@ -187,19 +224,315 @@ def create_output_folder(base_folder_path, project_path_list):
     print('create_output_folder done successfully')
 
 
-def make_new_old(git_project_path, output_base_folder, relative_project_path, start_time, end_time, log_file,
-                 remote_name, branch_name):
+def find_new_commit(git_project_path, remote_name, branch_name, start_time, end_time):
+    """
+    Find the newest commit of remote branch in time range with a single ``git log``.\n
+    No ``git stash`` or ``git checkout`` is run, so it is cheap for projects without changes.\n
+    If remote branch does not exist, use current HEAD instead.\n
+    :param git_project_path: full path of git project.
+    :param remote_name: git remote repository name
+    :param branch_name: git branch name
+    :param start_time: the lower limit of time
+    :param end_time: the upper limit of time
+    :return: (revision, new_time_commit_id), new_time_commit_id is like "commit time_commit id",
+             it is empty when there is no commit in time range
+    """
+    # Willie note here, must not add ``--no-merges`` option.
+    log_args = ['log', '--pretty=%ci_%H', '--since={}'.format(start_time), '--before={}'.format(end_time), '-1']
+    revision = remote_name + '/' + branch_name
+    new_time_commit_id = run_git(git_project_path, log_args + [revision, '--'])
+    if new_time_commit_id is None:
+        print('{} has no remote branch {}, use HEAD'.format(git_project_path, revision))
+        revision = 'HEAD'
+        new_time_commit_id = run_git(git_project_path, log_args + [revision, '--'])
+    return revision, new_time_commit_id or ''
+
+
+def remove_project_output(output_base_folder, relative_project_path):
+    """
+    Remove out new and old folders of project which has no patch.\n
+    :return: None
+    """
+    shutil.rmtree(output_base_folder + '/out/new/' + relative_project_path, ignore_errors=True)
+    shutil.rmtree(output_base_folder + '/out/old/' + relative_project_path, ignore_errors=True)
+
+
+class CatFileBatch(object):
+    """
+    Long-lived ``git cat-file --batch`` process of one project.\n
+    Write blob id to its stdin, then read ``<id> blob <size>\\n``, content and ``\\n`` from its stdout.
+    """
+
+    def __init__(self, git_project_path):
+        self.git_project_path = git_project_path
+        # Process starts when the first blob is read, no process if all files are linked from last run
+        self.process = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self.process is None:
+            return
+        self.process.stdin.close()
+        self.process.stdout.close()
+        self.process.wait()
+
+    def read_header(self, blob_id):
+        """
+        Request blob, its content must be read by ``read_content()`` before next request.\n
+        :param blob_id: full blob id
+        :return: (blob id, type, size)
+        """
+        if self.process is None:
+            self.process = subprocess.Popen(['git', '-C', self.git_project_path, 'cat-file', '--batch'],
+                                            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.process.stdin.write(blob_id.encode() + b'\n')
+        self.process.stdin.flush()
+        header = self.process.stdout.readline().split()
+        if len(header) != 3:
+            raise ValueError('Blob {} is missing: {}'.format(blob_id, b' '.join(header).decode()))
+        return header[0].decode(), header[1].decode(), int(header[2])
+
+    def read_content(self, header, out_file=None):
+        """
+        Read content of blob requested by ``read_header()``.\n
+        :param header: result of ``read_header()``
+        :param out_file: file object opened in binary mode, content is copied to it chunk by chunk
+        :return: content in bytes if ``out_file`` is None, else size of blob
+        """
+        if out_file is None:
+            content = io.BytesIO()
+            self.read_content(header, content)
+            return content.getvalue()
+        remain = header[2]
+        while remain > 0:
+            chunk = self.process.stdout.read(min(remain, BLOB_CHUNK_SIZE))
+            if not chunk:
+                raise EOFError('git cat-file exits while reading blob {}'.format(header[0]))
+            out_file.write(chunk)
+            remain -= len(chunk)
+        # Skip the `\n` after content
+        self.process.stdout.read(1)
+        return header[2]
+
+    def write_blob(self, blob_id, out_file):
+        """
+        Copy content of blob to ``out_file`` chunk by chunk.\n
+        :param blob_id: full blob id
+        :param out_file: file object opened in binary mode
+        :return: size of blob
+        """
+        return self.read_content(self.read_header(blob_id), out_file)
+
+    def read_blob(self, blob_id):
+        """
+        :return: content of blob in bytes
+        """
+        return self.read_content(self.read_header(blob_id))
+
+
+def diff_blobs(git_project_path, old_commit_id, new_commit_id):
+    """
+    Find different files between two commits with a single ``git diff-tree``.\n
+    Renames are reported as deleted and added files, same as file list of ``git diff --name-only`` of both ways.\n
+    :return: list of (path, old_mode, old_blob, new_mode, new_blob, status), status is one letter like 'A', 'M', 'D',
+             None if git command failed, for example commit is not fetched
+    """
+    result = subprocess.run(['git', '-C', git_project_path, 'diff-tree', '-r', '-z', '--no-renames', old_commit_id,
+                             new_commit_id], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if 0 != result.returncode:
+        print('git diff-tree {} {} failed in {}: {}'.format(old_commit_id, new_commit_id, git_project_path,
+                                                            result.stderr.decode(errors='replace').strip()))
+        return None
+    # Output is like ":100644 100644 <old blob> <new blob> M\0<path>\0" for every file
+    fields = result.stdout.split(b'\0')
+    diff_entries = []
+    for meta, path in zip(fields[0::2], fields[1::2]):
+        old_mode, new_mode, old_blob, new_blob, status = meta[1:].decode().split(' ')
+        diff_entries.append((os.fsdecode(path), old_mode, old_blob, new_mode, new_blob, status[0]))
+    return diff_entries
+
+
+def extract_blobs(cat_file, file_dict, out_folder, previous_files=None):
+    """
+    Write blobs to ``out_folder``, keep relative path, executable bit and symbolic link like ``git archive``.\n
+    Submodule commits are skipped.\n
+    :param cat_file: ``CatFileBatch`` of project
+    :param file_dict: dictionary, key is file path, value is [mode, blob id]
+    :param out_folder: output folder of project
+    :param previous_files: dictionary from ``previous_blob_files()``, the same blob is hardlinked instead of
+                           extracted again
+    :return: number of hardlinked files
+    """
+    link_count = 0
+    for path, (mode, blob_id) in file_dict.items():
+        if GITLINK_MODE == mode:
+            continue
+        out_path = os.path.join(out_folder, path)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        if SYMLINK_MODE == mode:
+            os.symlink(os.fsdecode(cat_file.read_blob(blob_id)), out_path)
+            continue
+        previous_path = (previous_files or {}).get((mode, blob_id))
+        if previous_path is not None:
+            try:
+                os.link(previous_path, out_path)
+                link_count = link_count + 1
+                continue
+            except OSError:
+                # Last output is removed or on other file system, extract it again
+                pass
+        with open(out_path, 'wb') as out_file:
+            cat_file.write_blob(blob_id, out_file)
+        if EXECUTABLE_MODE == mode:
+            os.chmod(out_path, 0o755)
+    return link_count
+
+
+class PatchZipWriter(object):
+    """
+    Write blobs into zip file as soon as they are read, instead of writing ``out`` folder and running ``zip -r``.\n
+    Workers of several projects share one writer, entries are written one by one under a lock.
+    """
+
+    def __init__(self, zip_file_path, compress_level):
+        """
+        :param zip_file_path: output zip file path
+        :param compress_level: 0 means no compression, 1 ~ 9 are deflate levels
+        """
+        if 0 == compress_level:
+            self.zip_file = zipfile.ZipFile(zip_file_path, 'w', zipfile.ZIP_STORED)
+        else:
+            self.zip_file = zipfile.ZipFile(zip_file_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=compress_level)
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.zip_file.close()
+
+    def write_file(self, file_path, arc_name):
+        """
+        Add file on disk to zip file, such as log file.\n
+        :return: None
+        """
+        with self.lock:
+            self.zip_file.write(file_path, arc_name)
+
+    def write_blobs(self, cat_file, file_dict, arc_folder):
+        """
+        Add blobs to zip file with the same path, executable bit and symbolic link as ``extract_blobs()``.\n
+        :param cat_file: ``CatFileBatch`` of project
+        :param file_dict: dictionary, key is file path, value is [mode, blob id]
+        :param arc_folder: folder in zip file, such as ``out/new/<project path>``, project path may be absolute
+        :return: None
+        """
+        for path, (mode, blob_id) in file_dict.items():
+            if GITLINK_MODE == mode:
+                continue
+            # Same as path of ``zip -r out``, ``out/new//abs/project`` becomes ``out/new/abs/project``
+            arc_name = posixpath.normpath(arc_folder + '/' + path)
+            zip_info = zipfile.ZipInfo(arc_name, time.localtime()[:6])
+            zip_info.compress_type = self.zip_file.compression
+            # ``ZipFile.open()`` of large blob only reads compress level from ``ZipInfo``
+            zip_info._compresslevel = self.zip_file.compresslevel
+            if SYMLINK_MODE == mode:
+                zip_info.external_attr = (stat.S_IFLNK | 0o777) << 16
+            elif EXECUTABLE_MODE == mode:
+                zip_info.external_attr = (stat.S_IFREG | 0o755) << 16
+            else:
+                zip_info.external_attr = (stat.S_IFREG | 0o644) << 16
+            header = cat_file.read_header(blob_id)
+            if header[2] <= BLOB_CHUNK_SIZE:
+                # Small blob is read outside of lock, so other workers are not blocked by git
+                content = cat_file.read_content(header)
+                with self.lock:
+                    self.zip_file.writestr(zip_info, content)
+                continue
+            # Large blob is copied chunk by chunk, memory is bounded
+            zip_info.file_size = header[2]
+            with self.lock:
+                with self.zip_file.open(zip_info, 'w', force_zip64=True) as zip_entry:
+                    cat_file.read_content(header, zip_entry)
+
+
+def previous_blob_files(previous_entry, previous_out_folder, relative_project_path):
+    """
+    Find files of project in output of last run.\n
+    :param previous_entry: state of project in last run, see ``load_state()``
+    :param previous_out_folder: ``out`` folder of last run
+    :param relative_project_path: the relative path of project, absolute path of ``-p`` option is kept under
+                                  ``previous_out_folder`` too
+    :return: dictionary, key is (mode, blob id), value is file path in ``previous_out_folder``
+    """
+    previous_files = {}
+    if previous_entry is None:
+        return previous_files
+    previous_root = os.path.realpath(previous_out_folder)
+    for sub_folder in ('new', 'old'):
+        # Same layout as ``curr_project_out_new_full_path`` of ``make_new_old()``, ``os.path.join()`` would drop
+        # ``previous_out_folder`` for absolute project path
+        project_folder = previous_out_folder + '/' + sub_folder + '/' + relative_project_path
+        for path, (mode, blob_id) in previous_entry[sub_folder + '_files'].items():
+            previous_path = project_folder + '/' + path
+            # Never hardlink a file outside of last output, such as a file of working tree
+            if os.path.commonpath([previous_root, os.path.realpath(previous_path)]) != previous_root:
+                continue
+            previous_files[(mode, blob_id)] = previous_path
+    return previous_files
+
+
+def load_state(state_file_path):
+    """
+    Load state of last incremental run.\n
+    State is a dictionary, key is project path, value is dictionary of ``old_commit``, ``new_commit``, ``new_files``
+    and ``old_files``. ``new_files`` and ``old_files`` are dictionaries, key is file path, value is [mode, blob id].\n
+    :param state_file_path: state json file path
+    :return: state dictionary, empty if state file not exist or broken
+    """
+    try:
+        with open(state_file_path) as state_file:
+            return json.load(state_file)
+    except (OSError, ValueError):
+        print('No valid state in {}, extract all files'.format(state_file_path))
+        return {}
+
+
+def save_state(state_file_path, state):
+    """
+    Write state to temporary file, then replace ``state_file_path``, so it is never half written.\n
+    :return: None
+    """
+    state_folder = os.path.dirname(state_file_path)
+    fd, temp_path = tempfile.mkstemp(dir=state_folder, suffix='.tmp')
+    with os.fdopen(fd, 'w') as state_file:
+        json.dump(state, state_file)
+    os.replace(temp_path, state_file_path)
+
+
+def make_new_old(git_project_path, output_base_folder, relative_project_path, start_time, revision,
+                 new_time_commit_id, log_file, previous_entry=None, previous_out_folder='', zip_writer=None):
     """
     Make different files to out new and old folders.\n
     :param git_project_path: full path of git project.
     :param output_base_folder: the base output folder to place new and old files
     :param relative_project_path: the relative path of project.
     :param start_time: the lower limit of time
-    :param end_time: the upper limit of time
+    :param revision: remote branch or HEAD, from ``find_new_commit()``
+    :param new_time_commit_id: newest commit in time range, from ``find_new_commit()``
     :param log_file: log file
-    :param remote_name: git remote repository name
-    :param branch_name: git branch name
-    :return: None
+    :param previous_entry: state of this project in last run, None means extracting all files
+    :param previous_out_folder: ``out`` folder of last run
+    :param zip_writer: ``PatchZipWriter``, if not None, files are written to zip file instead of ``out`` folder
+    :return: state of this project, None if there is no patch or files are written to zip file
     """
 
     # Firstly Splice project path and output path.
@@ -207,51 +540,32 @@ def make_new_old(git_project_path, output_base_folder, relative_project_path, st
     curr_project_out_old_full_path = output_base_folder + '/out/old/' + relative_project_path
     print('\nmake_new_old start handling {}'.format(git_project_path))
 
-    # Secondly cd project folder
-    os.chdir(git_project_path)
-
-    # Thirdly make sure current project is clean and up to date
-    # Run `git stash` to clean current project.
-    subprocess.run(['git', 'stash'], stdout=subprocess.DEVNULL,
-                   stderr=subprocess.DEVNULL)
-    # Run `git checkout -b remote_name/branch_name
-    new_local_branch_name = branch_name + '_' + datetime.datetime.now().strftime('%Y%m%d__%H%M%S')
-    remote_branch_name = remote_name + '/' + branch_name
-    print('make new local branch to be {}; remote branch is {}'.format(new_local_branch_name, remote_branch_name))
-    subprocess.run(['git', 'checkout', '-b', new_local_branch_name, remote_branch_name], stdout=subprocess.DEVNULL,
-                   stderr=subprocess.DEVNULL)
-
-    # Fourthly fetch old commit-id and new commit-id.
+    # Secondly every git command runs in project folder by `git -C`, current folder is never changed,
+    # so several projects can be handled at the same time.
+    # Thirdly all commits are read from ``revision`` directly, so there is no need to run ``git stash`` and
+    # ``git checkout -b`` a new local branch.
+
+    # Fourthly fetch old commit-id.
     # Use ``"%H"`` to only show commit-id of log.
     # Use ``-1`` to show top 1 log.
-    # If either old or new commit-id not exist, rm ``out/new`` and ``out/old`` folder and return directly.
+    # If old commit-id not exist, rm ``out/new`` and ``out/old`` folder and return directly.
 
     # Willie note here, must not add ``--no-merges`` option.
     # str_fetch_old_log_cmd = 'git log --no-merges --pretty="%ci_%H" --before="{}" -1'.format(start_time)
-    str_fetch_old_log_cmd = 'git log --pretty="%ci_%H" --before="{}" -1'.format(start_time)
-    old_time_commit_id = os.popen(str_fetch_old_log_cmd).read().strip()
+    old_time_commit_id = run_git(git_project_path, ['log', '--pretty=%ci_%H', '--before={}'.format(start_time), '-1',
+                                                    revision, '--'])
     if (old_time_commit_id is None) or (old_time_commit_id == ""):
         # Current repository is created after old_time, so firstly try to fetch the first commit_id:
         print('old_time_commit_id is empty, try to fetch first commit')
-        str_fetch_first_log_cmd = 'git log --no-merges --pretty="%ci_%H" | tail -n 1'
-        old_time_commit_id = os.popen(str_fetch_first_log_cmd).read().strip()
+        # Same as `git log --no-merges --pretty="%ci_%H" | tail -n 1`
+        old_time_commit_id = (run_git(git_project_path, ['log', '--no-merges', '--pretty=%ci_%H', revision, '--'])
+                              or '').rpartition('\n')[2]
         if (old_time_commit_id is None) or (old_time_commit_id == ""):
             # There isn't any commit in this repository, return directly
             print('There is no commit id. No need to create new old patch.')
             log_file.write('\tNo need to create new old patch.\n')
-            os.system('rm -rf {0} {1}'.format(curr_project_out_new_full_path, curr_project_out_old_full_path))
-            return
-
-    # str_fetch_new_log_cmd = 'git log --no-merges --pretty="%ci_%H" --since="{}" --before="{}" -1'.format(start_time,
-    #                                                                                                      end_time)
-    str_fetch_new_log_cmd = 'git log --pretty="%ci_%H" --since="{}" --before="{}" -1'.format(start_time,
-                                                                                             end_time)
-    new_time_commit_id = os.popen(str_fetch_new_log_cmd).read().strip()
-    if (new_time_commit_id is None) or (new_time_commit_id == ""):
-        print('No new commit id. No need to create new old patch.')
-        log_file.write('\tNo need to create new old patch.\n\n')
-        os.system('rm -rf {0} {1}'.format(curr_project_out_new_full_path, curr_project_out_old_full_path))
-        return
+            remove_project_output(output_base_folder, relative_project_path)
+            return None
 
     old_split_index = old_time_commit_id.index('_')
     new_split_index = new_time_commit_id.index('_')
@@ -273,24 +587,143 @@ def make_new_old(git_project_path, output_base_folder, relative_project_path, st
     #    These file contents are snapshot from new commit-id .
     # 3. Decompress new files to ``out/new/`` folder
     # 4. Reverse the order of new and old to get old files folder.
-    str_git_archive_new_cmd = 'git archive --format=tar {new} $(git diff --name-only --diff-filter=d {old} {new}) | (cd {out} && tar xf -)'.format(
-        new=new_commit_id, old=old_commit_id, out=curr_project_out_new_full_path)
-    str_git_archive_old_cmd = 'git archive --format=tar {old} $(git diff --name-only --diff-filter=d {new} {old}) | (cd {out} && tar xf -)'.format(
-        new=new_commit_id, old=old_commit_id, out=curr_project_out_old_full_path)
-
-    # Use ``os.system()`` to run these two commands above.
-    print(str_git_archive_new_cmd)
-    os.system(str_git_archive_new_cmd)
-    print(str_git_archive_old_cmd)
-    os.system(str_git_archive_old_cmd)
-    print('make_new_old {} done\n'.format(project_path))
+    # willie note here 2026-10-17
+    # Path list in shell command line may overflow for thousands of changed files, and tar round trip is wasteful.
+    # Now ``git diff-tree`` runs once to get blob ids of both commits, then all blobs are read from a single
+    # ``git cat-file --batch`` process and written to ``out/new/`` and ``out/old/`` directly.
+    # In incremental mode, blobs which are in output of last run are hardlinked instead of extracted again.
+    if (previous_entry is not None) and (previous_entry['old_commit'] == old_commit_id) and \
+            (previous_entry['new_commit'] == new_commit_id):
+        # Same commits as last run, file list is the same too
+        new_files = previous_entry['new_files']
+        old_files = previous_entry['old_files']
+    else:
+        diff_entries = diff_blobs(git_project_path, old_commit_id, new_commit_id)
+        if diff_entries is None:
+            # Empty patch would look like success, so report it and keep no state, next run tries again
+            print('make_new_old {} failed\n'.format(relative_project_path))
+            log_file.write('\tFAILED: can not diff {} and {}, patch is not created\n\n'.format(old_commit_id,
+                                                                                               new_commit_id))
+            remove_project_output(output_base_folder, relative_project_path)
+            return None
+        new_files = {path: [new_mode, new_blob] for path, old_mode, old_blob, new_mode, new_blob, status
+                     in diff_entries if 'D' != status}
+        old_files = {path: [old_mode, old_blob] for path, old_mode, old_blob, new_mode, new_blob, status
+                     in diff_entries if 'A' != status}
+    print('{}: {} new files, {} old files'.format(relative_project_path, len(new_files), len(old_files)))
+    if zip_writer is not None:
+        # Blobs go to zip file directly, no file is written to ``out`` folder
+        with CatFileBatch(git_project_path) as cat_file:
+            zip_writer.write_blobs(cat_file, new_files, 'out/new/' + relative_project_path)
+            zip_writer.write_blobs(cat_file, old_files, 'out/old/' + relative_project_path)
+        remove_project_output(output_base_folder, relative_project_path)
+        print('make_new_old {} done\n'.format(relative_project_path))
+        log_file.write('\tPatch {} done successfully\n\n'.format(git_project_path))
+        return None
+    previous_files = previous_blob_files(previous_entry, previous_out_folder, relative_project_path)
+    with CatFileBatch(git_project_path) as cat_file:
+        link_count = extract_blobs(cat_file, new_files, curr_project_out_new_full_path, previous_files)
+        link_count += extract_blobs(cat_file, old_files, curr_project_out_old_full_path, previous_files)
+    if previous_entry is not None:
+        log_file.write('\tLink {} unchanged files from last run\n'.format(link_count))
+    print('make_new_old {} done\n'.format(relative_project_path))
     log_file.write('\tPatch {} done successfully\n\n'.format(git_project_path))
+    return {'old_commit': old_commit_id, 'new_commit': new_commit_id, 'new_files': new_files,
+            'old_files': old_files}
+
+
+def map_projects(function, args_list, jobs):
+    """
+    Call ``function(*args)`` for every args in ``args_list``, ``jobs`` calls at the same time.\n
+    Workers spend most of time waiting for git subprocesses, so threads are enough.\n
+    :return: iterator of results in ``args_list`` order
+    """
+    if jobs <= 1:
+        return (function(*args) for args in args_list)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=jobs)
+    # ``Executor.map()`` yields results in submitting order, which keeps log in project order.
+    results = executor.map(lambda args: function(*args), args_list)
+    executor.shutdown(wait=False)
+    return results
+
+
+def make_project_new_old(idx, git_project_path, output_base_folder, relative_project_path, start_time, revision,
+                         new_time_commit_id, previous_entry, previous_out_folder, zip_writer):
+    """
+    Run ``make_new_old()`` for one project and collect its log in memory.\n
+    It is safe to run in worker thread, the caller writes returned log in project order.\n
+    :param idx: index of project, written to log
+    :return: (log of this project, state of this project)
+    """
+    project_log = io.StringIO()
+    project_log.write('{}: current project path is {}\n'.format(idx, relative_project_path))
+    project_state = make_new_old(git_project_path, output_base_folder, relative_project_path, start_time, revision,
+                                 new_time_commit_id, project_log, previous_entry, previous_out_folder,
+                                 zip_writer)
+    return project_log.getvalue(), project_state
+
+
+def make_all_new_old(project_list, output_base_folder, start_time, end_time, log_file, branch_name, jobs=1,
+                     previous_state=None, previous_out_folder='', zip_writer=None):
+    """
+    Make new old patches of all projects, ``jobs`` projects at the same time.\n
+    Firstly find new commit of every project with a single ``git log``, then only make patches for projects
+    which have commits in time range.\n
+    :param project_list: list of (git_project_path, relative_project_path, remote_name)
+    :param output_base_folder: the base output folder to place new and old files
+    :param start_time: the lower limit of time
+    :param end_time: the upper limit of time
+    :param log_file: log file, logs of projects are written in ``project_list`` order
+    :param branch_name: git branch name
+    :param jobs: number of worker threads, 1 means handling projects one by one
+    :param previous_state: state of last run from ``load_state()``, None means extracting all files
+    :param previous_out_folder: ``out`` folder of last run
+    :param zip_writer: ``PatchZipWriter``, if not None, files are written to zip file instead of ``out`` folder
+    :return: state of this run, see ``load_state()``
+    """
+    # Firstly filter out projects without new commit.
+    new_commits = list(map_projects(find_new_commit, [
+        (git_project_path, remote_name, branch_name, start_time, end_time)
+        for git_project_path, relative_project_path, remote_name in project_list], jobs))
+    project_logs = []
+    changed_args = []
+    for idx, ((git_project_path, relative_project_path, remote_name), (revision, new_time_commit_id)) in \
+            enumerate(zip(project_list, new_commits)):
+        if is_empty(new_time_commit_id):
+            project_logs.append('{}: current project path is {}\n\tNo need to create new old patch.\n\n'.format(
+                idx, relative_project_path))
+            remove_project_output(output_base_folder, relative_project_path)
+            continue
+        # Placeholder, replaced by log of worker
+        project_logs.append(None)
+        previous_entry = None
+        if previous_state is not None:
+            previous_entry = previous_state.get(relative_project_path)
+        changed_args.append((idx, git_project_path, output_base_folder, relative_project_path, start_time, revision,
+                             new_time_commit_id, previous_entry, previous_out_folder, zip_writer))
+    print('{} of {} projects have new commits'.format(len(changed_args), len(project_list)))
+
+    # Secondly make patches for changed projects.
+    state = {}
+    for args, (project_log, project_state) in zip(changed_args,
+                                                  map_projects(make_project_new_old, changed_args, jobs)):
+        project_logs[args[0]] = project_log
+        if project_state is not None:
+            state[args[3]] = project_state
+    log_file.write(''.join(project_logs))
+    return state
 
 
 if __name__ == '__main__':
     (options, args) = global_options.parse_args()
 
     # Firstly fetch parameters from input.
+    if options.stream_zip and options.incremental:
+        print('FATAL: -z can not be used with -i, incremental mode needs files in out folder')
+        sys.exit(1)
+    if not 0 <= options.compress_level <= 9:
+        print('FATAL: compress level {} is not in 0 ~ 9'.format(options.compress_level))
+        sys.exit(1)
     start_time = datetime.datetime.combine(datetime.date.today(), datetime.time.min)
     if is_empty(options.start_time):
         print("Input start_time is empty set start_time={}".format(start_time))
@@ -393,6 +826,14 @@ if __name__ == '__main__':
     # Thirdly prepare output folder
     curr_working_folder_path = os.path.dirname(os.path.realpath(__file__))
     out_base_folder_path = curr_working_folder_path
+    # In incremental mode, keep `out` of last run as `out_last` to hardlink unchanged files from it
+    previous_state = None
+    previous_out_folder_path = out_base_folder_path + '/out_last'
+    if options.incremental:
+        previous_state = load_state(out_base_folder_path + '/out/' + STATE_FILE_NAME)
+        shutil.rmtree(previous_out_folder_path, ignore_errors=True)
+        if os.path.isdir(out_base_folder_path + '/out'):
+            os.rename(out_base_folder_path + '/out', previous_out_folder_path)
     create_output_folder(out_base_folder_path, project_path_remote_name_dict.keys())
 
     # if input branch_name is '', use <default> node 'revision' attribute
@@ -430,23 +871,33 @@ if __name__ == '__main__':
     log_file.write('Start handling {} projects in branch {}:\n'.format(len(project_path_remote_name_dict), branch_name))
 
     # Fifthly iterate all projects and make new/old folder.
-    idx = 0
+    project_list = []
     for project_path, remote_name in project_path_remote_name_dict.items():
-        log_file.write('{}: current project path is {}\n'.format(idx, project_path))
         git_project_path = repo_base_directory + project_path
         if 'oem' == project_path:
             git_project_path = oem_git_directory
-        # Here change back datetime.time to string
-        make_new_old(git_project_path, out_base_folder_path, project_path, str_start_time, str_end_time, log_file,
-                     remote_name, branch_name)
-        idx = idx + 1
+        project_list.append((git_project_path, project_path, remote_name))
+    print('Handle {} projects with {} jobs'.format(len(project_list), options.jobs))
+    str_zip_file = out_base_folder_path + '/new_old_{}.zip'.format(str_time_now)
+    zip_writer = None
+    if options.stream_zip:
+        zip_writer = PatchZipWriter(str_zip_file, options.compress_level)
+    # Here change back datetime.time to string
+    state = make_all_new_old(project_list, out_base_folder_path, str_start_time, str_end_time, log_file, branch_name,
+                             options.jobs, previous_state, previous_out_folder_path, zip_writer)
+    if options.incremental:
+        save_state(out_base_folder_path + '/out/' + STATE_FILE_NAME, state)
+        shutil.rmtree(previous_out_folder_path, ignore_errors=True)
 
-    # Change back to original folder
-    os.chdir(curr_working_folder_path)
     log_file.write('Mission complete!\n')
     log_file.close()
 
     # Sixthly zip out folder
-    str_zip_cmd = 'zip -r new_old_{}.zip {}'.format(str_time_now, 'out')
-    os.system(str_zip_cmd)
+    if zip_writer is not None:
+        # Files are in zip file already, only add log file
+        zip_writer.write_file(str_log_file, 'out/' + os.path.basename(str_log_file))
+        zip_writer.close()
+    else:
+        subprocess.run(['zip', '-r', os.path.basename(str_zip_file), 'out', '-x', 'out/' + STATE_FILE_NAME],
+                       cwd=out_base_folder_path)
     print('\n\nMission complete!')
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Benchmark `parse_manifest_xml` of `create_mirror_repo_from_local_folder.py`
+on a synthetic repo folder:
+
+    1. legacy: version 1.3 algorithm. Recursive `ET.parse` of every include
+       file, one `os.path.isdir` per project, de-duplicate path with
+       `path in list` and `list.index(path)`, which is O(n^2).
+    2. table: shared `repo_manifest.load_manifest` without cache, ordered
+       dictionary of path and name, one `os.scandir` per parent folder.
+    3. cached: the same as table, manifest is loaded from pickle cache.
+
+Synthetic manifest has `-n` projects split into top manifest and 4 include
+files, every 50th project covers the path of an earlier one, and folders of
+every 20th project are missing. Results of all methods must be equal.
+
+    python3 manifest_benchmark.py -n 50000
+
+"""
+
+# =============================================================================
+# Imports
+# =============================================================================
+import contextlib
+import io
+import optparse
+import os
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from repo_kits import create_mirror_repo_from_local_folder as mirror  # noqa: E402
+from repo_kits import repo_manifest  # noqa: E402
+
+INCLUDE_COUNT = 4
+
+
+def write_synthetic_repo(_base_folder, _project_count):
+    """
+    Write `.repo/manifests/` and project folders under `_base_folder`
+
+    :return: (manifest folder, top manifest name)
+    """
+    _manifest_folder = os.path.join(_base_folder, '.repo', 'manifests')
+    os.makedirs(_manifest_folder)
+    _file_count = INCLUDE_COUNT + 1
+    _lines = [['<manifest>'] for _ in range(_file_count)]
+    _lines[0].append('  <remote name="origin" fetch=".."/>')
+    _lines[0].append('  <default remote="origin" revision="master"/>')
+    for _index in range(_project_count):
+        _path = 'group{}/sub{}/project{}'.format(_index % 97, _index % 13,
+                                                 _index)
+        if 0 == _index % 50 and _index > 0:
+            # Cover path of an earlier project
+            _path = 'group{0}/sub{1}/project{2}'.format(
+                (_index // 2) % 97, (_index // 2) % 13, _index // 2)
+        _lines[_index * _file_count // _project_count].append(
+            '  <project name="platform/{}" path="{}"/>'.format(_index, _path))
+        if 0 != _index % 20:
+            os.makedirs(os.path.join(_base_folder, _path), exist_ok=True)
+    for _file_index in range(1, _file_count):
+        _lines[0].append('  <include name="include{}.xml"/>'.format(
+            _file_index))
+    for _file_index, _file_lines in enumerate(_lines):
+        _file_name = 'include{}.xml'.format(_file_index) if _file_index \
+            else 'default.xml'
+        with open(os.path.join(_manifest_folder, _file_name), 'w') as _fp:
+            _fp.write('\n'.join(_file_lines + ['</manifest>']) + '\n')
+    return _manifest_folder, 'default.xml'
+
+
+def legacy_parse_manifest_xml(_out_project_path, _out_project_name,
+                              _repo_base_directory, _manifest_folder,
+                              _manifest_name):
+    """
+    `parse_manifest_xml` of version 1.3 without cull prefix and prints
+    """
+    _root = ET.parse(os.path.join(_manifest_folder, _manifest_name)).getroot()
+    for _project in _root.findall('./project'):
+        _name = _project.get('name')
+        _path = _project.get('path') or _name
+        if not os.path.isdir(_repo_base_directory + _path):
+            continue
+        if _path in _out_project_path:
+            _out_project_name[_out_project_path.index(_path)] = _name
+        else:
+            _out_project_path.append(_path)
+            _out_project_name.append(_name)
+    for _include in _root.findall('./include'):
+        legacy_parse_manifest_xml(_out_project_path, _out_project_name,
+                                  _repo_base_directory, _manifest_folder,
+                                  _include.get('name'))
+
+
+def bench(_function, *_args):
+    """
+    :return: (seconds, result), output of `_function` is dropped
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        _start = time.perf_counter()
+        _result = _function(*_args)
+        _seconds = time.perf_counter() - _start
+    return _seconds, _result
+
+
+def bench_legacy(_base_folder, _manifest_folder, _manifest_name):
+    _paths, _names = [], []
+    legacy_parse_manifest_xml(_paths, _names, _base_folder, _manifest_folder,
+                              _manifest_name)
+    return list(zip(_paths, _names))
+
+
+def bench_table(_base_folder, _manifest_folder, _manifest_name):
+    return list(mirror.parse_manifest_xml(_base_folder, _manifest_folder,
+                                          _manifest_name)[0].items())
+
+
+if __name__ == '__main__':
+    global_options = optparse.OptionParser(
+        usage='Benchmark manifest parsing of mirror repo', version='%prog 1.0')
+    global_options.add_option('-n', '--number', action='store', type='int',
+                              dest='project_count', default=50000,
+                              help='Number of projects, default is 50000')
+    global_options.add_option('-s', '--skip-legacy', action='store_true',
+                              dest='skip_legacy', default=False,
+                              help='Skip legacy O(n^2) method')
+    (options, args) = global_options.parse_args()
+
+    with tempfile.TemporaryDirectory() as base_folder:
+        base_folder = base_folder + '/'
+        start = time.perf_counter()
+        manifest_folder, manifest_name = write_synthetic_repo(
+            base_folder, options.project_count)
+        print('write {} projects: {:.2f} s'.format(
+            options.project_count, time.perf_counter() - start))
+        cache_folder = os.path.join(base_folder, 'cache')
+        bench_args = (base_folder, manifest_folder, manifest_name)
+
+        # Route shared loader to a private cache folder, the first table run
+        # parses manifest and writes cache, the second one reads it.
+        repo_manifest.DEFAULT_CACHE_FOLDER = cache_folder
+        table_seconds, table_result = bench(bench_table, *bench_args)
+        print('table  : {:.3f} s, {} projects'.format(table_seconds,
+                                                     len(table_result)))
+        cached_seconds, cached_result = bench(bench_table, *bench_args)
+        print('cached : {:.3f} s  ({:.1f}x faster than table)'.format(
+            cached_seconds, table_seconds / cached_seconds))
+        if cached_result != table_result:
+            print('Error: cached result differs from table result')
+            sys.exit(1)
+        if not options.skip_legacy:
+            legacy_seconds, legacy_result = bench(bench_legacy, *bench_args)
+            print('legacy : {:.3f} s  ({:.1f}x slower than table)'.format(
+                legacy_seconds, legacy_seconds / table_seconds))
+            if legacy_result != table_result:
+                print('Error: legacy result differs from table result')
+                sys.exit(1)
+        print('results are equal')
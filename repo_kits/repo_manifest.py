@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Load repo manifest xml with all its <include> files into one project table.
+
+The whole include graph is parsed once. Nodes are handled in document order,
+an <include> node is replaced by nodes of the included file at its position,
+the same as `repo` does:
+
+    1. <project> is added to table, key is its `path` (`name` if no `path`).
+       A later <project> with the same path covers the former one, but keeps
+       the former position, so table order is the same as manifest order.
+    2. <remove-project name="..."> removes all projects with this name, or
+       only the one at `path` if `path` is set.
+    3. <extend-project name="..."> updates `revision`, `remote`, `upstream`
+       and appends `groups` of projects with this name, or only the one at
+       `path`. `dest-path` moves the project to a new path.
+
+Included file names are relative to the folder of the top manifest.
+
+Files are read by `iter_manifest_nodes`, a streaming `iterparse` reader which
+clears every top level node after it is handled, so huge merged manifests
+never build a full element tree. `iter_manifest_projects` streams raw
+<project> nodes for callers which do not need the resolved table.
+
+Parsed manifest is pickled to `~/.cache/WilliePythonKits/manifest/`, key is
+the absolute path of top manifest. The pickle is reused while path, mtime and
+size of every file in include graph are unchanged.
+
+Sample:
+
+    manifest = load_manifest('.repo/manifests/default.xml')
+    for project in manifest.projects:
+        print(project.name, project.path, manifest.project_revision(project))
+    project = manifest.projects.get('frameworks/native')
+    projects = manifest.projects.find('name', 'platform/frameworks/base')
+"""
+
+# =============================================================================
+# Imports
+# =============================================================================
+import hashlib
+import os
+import pickle
+import tempfile
+import xml.etree.ElementTree as ET
+
+# Bump when pickled classes change, so old cache files are never reused.
+MANIFEST_CACHE_VERSION = 1
+DEFAULT_CACHE_FOLDER = os.path.join(os.path.expanduser('~'), '.cache',
+                                    'WilliePythonKits', 'manifest')
+
+
+class ManifestProject(object):
+    """
+    One <project> node. `attrib` keeps all xml attributes, `children` keeps
+    (tag, attrib) of <copyfile>, <linkfile> and other child nodes.
+    """
+    __slots__ = ('name', 'path', 'revision', 'remote', 'attrib', 'children')
+
+    def __init__(self, _attrib, _children=None):
+        self.attrib = dict(_attrib)
+        self.name = self.attrib.get('name')
+        self.path = self.attrib.get('path') or self.name
+        self.revision = self.attrib.get('revision')
+        self.remote = self.attrib.get('remote')
+        self.children = list(_children or [])
+
+    def __repr__(self):
+        return 'ManifestProject(name={!r}, path={!r}, revision={!r})'.format(
+            self.name, self.path, self.revision)
+
+    def set_attribute(self, _key, _value):
+        """
+        Update xml attribute and the same named field
+        """
+        self.attrib[_key] = _value
+        if _key in ('name', 'path', 'revision', 'remote'):
+            setattr(self, _key, _value)
+
+
+class ProjectTable(object):
+    """
+    Ordered projects, key is project path. Index of other attribute is
+    built on first `find` of it, then updated when table changes.
+    """
+
+    def __init__(self):
+        self._projects = {}
+        self._indexes = {}
+
+    def __len__(self):
+        return len(self._projects)
+
+    def __iter__(self):
+        return iter(list(self._projects.values()))
+
+    def __contains__(self, _path):
+        return _path in self._projects
+
+    def get(self, _path, _default=None):
+        return self._projects.get(_path, _default)
+
+    def paths(self):
+        return list(self._projects.keys())
+
+    def add(self, _project):
+        """
+        Add project, cover the one with the same path but keep its position
+
+        :return: covered project, None if path is new
+        """
+        _covered = self._projects.get(_project.path)
+        if _covered is not None:
+            self._unindex(_covered)
+        self._projects[_project.path] = _project
+        for _attribute, _index in self._indexes.items():
+            _index.setdefault(_index_key(_project, _attribute),
+                              []).append(_project)
+        return _covered
+
+    def remove(self, _path):
+        """
+        :return: removed project, None if path not exist
+        """
+        _project = self._projects.pop(_path, None)
+        if _project is not None:
+            self._unindex(_project)
+        return _project
+
+    def _unindex(self, _project):
+        for _attribute, _index in self._indexes.items():
+            _index[_index_key(_project, _attribute)].remove(_project)
+
+    def move(self, _project, _new_path):
+        """
+        Change path of project, it moves to the end of table like `repo`
+        """
+        self.remove(_project.path)
+        _project.set_attribute('path', _new_path)
+        self.add(_project)
+
+    def find(self, _attribute, _value):
+        """
+        :param _attribute: 'name', 'path', 'revision', 'remote' or any xml
+                           attribute
+        :return: list of projects whose attribute is `_value`
+        """
+        _index = self._indexes.get(_attribute)
+        if _index is None:
+            _index = {}
+            for _project in self._projects.values():
+                _index.setdefault(_index_key(_project, _attribute),
+                                  []).append(_project)
+            self._indexes[_attribute] = _index
+        return list(_index.get(_value, []))
+
+
+def _index_key(_project, _attribute):
+    if _attribute in ManifestProject.__slots__:
+        return getattr(_project, _attribute)
+    return _project.attrib.get(_attribute)
+
+
+class Manifest(object):
+    """
+    Result of `load_manifest`
+
+    :ivar manifest_path: absolute path of top manifest
+    :ivar remotes: dictionary, key is remote name, value is attributes
+    :ivar default: attributes of <default> node, empty if there is not
+    :ivar projects: `ProjectTable`
+    :ivar files: dictionary, key is path of every file in include graph,
+                 value is (mtime_ns, size) when it is parsed
+    """
+
+    def __init__(self, _manifest_path):
+        self.manifest_path = _manifest_path
+        self.remotes = {}
+        self.default = {}
+        self.projects = ProjectTable()
+        self.files = {}
+
+    @property
+    def default_revision(self):
+        return self.default.get('revision')
+
+    @property
+    def default_remote(self):
+        """
+        :return: <default> remote, or the first <remote> if <default> does
+                 not set it
+        """
+        _remote = self.default.get('remote')
+        if _remote is None and self.remotes:
+            _remote = next(iter(self.remotes))
+        return _remote
+
+    def project_remote(self, _project):
+        return _project.remote or self.default_remote
+
+    def project_revision(self, _project):
+        """
+        :return: revision of project, or of its <remote>, or of <default>
+        """
+        if _project.revision:
+            return _project.revision
+        _remote_revision = self.remotes.get(
+            self.project_remote(_project), {}).get('revision')
+        return _remote_revision or self.default_revision
+
+    def projects_with_children(self):
+        """
+        :return: list of projects which have <copyfile>, <linkfile> or other
+                 child nodes, after <remove-project> and <extend-project>
+        """
+        return [_project for _project in self.projects if _project.children]
+
+
+def _file_stamp(_path):
+    _stat = os.stat(_path)
+    return _stat.st_mtime_ns, _stat.st_size
+
+
+def _matched_projects(_table, _attrib):
+    """
+    :return: projects matching `name` and optional `path` of
+             <remove-project> or <extend-project> node
+    """
+    _projects = _table.find('name', _attrib.get('name'))
+    _path = _attrib.get('path')
+    if _path:
+        _projects = [_project for _project in _projects
+                     if _project.path == _path]
+    return _projects
+
+
+def iter_manifest_nodes(_manifest_path, _manifest_folder=None, _files=None):
+    """
+    Stream top level nodes of manifest and its include files in document
+    order with `iterparse`. Parsed nodes are cleared as soon as they are
+    yielded, so memory is bounded by the largest single node, not by the
+    whole file.
+
+    :param _manifest_path: manifest xml path
+    :param _manifest_folder: folder of included file names, default is the
+                             folder of `_manifest_path`
+    :param _files: dictionary, path of every parsed file is added with its
+                   (mtime_ns, size); a file already in it is skipped
+    :return: iterator of (tag, attrib, children), <include> nodes are
+             replaced by nodes of included file, `children` is list of
+             (tag, attrib) of child nodes
+    """
+    _manifest_path = os.path.abspath(_manifest_path)
+    if _manifest_folder is None:
+        _manifest_folder = os.path.dirname(_manifest_path)
+    if _files is None:
+        _files = {}
+    if _manifest_path in _files:
+        print('Skip manifest {} which is included again'.format(
+            _manifest_path))
+        return
+    _files[_manifest_path] = _file_stamp(_manifest_path)
+    _root = None
+    _depth = 0
+    for _event, _element in ET.iterparse(_manifest_path,
+                                         events=('start', 'end')):
+        if 'start' == _event:
+            if _root is None:
+                _root = _element
+            _depth = _depth + 1
+            continue
+        _depth = _depth - 1
+        if 1 != _depth:
+            continue
+        # Top level node ends, all its children are parsed
+        _tag = _element.tag
+        _attrib = dict(_element.attrib)
+        _children = [(_child.tag, dict(_child.attrib)) for _child in _element]
+        _root.clear()
+        if 'include' == _tag:
+            yield from iter_manifest_nodes(
+                os.path.join(_manifest_folder, _attrib.get('name')),
+                _manifest_folder, _files)
+        else:
+            yield _tag, _attrib, _children
+
+
+def iter_manifest_projects(_manifest_path):
+    """
+    Stream <project> nodes of manifest and its include files, without
+    applying <remove-project> and <extend-project>
+
+    :return: iterator of `ManifestProject`
+    """
+    for _tag, _attrib, _children in iter_manifest_nodes(_manifest_path):
+        if 'project' == _tag:
+            yield ManifestProject(_attrib, _children)
+
+
+def _parse_nodes(_manifest):
+    """
+    Apply nodes of manifest and its include files to `_manifest`
+    """
+    _table = _manifest.projects
+    for _tag, _attrib, _children in iter_manifest_nodes(
+            _manifest.manifest_path, None, _manifest.files):
+        if 'project' == _tag:
+            _project = ManifestProject(_attrib, _children)
+            if _project.path is None:
+                print('Skip <project> without name and path')
+                continue
+            _table.add(_project)
+        elif 'remove-project' == _tag:
+            for _project in _matched_projects(_table, _attrib):
+                _table.remove(_project.path)
+        elif 'extend-project' == _tag:
+            for _project in _matched_projects(_table, _attrib):
+                for _key in ('revision', 'remote', 'upstream'):
+                    if _attrib.get(_key) is not None:
+                        _project.set_attribute(_key, _attrib.get(_key))
+                if _attrib.get('groups'):
+                    _groups = _project.attrib.get('groups')
+                    _project.set_attribute(
+                        'groups', _attrib.get('groups') if not _groups
+                        else _groups + ',' + _attrib.get('groups'))
+                if _attrib.get('dest-path'):
+                    _table.move(_project, _attrib.get('dest-path'))
+        elif 'remote' == _tag:
+            _manifest.remotes[_attrib.get('name')] = _attrib
+        elif 'default' == _tag:
+            _manifest.default = _attrib
+
+
+def parse_manifest(_manifest_path):
+    """
+    Parse manifest and its include graph without cache
+
+    :return: `Manifest`
+    """
+    _manifest_path = os.path.abspath(_manifest_path)
+    _manifest = Manifest(_manifest_path)
+    _parse_nodes(_manifest)
+    return _manifest
+
+
+def _cache_file_path(_manifest_path, _cache_folder):
+    _key = hashlib.sha1(_manifest_path.encode()).hexdigest()
+    return os.path.join(_cache_folder, _key + '.pickle')
+
+
+def _load_cache(_cache_path, _manifest_path):
+    """
+    :return: cached `Manifest`, None if cache is missing or stale
+    """
+    try:
+        with open(_cache_path, 'rb') as _fp:
+            _version, _manifest = pickle.load(_fp)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError,
+            ValueError, TypeError):
+        return None
+    if MANIFEST_CACHE_VERSION != _version or \
+            _manifest.manifest_path != _manifest_path:
+        return None
+    try:
+        for _path, _stamp in _manifest.files.items():
+            if _file_stamp(_path) != _stamp:
+                return None
+    except OSError:
+        return None
+    return _manifest
+
+
+def _save_cache(_cache_path, _manifest):
+    """
+    Write pickle to temporary file, then replace cache file
+    """
+    try:
+        os.makedirs(os.path.dirname(_cache_path), exist_ok=True)
+        _fd, _temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(_cache_path), suffix='.tmp')
+        with os.fdopen(_fd, 'wb') as _fp:
+            pickle.dump((MANIFEST_CACHE_VERSION, _manifest), _fp,
+                        pickle.HIGHEST_PROTOCOL)
+        os.replace(_temp_path, _cache_path)
+    except OSError as _error:
+        # Cache is only an optimization
+        print('Can not save manifest cache {}: {}'.format(_cache_path,
+                                                          _error))
+
+
+def load_manifest(_manifest_path, _use_cache=True, _cache_folder=None):
+    """
+    Load manifest and its include graph, from cache if no file changed
+
+    :param _manifest_path: top manifest xml path
+    :param _use_cache: whether reading and writing pickle cache
+    :param _cache_folder: folder of pickle cache files, default is
+                          `DEFAULT_CACHE_FOLDER`
+    :return: `Manifest`
+    """
+    if _cache_folder is None:
+        _cache_folder = DEFAULT_CACHE_FOLDER
+    _manifest_path = os.path.abspath(_manifest_path)
+    if not _use_cache:
+        return parse_manifest(_manifest_path)
+    _cache_path = _cache_file_path(_manifest_path, _cache_folder)
+    _manifest = _load_cache(_cache_path, _manifest_path)
+    if _manifest is not None:
+        print('Load manifest {} from cache, {} projects'.format(
+            _manifest_path, len(_manifest.projects)))
+        return _manifest
+    _manifest = parse_manifest(_manifest_path)
+    _save_cache(_cache_path, _manifest)
+    return _manifest
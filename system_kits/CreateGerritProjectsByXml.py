@@ -38,6 +38,10 @@ It will:
 
 Version: 1.1 2020-12-14 Add option parse for creating gerrit project or
                         push commit to gerrit.
+Version: 1.2 2026-10-17 Read projects by shared `repo_kits/repo_manifest.py`
+                        instead of matching lines with regex, so <include>,
+                        <remove-project>, <extend-project> and <project> nodes
+                        written in several lines are handled.
 
 """
 
@@ -46,8 +50,12 @@ Version: 1.1 2020-12-14 Add option parse for creating gerrit project or
 # =============================================================================
 import optparse
 import os
-import re
 import subprocess
+import sys
+
+# Shared manifest loader is in `repo_kits` package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from repo_kits.repo_manifest import load_manifest  # noqa: E402
 
 
 def is_empty(s):
@@ -124,7 +132,7 @@ def push_first_commit(_base_dir, _project_relative_path, _user, _ip,
 
 global_options = optparse.OptionParser(
     usage="Create gerrit projects by gerrit ssh command COMMAND [ARGS]"
-    , version="%prog 1.1")
+    , version="%prog 1.2")
 global_options.add_option('-a', '--account', action='store', type='string',
                           dest='gerrit_account', default='gerrit_admin',
                           help='Administrator account to operate gerrit'
@@ -199,24 +207,18 @@ if __name__ == '__main__':
                                                     is_create_project_operation
                                                     ))
 
-    with open(manifests_xml_path) as fp:
-        path_attribute_pattern = re.compile(r'<project.+path=\"(\S+)\"')
-        line = fp.readline()
-        while line:
-            res = re.search(path_attribute_pattern, line)
-            if res is not None:
-                project_path = res.group(1)
-                print('\nproject_path={}'.format(project_path))
-                if is_create_project_operation:
-                    create_gerrit_project(gerrit_account,
-                                          gerrit_project_prefix + project_path,
-                                          gerrit_privilege_project,
-                                          gerrit_project_owner)
-                else:
-                    push_first_commit(repo_working_dir, project_path,
-                                      gerrit_site_user, gerrit_site_ip,
-                                      gerrit_project_prefix)
-            line = fp.readline()
+    for project in load_manifest(manifests_xml_path).projects:
+        project_path = project.path
+        print('\nproject_path={}'.format(project_path))
+        if is_create_project_operation:
+            create_gerrit_project(gerrit_account,
+                                  gerrit_project_prefix + project_path,
+                                  gerrit_privilege_project,
+                                  gerrit_project_owner)
+        else:
+            push_first_commit(repo_working_dir, project_path,
+                              gerrit_site_user, gerrit_site_ip,
+                              gerrit_project_prefix)
 
     os.chdir(repo_working_dir)
 # Main process done
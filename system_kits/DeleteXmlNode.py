@@ -11,6 +11,10 @@ Reading invision_repo.xml <project> node `name` attribute:
 
    Then delete the same <project> node in default.xml
 
+Version: 1.1 2026-10-17 Read invision_repo.xml by shared
+                        `repo_kits/repo_manifest.py` instead of matching lines
+                        with regex, and remove all matched nodes of default.xml
+                        in one pass.
 
 """
 
@@ -18,34 +22,33 @@ Reading invision_repo.xml <project> node `name` attribute:
 # Imports
 # =============================================================================
 import os
-import re
-import subprocess
+import sys
 import xml.etree.ElementTree as ET
 
+# Shared manifest loader is in `repo_kits` package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from repo_kits.repo_manifest import load_manifest  # noqa: E402
+
 dest_tree = ET.parse('default.xml')
 dest_root = dest_tree.getroot()
 
 
-def delete_node_in_xml(project_name):
-    print('Deleting {}'.format(project_name))
-    # find node whose name is `project_name`.
-    project_node = dest_root.find("./project/[@name='{}']".format(project_name))
-    if project_node is not None:
-        dest_root.remove(project_node)
+def delete_nodes_in_xml(project_names):
+    """
+    Delete <project> nodes whose name is in `project_names`, one pass over
+    default.xml instead of one `find` per name
+    """
+    for project_node in dest_root.findall('./project'):
+        if project_node.get('name') in project_names:
+            print('Deleting {}'.format(project_node.get('name')))
+            dest_root.remove(project_node)
 
 
 # Main process start
 
-with open('invision_repo.xml') as fp:
-    name_attribute_pattern = re.compile(r'<project.+name=\"(\S+)\"')
-    line = fp.readline()
-    while line:
-        res = re.search(name_attribute_pattern, line)
-        if res is not None:
-            curr_project_name = res.group(1)
-            delete_node_in_xml(curr_project_name)
-        line = fp.readline()
-    dest_tree.write('output.xml')
+delete_nodes_in_xml({project.name for project in
+                     load_manifest('invision_repo.xml', False).projects})
+dest_tree.write('output.xml')
 
 # Main process done
 
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Undistorted boards must decode without error, tag sizes whose tile is not a
+multiple of cells must be rejected instead of counted as missed tags.
+"""
+
+import pytest
+
+from cv_kits.april_tags.DetectionBenchmark import run_benchmark
+from cv_kits.april_tags.families import create_tag_family
+
+
+@pytest.mark.parametrize('_tag_size', [20, 40, 50.4, 100])
+def test_undistorted_board_decodes(_tag_size):
+    _row, = run_benchmark(create_tag_family('t36h11'), [_tag_size], 1, 4, 3,
+                          0.3, 0, 0, 0)
+    assert _row['tags'] == 12
+    assert _row['correct'] == 12
+
+
+@pytest.mark.parametrize('_tag_size', [37.5, 38, 45, 9])
+def test_non_multiple_tag_size_rejected(_tag_size):
+    with pytest.raises(ValueError):
+        run_benchmark(create_tag_family('t36h11'), [40, _tag_size], 1, 4, 3,
+                      0.3, 0, 0, 0)
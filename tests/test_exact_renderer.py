@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Exact render must keep white bit area within 0.01% and centroid within a few
+thousandths of a pixel of the ideal geometry, also for tag sizes and dpi that
+do not give whole pixels. Tags are at least 10 mm at 300 dpi, as measured by
+`python3 ExactRenderer.py`.
+"""
+
+import pytest
+
+from cv_kits.april_tags.ExactRenderer import measure_geometric_error, \
+    render_exact_board
+from cv_kits.april_tags.families.Tag36h11 import Tag36h11
+
+EXACT_CASES = [
+    # tag_size_mm, dpi
+    (12.7, 300),
+    (17.3, 300),
+    (23.45, 300),
+    (10, 299.7),
+    (15, 299.7),
+    (17.3, 317.5),
+    (30, 254.3),
+    (12.7, 600),
+]
+
+
+@pytest.mark.parametrize('_case', EXACT_CASES)
+def test_exact_geometric_error(_case):
+    _tag_size_mm, _dpi = _case
+    _tag_family = Tag36h11()
+    _canvas, _ = render_exact_board(3, 2, _tag_size_mm, 0.25, _tag_family,
+                                    _dpi)
+    _area_error, _centroid_error = measure_geometric_error(
+        _canvas.image, 3, 2, _tag_size_mm, 0.25, _tag_family, _dpi)
+    # Rounding to uint8 leaves noise around 0.01%, which is what the table
+    # of `python3 ExactRenderer.py` shows with 2 decimals
+    assert _area_error < 1.5e-4
+    assert _centroid_error <= 5e-3
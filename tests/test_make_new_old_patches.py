@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Incremental run of `make_new_old_patches_in_repo.py` with `-p /abs/project`
+must hardlink files of last output only, never files of working tree.
+"""
+
+import io
+import os
+import subprocess
+import zipfile
+
+from repo_kits.make_new_old_patches_in_repo import PatchZipWriter, \
+    make_all_new_old
+
+START_TIME = '2020-01-15 00:00:00'
+END_TIME = '2030-01-01 00:00:00'
+
+
+def _git(_project, *_args, _date=None):
+    _env = dict(os.environ, GIT_AUTHOR_NAME='t', GIT_AUTHOR_EMAIL='t@t',
+                GIT_COMMITTER_NAME='t', GIT_COMMITTER_EMAIL='t@t')
+    if _date:
+        _env.update(GIT_AUTHOR_DATE=_date, GIT_COMMITTER_DATE=_date)
+    return subprocess.run(['git', '-C', str(_project)] + list(_args),
+                          env=_env, check=True,
+                          stdout=subprocess.PIPE).stdout
+
+
+def _write(_path, _content, _mode=0o644):
+    os.makedirs(os.path.dirname(_path), exist_ok=True)
+    with open(_path, 'w') as _file:
+        _file.write(_content)
+    os.chmod(_path, _mode)
+
+
+def _make_project(_project):
+    _git(_project.parent, 'init', '-q', '-b', 'master', _project.name)
+    _write(str(_project / 'a.txt'), 'a1')
+    _write(str(_project / 'd/e/x.sh'), 'x1', 0o755)
+    _git(_project, 'add', '-A')
+    _git(_project, 'commit', '-qm', 'init', _date='2020-01-01 10:00:00')
+    _write(str(_project / 'a.txt'), 'a2')
+    _write(str(_project / 'd/e/x.sh'), 'x2', 0o755)
+    _git(_project, 'commit', '-qam', 'change', _date='2020-02-01 10:00:00')
+
+
+def _run(_project, _out_base, _previous_state=None, _zip_writer=None):
+    return make_all_new_old([(str(_project), str(_project), 'origin')],
+                            str(_out_base), START_TIME, END_TIME,
+                            io.StringIO(), 'master', 1, _previous_state,
+                            str(_out_base / 'out_last'), _zip_writer)
+
+
+def test_incremental_absolute_project_links_last_output(tmp_path):
+    _project = tmp_path / 'wc'
+    _out_base = tmp_path / 'base'
+    _make_project(_project)
+    _state = _run(_project, _out_base)
+    # Keep output of first run as `out_last`, the same as `-i`
+    os.rename(str(_out_base / 'out'), str(_out_base / 'out_last'))
+    _run(_project, _out_base, _state)
+
+    for _sub_folder, _revision in (('new', 'HEAD'), ('old', 'HEAD~1')):
+        _folder = str(_out_base / 'out' / _sub_folder) + str(_project)
+        for _path, _mode in (('a.txt', 0o644), ('d/e/x.sh', 0o755)):
+            _out_path = os.path.join(_folder, _path)
+            with open(_out_path, 'rb') as _file:
+                assert _git(_project, 'show', '{}:{}'.format(
+                    _revision, _path)) == _file.read()
+            assert _mode == os.stat(_out_path).st_mode & 0o777
+            # Linked from last output, not from working tree
+            assert not os.path.samefile(_out_path, str(_project / _path))
+            assert os.path.samefile(
+                _out_path, str(_out_base / 'out_last' / _sub_folder) +
+                str(_project) + '/' + _path)
+
+
+def test_stream_zip_absolute_project_names(tmp_path):
+    _project = tmp_path / 'wc'
+    _make_project(_project)
+    _zip_path = str(tmp_path / 'new_old.zip')
+    with PatchZipWriter(_zip_path, 6) as _zip_writer:
+        _run(_project, tmp_path / 'base', _zip_writer=_zip_writer)
+    # The same names as `zip -r out`, no empty path component
+    _prefix = str(_project).lstrip('/')
+    with zipfile.ZipFile(_zip_path) as _zip_file:
+        assert sorted(_zip_file.namelist()) == sorted(
+            'out/{}/{}/{}'.format(_sub_folder, _prefix, _path)
+            for _sub_folder in ('new', 'old')
+            for _path in ('a.txt', 'd/e/x.sh'))
+        assert b'a1' == _zip_file.read('out/old/{}/a.txt'.format(_prefix))
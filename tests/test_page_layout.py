@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Boards of the same family must not share tag ids, whichever alias of the
+family their specs use.
+"""
+
+import pytest
+
+from cv_kits.april_tags.BatchGenerator import normalize_board_spec
+from cv_kits.april_tags.PageLayout import check_id_ranges
+
+
+def _specs(*_families_and_first_ids):
+    return [normalize_board_spec({'family': _family, 'num_x': 2, 'num_y': 2,
+                                  'first_id': _first_id}, _idx)
+            for _idx, (_family, _first_id) in enumerate(
+                _families_and_first_ids)]
+
+
+@pytest.mark.parametrize('_families', [('t36h11', 't36h11'),
+                                       ('t36h11', 'Tag36h11'),
+                                       ('Tag36h11', 't36h11')])
+def test_overlap_rejected(_families):
+    with pytest.raises(ValueError, match='share tag ids'):
+        check_id_ranges(_specs((_families[0], 0), (_families[1], 2)))
+
+
+def test_disjoint_alias_ranges_pass():
+    check_id_ranges(_specs(('t36h11', 0), ('Tag36h11', 4)))
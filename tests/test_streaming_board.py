@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Board streamed with `-S` must be pixel identical to the board rendered at
+once, including fractional tag sizes and the axis label.
+"""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from cv_kits.april_tags.AprilTagsGenerator import generate_board, \
+    iter_board_bands, render_board_image
+from cv_kits.april_tags.families import create_tag_family
+
+BOARD_CASES = [
+    # num_x, num_y, tag_size, tag_interval_ratio, axis_len
+    (3, 4, 33, 0.3, 100),
+    (4, 6, 100, 0, 100),
+    (3, 5, 47.3, 0.17, 60),
+    (2, 3, 120, 0.25, 0),
+]
+
+
+@pytest.mark.parametrize('_case', BOARD_CASES)
+def test_bands_equal_whole_board(_case):
+    _num_x, _num_y, _tag_size, _tag_interval_ratio, _axis_len = _case
+    _tag_family = create_tag_family('Tag36h11')
+    _whole = render_board_image(_num_x, _num_y, _tag_size,
+                                _tag_interval_ratio, _tag_family,
+                                _axis_len).image
+    _bands = np.concatenate([_band for _, _band in iter_board_bands(
+        _num_x, _num_y, _tag_size, _tag_interval_ratio, _tag_family,
+        _axis_len)])
+    np.testing.assert_array_equal(_bands, _whole)
+
+
+@pytest.mark.parametrize('_case', BOARD_CASES[:2])
+def test_stream_png_equals_png(tmp_path, _case):
+    _num_x, _num_y, _tag_size, _tag_interval_ratio, _axis_len = _case
+    _tag_family = create_tag_family('Tag36h11')
+    _images = []
+    for _stream in (False, True):
+        _file_name = str(tmp_path / 'board_{}'.format(_stream))
+        generate_board(_file_name, ['png'], 300, _num_x, _num_y, _tag_size,
+                       _tag_interval_ratio, _tag_family, _axis_len,
+                       _stream=_stream, _geometry=False)
+        _images.append(np.asarray(Image.open(_file_name + '.png')))
+    np.testing.assert_array_equal(_images[1], _images[0])
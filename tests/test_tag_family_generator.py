@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Created By  : Willie
+# Created Date: 2026-10-17
+# =============================================================================
+
+"""
+Generated 36h11-style codes and the shipped Tag36h11 table must keep the
+family properties: pair distance over all rotations, distance to own
+rotations and complexity.
+"""
+
+import inspect
+import itertools
+
+import numpy as np
+
+from cv_kits.april_tags.families import Tag36h11, create_tag_family
+from cv_kits.april_tags.families.TagFamily import analysis_errors, \
+    code_complexity
+from cv_kits.april_tags.families.TagFamilyGenerator import \
+    default_min_complexity, generate_tag_codes, write_tag_family_module
+
+TAG_BITS = 6
+MIN_HAMMING = 11
+
+
+def _rotated_bits(_code, _tag_bits):
+    """
+    :return: 4 flat bool arrays of code rotated by 0, 90, 180 and 270 degree,
+             built with `numpy.rot90` instead of the bit operations under test
+    """
+    _bits = np.array([(_code >> _k) & 1 for _k in range(_tag_bits ** 2)],
+                     dtype=bool).reshape(_tag_bits, _tag_bits)
+    return [np.rot90(_bits, _k).ravel() for _k in range(4)]
+
+
+def test_generated_codes_keep_36h11_properties():
+    _codes = generate_tag_codes(TAG_BITS, MIN_HAMMING, _max_codes=30)
+    assert 30 == len(_codes)
+    assert len(set(_codes)) == len(_codes)
+    _rotations = [_rotated_bits(_code, TAG_BITS) for _code in _codes]
+    for _code_rotations in _rotations:
+        assert min(np.count_nonzero(_code_rotations[0] != _rotation)
+                   for _rotation in _code_rotations[1:]) >= MIN_HAMMING
+    for _first, _second in itertools.combinations(_rotations, 2):
+        assert min(np.count_nonzero(_first[0] != _rotation)
+                   for _rotation in _second) >= MIN_HAMMING
+    assert code_complexity(np.array(_codes, dtype=np.uint64),
+                           TAG_BITS).min() >= default_min_complexity(TAG_BITS)
+
+
+def test_tag36h11_table_analysis():
+    _report = create_tag_family('Tag36h11').analyze(
+        _min_complexity=default_min_complexity(TAG_BITS))
+    assert 587 == _report['codes']
+    assert MIN_HAMMING == _report['min_distance']
+    assert _report['min_self_distance'] >= MIN_HAMMING
+    assert _report['min_complexity'] >= default_min_complexity(TAG_BITS)
+    assert [] == analysis_errors(_report)
+
+
+def test_written_module_matches_tag36h11(tmp_path):
+    _codes = [int(_code) for _code in create_tag_family('Tag36h11').tagCodes]
+    _file_path = tmp_path / 'Tag36h11.py'
+    write_tag_family_module(str(_file_path), 'Tag36h11', 't36h11', 36, _codes)
+    with open(inspect.getsourcefile(Tag36h11)) as _fp:
+        _expected = _fp.read().splitlines()
+    # Only creator and date of header differ
+    assert _expected[5:] == _file_path.read_text().splitlines()[5:]